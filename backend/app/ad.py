@@ -0,0 +1,201 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from .cache import TTLCache
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# ============ احراز هویت Active Directory (LDAP bind) ============
+#
+# برای هر ورود: DN کاربر با حساب سرویس (AD_USERNAME) و AD_USER_FILTER جستجو و سپس
+# با رمز کاربر bind می‌شود. اتصال‌ها در یک pool ماندگار می‌مانند و پس از bind کاربر
+# دوباره با حساب سرویس bind می‌شوند. همه‌ی فراخوانی‌های مسدودکننده‌ی python-ldap در
+# executor اختصاصی با AD_POOL_SIZE نخ اجرا می‌شوند، نه در نخ درخواست.
+#
+# برای آزمایش با slapd محلی مثلاً:
+#   AD_SERVER=ldap://localhost:389  AD_BASE_DN=dc=example,dc=org
+#   AD_USERNAME=cn=admin,dc=example,dc=org  AD_USER_FILTER=(uid={username})
+
+class DirectoryUnavailable(Exception):
+    """
+    سرور LDAP در دسترس نیست (با ورود ناموفق کاربر فرق دارد)
+    """
+
+class LDAPConnectionPool:
+    """
+    pool محدود از اتصال‌های LDAP که با حساب سرویس bind شده‌اند
+    """
+
+    def __init__(self, uri: str, bind_dn: str, password: str, size: int, timeout: float):
+        self.uri = uri
+        self.bind_dn = bind_dn
+        self.password = password
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self):
+        import ldap
+
+        conn = ldap.initialize(self.uri)
+        conn.protocol_version = ldap.VERSION3
+        # AD برای جستجو از ریشه‌ی دامنه referral برمی‌گرداند که نباید دنبال شود
+        conn.set_option(ldap.OPT_REFERRALS, 0)
+        conn.set_option(ldap.OPT_NETWORK_TIMEOUT, self.timeout)
+        conn.set_option(ldap.OPT_TIMEOUT, self.timeout)
+        conn.simple_bind_s(self.bind_dn, self.password)
+        return conn
+
+    def rebind(self, conn):
+        conn.simple_bind_s(self.bind_dn, self.password)
+
+    @contextmanager
+    def connection(self):
+        """
+        گرفتن یک اتصال؛ اتصالی که در حین استفاده خطا بدهد دور انداخته می‌شود
+        """
+        import ldap
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise DirectoryUnavailable("همه‌ی اتصال‌های LDAP مشغول‌اند")
+        conn = None
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                try:
+                    conn = self._connect()
+                except ldap.LDAPError as e:
+                    raise DirectoryUnavailable(str(e)) from e
+            yield conn
+            self._idle.put(conn)
+            conn = None
+        finally:
+            if conn is not None:
+                self._discard(conn)
+            self._slots.release()
+
+    def _discard(self, conn):
+        try:
+            conn.unbind_s()
+        except Exception:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+class ADAuthenticator:
+    """
+    احراز هویت bind روی AD با pool اتصال و کش کوتاه‌مدت نتیجه‌های موفق
+
+    کش فقط hash نمک‌دار (PBKDF2) رمز را نگه می‌دارد، نه خود رمز را؛ ورودهای
+    پشت سر هم یک کاربر در AD_CACHE_TTL ثانیه به کنترلر دامنه نمی‌رسند.
+    ورودهای ناموفق کش نمی‌شوند تا سیاست قفل حساب AD معتبر بماند.
+    """
+
+    def __init__(self):
+        self.pool = LDAPConnectionPool(
+            settings.AD_SERVER, settings.AD_USERNAME, settings.AD_PASSWORD,
+            settings.AD_POOL_SIZE, settings.AD_TIMEOUT,
+        )
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        self._cache = TTLCache(settings.AD_CACHE_MAXSIZE, settings.AD_CACHE_TTL)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=settings.AD_POOL_SIZE, thread_name_prefix="ldap")
+            return self._executor
+
+    # ---------- کش ----------
+
+    @staticmethod
+    def _digest(password: str, salt: bytes) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, settings.AD_CACHE_HASH_ITERATIONS)
+
+    def _cached(self, username: str, password: str) -> bool:
+        entry = self._cache.get(username)
+        if entry is None:
+            return False
+        salt, digest = entry
+        return hmac.compare_digest(self._digest(password, salt), digest)
+
+    def _remember(self, username: str, password: str):
+        salt = os.urandom(16)
+        self._cache.set(username, (salt, self._digest(password, salt)))
+
+    # ---------- LDAP ----------
+
+    def _bind(self, username: str, password: str) -> bool:
+        import ldap
+        from ldap.filter import escape_filter_chars
+
+        # بدون رمز، bind «بی‌نام» انجام می‌شود که همیشه موفق است
+        if not password:
+            return False
+        user_filter = settings.AD_USER_FILTER.format(username=escape_filter_chars(username))
+        # یک تلاش دوباره با اتصال تازه برای اتصال‌های ماندگاری که سرور بسته است
+        for attempt in range(2):
+            try:
+                with self.pool.connection() as conn:
+                    results = conn.search_s(settings.AD_BASE_DN, ldap.SCOPE_SUBTREE, user_filter, ["1.1"])
+                    # ردیف‌های بدون DN همان referralها هستند
+                    dns = [dn for dn, _ in results if dn]
+                    if len(dns) != 1:
+                        return False
+                    try:
+                        conn.simple_bind_s(dns[0], password)
+                        return True
+                    except ldap.INVALID_CREDENTIALS:
+                        return False
+                    finally:
+                        # اگر bind دوباره‌ی حساب سرویس خطا بدهد، اتصال دور انداخته می‌شود
+                        self.pool.rebind(conn)
+            except ldap.SERVER_DOWN as e:
+                # اتصال‌های بیکار دیگر هم به همان سرور بسته‌شده اشاره می‌کنند
+                self.pool.close()
+                if attempt:
+                    raise DirectoryUnavailable(str(e)) from e
+            except ldap.LDAPError as e:
+                raise DirectoryUnavailable(str(e)) from e
+        return False
+
+    def _authenticate(self, username: str, password: str) -> bool:
+        if self._bind(username, password):
+            self._remember(username, password)
+            return True
+        return False
+
+    async def authenticate(self, username: str, password: str) -> bool:
+        """
+        بررسی نام کاربری و رمز در AD (خطای DirectoryUnavailable اگر سرور در دسترس نباشد)
+        """
+        username = username.lower()
+        if await run_in_threadpool(self._cached, username, password):
+            return True
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), self._authenticate, username, password)
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+        self.pool.close()
+
+ad_authenticator = ADAuthenticator()
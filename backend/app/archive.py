@@ -0,0 +1,303 @@
+import argparse
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import AssetHistory
+
+logger = logging.getLogger(__name__)
+
+# ============ آرشیو ستونی تاریخچه‌ی تغییرات ============
+#
+# هر ماه یک فایل history-YYYY-MM.arc دارد. ردیف‌ها بر اساس (asset_id, id) مرتب‌اند
+# و در row group های ARCHIVE_ROW_GROUP_SIZE تایی ذخیره می‌شوند؛ هر ستون هر row group
+# جداگانه با zlib فشرده می‌شود. ساختار فایل:
+#
+#   MAGIC | ستون‌های row group 1 | ستون‌های row group 2 | ... | footer (JSON) | طول footer (8 بایت) | MAGIC
+#
+# footer برای هر row group آفست و طول ستون‌ها و بازه‌ی asset_id را دارد، و manifest.json
+# برای هر پارتیشن بازه‌ی asset_id و created_at را؛ پس خواندن تاریخچه‌ی یک دارایی فقط
+# فایل‌ها و row group هایی را باز می‌کند که می‌توانند آن را داشته باشند.
+
+MAGIC = b"AHARC1\n"
+MANIFEST = "manifest.json"
+
+INT_COLUMNS = ("id", "asset_id", "user_id", "created_at")
+TEXT_COLUMNS = ("change_type", "old_value", "new_value", "description")
+COLUMNS = INT_COLUMNS + TEXT_COLUMNS
+
+# مقدار NULL در ستون‌های عددی
+_NULL = -(2 ** 63)
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+def _to_micros(value: datetime) -> int:
+    return (value - _EPOCH) // _MICROSECOND
+
+def _from_micros(value: int) -> datetime:
+    return _EPOCH + value * _MICROSECOND
+
+# ============ نوشتن و خواندن یک فایل پارتیشن ============
+
+def _encode_column(name: str, values: List[Any]) -> bytes:
+    if name in INT_COLUMNS:
+        if name == "created_at":
+            values = [_to_micros(value) if value is not None else None for value in values]
+        raw = array("q", (_NULL if value is None else value for value in values)).tobytes()
+    else:
+        raw = json.dumps(values, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return zlib.compress(raw, settings.ARCHIVE_COMPRESSION_LEVEL)
+
+def _decode_column(name: str, data: bytes) -> List[Any]:
+    raw = zlib.decompress(data)
+    if name not in INT_COLUMNS:
+        return json.loads(raw)
+    values = array("q")
+    values.frombytes(raw)
+    if name == "created_at":
+        return [None if value == _NULL else _from_micros(value) for value in values]
+    return [None if value == _NULL else value for value in values]
+
+def write_partition(path: str, rows: List[Dict[str, Any]]):
+    """
+    نوشتن ردیف‌ها در یک فایل پارتیشن (جایگزینی اتمی با os.replace)
+    """
+    rows = sorted(rows, key=lambda row: (row["asset_id"], row["id"]))
+    size = settings.ARCHIVE_ROW_GROUP_SIZE
+    groups = []
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(MAGIC)
+        for start in range(0, len(rows), size):
+            chunk = rows[start:start + size]
+            columns = {}
+            for name in COLUMNS:
+                data = _encode_column(name, [row[name] for row in chunk])
+                columns[name] = [file.tell(), len(data)]
+                file.write(data)
+            groups.append({
+                "rows": len(chunk),
+                "min_asset_id": chunk[0]["asset_id"],
+                "max_asset_id": chunk[-1]["asset_id"],
+                "columns": columns,
+            })
+        footer = json.dumps({"row_groups": groups}, separators=(",", ":")).encode("utf-8")
+        file.write(footer)
+        file.write(struct.pack("<Q", len(footer)))
+        file.write(MAGIC)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+class PartitionReader:
+    """
+    خواندن یک فایل پارتیشن؛ footer یک‌بار خوانده و نگه داشته می‌شود
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as file:
+            file.seek(-(8 + len(MAGIC)), os.SEEK_END)
+            length, = struct.unpack("<Q", file.read(8))
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"فایل آرشیو نامعتبر است: {path}")
+            file.seek(-(8 + len(MAGIC) + length), os.SEEK_END)
+            self.row_groups = json.loads(file.read(length))["row_groups"]
+
+    def _read_columns(self, file, group: Dict, names) -> Dict[str, List[Any]]:
+        columns = {}
+        for name in names:
+            offset, length = group["columns"][name]
+            file.seek(offset)
+            columns[name] = _decode_column(name, file.read(length))
+        return columns
+
+    def rows_for_asset(self, asset_id: int) -> List[Dict[str, Any]]:
+        """
+        ردیف‌های یک دارایی؛ فقط row group های هم‌پوشان و در آن‌ها ابتدا فقط ستون asset_id خوانده می‌شود
+        """
+        groups = [group for group in self.row_groups if group["min_asset_id"] <= asset_id <= group["max_asset_id"]]
+        if not groups:
+            return []
+        rows = []
+        with open(self.path, "rb") as file:
+            for group in groups:
+                asset_ids = self._read_columns(file, group, ["asset_id"])["asset_id"]
+                start, end = bisect_left(asset_ids, asset_id), bisect_right(asset_ids, asset_id)
+                if start == end:
+                    continue
+                columns = self._read_columns(file, group, [name for name in COLUMNS if name != "asset_id"])
+                for index in range(start, end):
+                    row = {name: columns[name][index] for name in columns}
+                    row["asset_id"] = asset_id
+                    rows.append(row)
+        return rows
+
+    def all_rows(self) -> List[Dict[str, Any]]:
+        rows = []
+        with open(self.path, "rb") as file:
+            for group in self.row_groups:
+                columns = self._read_columns(file, group, COLUMNS)
+                rows.extend(
+                    {name: columns[name][index] for name in COLUMNS}
+                    for index in range(group["rows"])
+                )
+        return rows
+
+# ============ Manifest و پارتیشن‌ها ============
+
+class HistoryArchive:
+    """
+    مجموعه‌ی پارتیشن‌های ماهانه در ARCHIVE_DIR همراه با manifest
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+        self._manifest_mtime: Optional[int] = None
+        self._readers: Dict[str, Tuple[int, PartitionReader]] = {}
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def partitions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        manifest فعلی (با بارگذاری دوباره در صورت تغییر فایل توسط پردازه‌ی دیگر)
+        """
+        path = self._path(MANIFEST)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        with self._lock:
+            if mtime != self._manifest_mtime:
+                with open(path, encoding="utf-8") as file:
+                    self._manifest = json.load(file)["partitions"]
+                self._manifest_mtime = mtime
+            return self._manifest
+
+    def _save_manifest(self, partitions: Dict[str, Dict[str, Any]]):
+        path = self._path(MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump({"partitions": partitions}, file, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def _reader(self, name: str) -> PartitionReader:
+        path = self._path(name)
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            cached = self._readers.get(name)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, PartitionReader(path))
+                self._readers[name] = cached
+            return cached[1]
+
+    def rows_for_asset(self, asset_id: int) -> List[Dict[str, Any]]:
+        """
+        تاریخچه‌ی آرشیوشده‌ی یک دارایی از پارتیشن‌هایی که بازه‌ی asset_id آن‌ها شاملش می‌شود
+        """
+        rows = []
+        for month, partition in sorted(self.partitions().items()):
+            if partition["min_asset_id"] <= asset_id <= partition["max_asset_id"]:
+                rows.extend(self._reader(partition["file"]).rows_for_asset(asset_id))
+        return rows
+
+    def add_month(self, month: str, rows: List[Dict[str, Any]]):
+        """
+        افزودن ردیف‌های یک ماه به پارتیشن آن (ادغام با ردیف‌های قبلی، بدون تکرار id)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        partitions = dict(self.partitions())
+        name = f"history-{month}.arc"
+        merged = {row["id"]: row for row in rows}
+        if month in partitions:
+            for row in self._reader(name).all_rows():
+                merged.setdefault(row["id"], row)
+        rows = list(merged.values())
+        write_partition(self._path(name), rows)
+        partitions[month] = {
+            "file": name,
+            "rows": len(rows),
+            "min_asset_id": min(row["asset_id"] for row in rows),
+            "max_asset_id": max(row["asset_id"] for row in rows),
+            "min_created_at": min(row["created_at"] for row in rows).isoformat(),
+            "max_created_at": max(row["created_at"] for row in rows).isoformat(),
+            "min_id": min(row["id"] for row in rows),
+            "max_id": max(row["id"] for row in rows),
+        }
+        self._save_manifest(partitions)
+
+history_archive = HistoryArchive(settings.ARCHIVE_DIR)
+
+# ============ کار آرشیو ============
+
+def archive_asset_histories(db: Session, older_than_days: int, archive: HistoryArchive = history_archive) -> Dict[str, int]:
+    """
+    انتقال ردیف‌های قدیمی‌تر از older_than_days روز به آرشیو ماهانه
+
+    ترتیب کار برای ایمنی در برابر قطع شدن: ابتدا فایل پارتیشن و manifest نوشته
+    می‌شوند و سپس ردیف‌ها از پایگاه‌داده حذف می‌شوند؛ اجرای دوباره ردیف‌های
+    تکراری را با id ادغام می‌کند.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    oldest = db.execute(select(func.min(AssetHistory.created_at)).where(AssetHistory.created_at < cutoff)).scalar()
+    columns = [getattr(AssetHistory, name) for name in COLUMNS]
+    archived = {}
+    # هر ماه جداگانه خوانده می‌شود تا حافظه به اندازه‌ی یک ماه محدود بماند
+    month_start = oldest.replace(day=1, hour=0, minute=0, second=0, microsecond=0) if oldest else cutoff
+    while month_start < cutoff:
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
+        statement = (
+            select(*columns)
+            .where(AssetHistory.created_at >= month_start, AssetHistory.created_at < min(next_month, cutoff))
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        rows = [dict(zip(COLUMNS, row)) for row in db.execute(statement)]
+        if rows:
+            month = month_start.strftime("%Y-%m")
+            archive.add_month(month, rows)
+            ids = [row["id"] for row in rows]
+            for start in range(0, len(ids), 1000):
+                db.execute(delete(AssetHistory).where(AssetHistory.id.in_(ids[start:start + 1000])))
+            db.commit()
+            archived[month] = len(rows)
+            logger.info("%d ردیف تاریخچه‌ی ماه %s آرشیو شد", len(rows), month)
+        month_start = next_month
+    return archived
+
+def main():
+    """
+    اجرا از خط فرمان (مثلاً با cron):
+
+        python -m app.archive --older-than-days 365
+    """
+    from .database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="آرشیو تاریخچه‌ی تغییرات قدیمی دارایی‌ها")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_AFTER_DAYS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    db = SessionLocal()
+    try:
+        archived = archive_asset_histories(db, args.older_than_days)
+    finally:
+        db.close()
+    for month, count in archived.items():
+        print(f"{month}: {count}")
+    print(f"مجموع: {sum(archived.values())} ردیف")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, insert
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from .auth import current_user_id
+from .config import settings
+from .database import SessionLocal
+from .models import AssetHistory
+
+logger = logging.getLogger(__name__)
+
+# ============ ثبت خودکار تاریخچه‌ی تغییرات دارایی ============
+
+# نوع تغییر برای هر فیلد؛ بقیه‌ی فیلدها «ویرایش» ثبت می‌شوند
+CHANGE_TYPES = {
+    "location_id": "نقل مکان",
+    "owner_id": "تعویض مالک",
+    "department_id": "تغییر واحد",
+    "status": "تغییر وضعیت",
+    "warranty_expiry": "تغییر گارانتی",
+}
+CHANGE_TYPE_CREATE = "ایجاد"
+CHANGE_TYPE_UPDATE = "ویرایش"
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(getattr(value, "value", value))
+
+def make_entry(asset_id: int, change_type: str, old_value: Any = None, new_value: Any = None, description: Optional[str] = None) -> Dict[str, Any]:
+    return {
+        "asset_id": asset_id,
+        # کاربر درخواست جاری؛ برای کارهای پس‌زمینه AUDIT_USER_ID
+        "user_id": current_user_id.get() or settings.AUDIT_USER_ID,
+        "change_type": change_type,
+        "old_value": _text(old_value),
+        "new_value": _text(new_value),
+        "description": description,
+        # زمان خود تغییر، نه زمان نوشتن دسته
+        "created_at": datetime.utcnow(),
+    }
+
+def diff_entries(asset_id: int, old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    یک ردیف تاریخچه برای هر فیلدی که مقدارش عوض شده است
+    """
+    return [
+        make_entry(asset_id, CHANGE_TYPES.get(field, CHANGE_TYPE_UPDATE), old.get(field), value, field)
+        for field, value in new.items()
+        if old.get(field) != value
+    ]
+
+def creation_entries(asset) -> List[Dict[str, Any]]:
+    return [make_entry(asset.id, CHANGE_TYPE_CREATE, None, asset.asset_number)]
+
+def _insert(db: Session, entries: List[Dict[str, Any]]):
+    db.execute(insert(AssetHistory.__table__), entries)
+
+def write_entries(entries: List[Dict[str, Any]]):
+    """
+    نوشتن یک دسته در تراکنش جداگانه؛ اگر دسته شکست بخورد ردیف‌ها یکی‌یکی نوشته
+    می‌شوند تا یک ردیف خراب (مثلاً دارایی حذف‌شده) بقیه را از بین نبرد.
+    """
+    db = SessionLocal()
+    try:
+        try:
+            _insert(db, entries)
+            db.commit()
+            return
+        except DBAPIError:
+            db.rollback()
+        for entry in entries:
+            try:
+                _insert(db, [entry])
+                db.commit()
+            except DBAPIError as e:
+                db.rollback()
+                logger.warning("ثبت تاریخچه‌ی دارایی %s ناموفق بود: %s", entry["asset_id"], e.orig)
+    finally:
+        db.close()
+
+def _write_logged(entries: List[Dict[str, Any]]):
+    try:
+        write_entries(entries)
+    except Exception:
+        logger.exception("نوشتن %d ردیف تاریخچه ناموفق بود", len(entries))
+
+class AuditWriter:
+    """
+    نویسنده‌ی پس‌زمینه‌ی تاریخچه (write-behind)
+
+    ردیف‌ها پس از commit تغییر دارایی در صف می‌روند و نخ پس‌زمینه هر
+    AUDIT_FLUSH_INTERVAL ثانیه یا با رسیدن به AUDIT_MAX_BATCH ردیف آن‌ها را
+    با یک executemany درج می‌کند. اگر صف پر باشد یا نخ در حال اجرا نباشد،
+    ردیف‌ها همان‌جا نوشته می‌شوند تا چیزی گم نشود (فشار برگشتی روی نخ درخواست)؛
+    مگر روی نخ حلقه‌ی رویداد (مسیرهای async با run_sync) که نوشتن مسدودکننده همه‌ی
+    درخواست‌ها را معطل می‌کند، پس ردیف‌ها به یک executor جداگانه سپرده می‌شوند.
+    """
+
+    def __init__(self, flush_interval: float, max_batch: int, max_queue: int):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._overflow: Optional[ThreadPoolExecutor] = None
+        self._overflow_lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """
+        توقف نخ پس از نوشتن همه‌ی ردیف‌های مانده در صف
+        """
+        with self._overflow_lock:
+            overflow, self._overflow = self._overflow, None
+        if overflow is not None:
+            overflow.shutdown(wait=True)
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout=30)
+        self._thread = None
+
+    def _write_now(self, entries: List[Dict[str, Any]]):
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            write_entries(entries)
+            return
+        with self._overflow_lock:
+            if self._overflow is None:
+                self._overflow = ThreadPoolExecutor(1, thread_name_prefix="audit-overflow")
+            self._overflow.submit(_write_logged, entries)
+
+    def enqueue(self, entries: List[Dict[str, Any]]):
+        if self._thread is None:
+            self._write_now(entries)
+            return
+        overflow = []
+        for entry in entries:
+            try:
+                self._queue.put_nowait(entry)
+            except queue.Full:
+                overflow.append(entry)
+        if overflow:
+            self._write_now(overflow)
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            entry = self._queue.get()
+            if entry is None:
+                break
+            # دسته تا پایان بازه‌ی flush یا رسیدن به حداکثر اندازه پر می‌شود
+            batch = [entry]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if entry is None:
+                    stopping = True
+                    break
+                batch.append(entry)
+            _write_logged(batch)
+
+audit_writer = AuditWriter(settings.AUDIT_FLUSH_INTERVAL, settings.AUDIT_MAX_BATCH, settings.AUDIT_MAX_QUEUE)
+
+# ============ اتصال به تراکنش ============
+
+def record(db: Session, entries: List[Dict[str, Any]]):
+    """
+    ثبت ردیف‌های تاریخچه‌ی یک تغییر
+
+    در حالت AUDIT_MODE=sync ردیف‌ها در همان تراکنش نوشته می‌شوند (ماندگاری کامل)؛
+    در حالت async تا commit نگه داشته و سپس به نویسنده‌ی پس‌زمینه سپرده می‌شوند.
+    با rollback هیچ ردیفی ثبت نمی‌شود.
+    """
+    if not entries:
+        return
+    if settings.AUDIT_MODE == "sync":
+        _insert(db, entries)
+    else:
+        db.info.setdefault("pending_audit", []).extend(entries)
+
+def record_bulk(db: Session, entries: List[Dict[str, Any]]):
+    """
+    ثبت ردیف‌های یک تغییر دسته‌ای با یک executemany در همان تراکنش
+
+    صف نویسنده‌ی پس‌زمینه برای چند ردیف هر درخواست است؛ هزاران ردیف یک دسته
+    آن را پر می‌کنند، پس همیشه همراه با خود تغییر commit می‌شوند.
+    """
+    if entries:
+        _insert(db, entries)
+
+@event.listens_for(Session, "after_commit")
+def _flush_pending_audit(session: Session):
+    entries = session.info.pop("pending_audit", None)
+    if entries:
+        audit_writer.enqueue(entries)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending_audit(session: Session):
+    session.info.pop("pending_audit", None)
@@ -1,7 +1,17 @@
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 import jwt
+from fastapi import Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from . ad import ad_authenticator
+from . cache import TTLCache
 from . config import settings
+from . database import SessionLocal
+from . models import User
 
 def create_access_token(data:  dict, expires_delta: Optional[timedelta] = None):
     """
@@ -27,10 +37,112 @@ def verify_token(token: str):
     except jwt.InvalidTokenError:
         return None
 
-# Active Directory Authentication (در مراحل بعدی پکامل می‌شود)
-def authenticate_user_ad(username: str, password: str):
+# ============ کاربر جاری (Dependency) ============
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    اطلاعات کاربر احراز هویت‌شده (مستقل از Session پایگاه‌داده، قابل نگه‌داری در کش)
+    """
+    id: int
+    username: str
+    is_admin: bool
+    department_id: Optional[int]
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+# توکن ← Principal؛ ورودی‌ها با انقضای توکن یا AUTH_CACHE_TTL (هر کدام زودتر) حذف می‌شوند
+token_cache = TTLCache(settings.AUTH_CACHE_MAXSIZE, settings.AUTH_CACHE_TTL)
+
+# شناسه‌ی کاربر درخواست جاری برای ثبت در تاریخچه‌ی تغییرات
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+def _unauthorized(detail: str = "توکن نامعتبر یا منقضی شده است"):
+    return HTTPException(status_code=401, detail=detail, headers={"WWW-Authenticate": "Bearer"})
+
+def _load_principal(username: str) -> Optional[Principal]:
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if not user or not user.is_active:
+            return None
+        return Principal(user.id, user.username, bool(user.is_admin), user.department_id)
+    finally:
+        db.close()
+
+# توکن‌های دارای scope فقط همان‌جا پذیرفته می‌شوند، نه به‌جای توکن ورود
+STREAM_SCOPE = "stream"
+
+async def _authenticate(token: str, scope: Optional[str] = None) -> Principal:
+    """
+    Principal صاحب توکن با scope مورد انتظار (None یعنی توکن ورود)
+    """
+    principal = token_cache.get((scope, token))
+    if principal is None:
+        payload = verify_token(token)
+        if not payload or "sub" not in payload or payload.get("scope") != scope:
+            raise _unauthorized()
+        principal = await run_in_threadpool(_load_principal, payload["sub"])
+        if principal is None:
+            raise _unauthorized()
+        expires_in = payload["exp"] - time.time() if "exp" in payload else None
+        token_cache.set((scope, token), principal, expires_in)
+
+    current_user_id.set(principal.id)
+    return principal
+
+async def get_current_user(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme)) -> Optional[Principal]:
+    """
+    کاربر صاحب توکن Bearer درخواست (در حالت AUTH_ENABLED=false: None)
+
+    توکنی که یک بار تایید شده تا پایان اعتبار کش می‌شود، پس درخواست‌های بعدی
+    نه امضا را دوباره بررسی می‌کنند و نه کاربر را از پایگاه‌داده می‌خوانند.
+    ویرایش یا حذف کاربر ورودی‌های او را باطل می‌کند (invalidate_user)؛ در
+    پردازه‌های دیگر تغییر حداکثر پس از AUTH_CACHE_TTL ثانیه دیده می‌شود.
+    """
+    if not settings.AUTH_ENABLED:
+        return None
+    if credentials is None:
+        raise _unauthorized("احراز هویت لازم است")
+    return await _authenticate(credentials.credentials)
+
+def create_stream_token(principal: Principal) -> str:
+    """
+    توکن STREAM_TOKEN_EXPIRE_SECONDS ثانیه‌ای جریان تغییرات برای کاربر جاری
+
+    EventSource مرورگر هدر Authorization نمی‌فرستد، پس توکن در آدرس می‌آید (و ممکن است
+    در لاگ‌ها بماند)؛ برای همین کوتاه‌عمر است و جای توکن ورود را نمی‌گیرد.
+    """
+    return create_access_token(
+        {"sub": principal.username, "scope": STREAM_SCOPE},
+        timedelta(seconds=settings.STREAM_TOKEN_EXPIRE_SECONDS),
+    )
+
+async def get_stream_user(
+    token: Optional[str] = Query(None, description="توکن POST /api/assets/stream/token (برای EventSource)"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+) -> Optional[Principal]:
+    """
+    کاربر جریان تغییرات: توکن Bearer یا توکن کوتاه‌عمر ?token=
+    """
+    if not settings.AUTH_ENABLED:
+        return None
+    if credentials is not None:
+        return await _authenticate(credentials.credentials)
+    if token is None:
+        raise _unauthorized("احراز هویت لازم است")
+    # توکن فقط هنگام اتصال بررسی می‌شود؛ برای اتصال دوباره پس از انقضا توکن تازه لازم است
+    return await _authenticate(token, STREAM_SCOPE)
+
+def invalidate_user(user_id: int):
+    """
+    حذف توکن‌های کش‌شده‌ی یک کاربر پس از ویرایش یا حذف او
+    """
+    token_cache.remove_if(lambda principal: principal.id == user_id)
+
+# Active Directory Authentication
+async def authenticate_user_ad(username: str, password: str) -> bool:
     """
-    احراز هویت کاربر از طریق Active Directory
+    احراز هویت کاربر از طریق Active Directory (bind با pool اتصال؛ app/ad.py)
     """
-    # این تابع در مرحله بعدی پکامل می‌شود
-    pass
+    return await ad_authenticator.authenticate(username, password)
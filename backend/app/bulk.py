@@ -0,0 +1,245 @@
+import csv
+import io
+import logging
+from collections import defaultdict
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, select, text, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import Session
+
+from . import audit
+from .changefeed import asset_keys, change_feed
+from .config import settings
+from .models import Asset
+from .schemas import AssetCreate, AssetResponse, BulkImportResult, BulkRowError
+from .search import search_index
+from .warranty import warranty_scheduler
+from .stats import apply_asset_deltas, stat_key
+
+logger = logging.getLogger(__name__)
+
+# ============ ورود دسته‌ای دارایی‌ها ============
+
+ASSET_FIELDS = list(AssetCreate.model_fields)
+
+def parse_csv(content: bytes) -> List[Dict[str, Any]]:
+    """
+    تبدیل فایل CSV به فهرست ردیف‌ها (خانه‌های خالی = None)
+    """
+    reader = csv.DictReader(io.StringIO(content.decode("utf-8-sig")))
+    return [
+        {key.strip(): (value if value != "" else None) for key, value in row.items() if key}
+        for row in reader
+    ]
+
+def _validate_rows(rows: List[Dict[str, Any]], upsert: bool, key: str, result: BulkImportResult) -> List[Tuple[int, Dict[str, Any]]]:
+    """
+    اعتبارسنجی ردیف‌به‌ردیف با AssetCreate؛ ردیف نامعتبر فقط در گزارش خطا ثبت می‌شود
+    """
+    valid = []
+    seen_keys = set()
+    for index, row in enumerate(rows):
+        try:
+            data = AssetCreate(**row).dict()
+        except (ValidationError, TypeError) as e:
+            _fail(result, index, row.get("asset_number") if isinstance(row, dict) else None, str(e))
+            continue
+        if data[key] is None:
+            if upsert:
+                _fail(result, index, data["asset_number"], f"مقدار {key} برای کلید upsert الزامی است")
+                continue
+        elif data[key] in seen_keys:
+            _fail(result, index, data["asset_number"], f"مقدار {key} در همین دسته تکراری است")
+            continue
+        seen_keys.add(data[key])
+        valid.append((index, data))
+    return valid
+
+def _fail(result: BulkImportResult, index: int, asset_number, error: str):
+    result.failed += 1
+    result.errors.append(BulkRowError(row=index, asset_number=asset_number, error=error[:500]))
+
+UNIQUE_FIELDS = (("asset_number", "شماره دارایی"), ("serial_number", "شماره سریال"))
+
+def _row_error(db: Session, data: Dict[str, Any], error: DBAPIError, existing_id: Optional[int]) -> str:
+    """
+    پیام خطای ردیفی که نوشتنش شکست خورد
+
+    متن خطای درایور (نام جدول‌ها و قیدها) فقط در لاگ سرور می‌آید؛ برای تکرار مقدار یکتا
+    خود پایگاه‌داده پرسیده می‌شود چون نام قیدها در SQL Server خودکار است.
+    """
+    logger.warning("ورود دسته‌ای: دارایی %s نوشته نشد: %s", data["asset_number"], error.orig)
+    if not isinstance(error, IntegrityError):
+        return "ذخیره‌ی ردیف ناموفق بود"
+    if "foreign key" in str(error.orig).lower():
+        return "دسته، مالک، واحد یا مکان این ردیف وجود ندارد"
+    table = Asset.__table__
+    for field, label in UNIQUE_FIELDS:
+        if data[field] is None:
+            continue
+        duplicate = select(table.c.id).where(table.c[field] == data[field])
+        if existing_id is not None:
+            duplicate = duplicate.where(table.c.id != existing_id)
+        if db.execute(duplicate.limit(1)).first():
+            return f"{label} {data[field]} تکراری است"
+    return "ذخیره‌ی ردیف ناموفق بود"
+
+def _merge_statement(key: str):
+    """
+    دستور MERGE برای upsert در SQL Server (یک رفت‌وبرگشت برای هر دسته با fast_executemany)
+    """
+    source = ", ".join(f":{field} AS {field}" for field in ASSET_FIELDS)
+    updates = ", ".join(f"target.{field} = source.{field}" for field in ASSET_FIELDS if field != key)
+    columns = ", ".join(ASSET_FIELDS)
+    values = ", ".join(f"source.{field}" for field in ASSET_FIELDS)
+    return text(
+        f"MERGE assets WITH (HOLDLOCK) AS target "
+        f"USING (SELECT {source}) AS source ON target.{key} = source.{key} "
+        f"WHEN MATCHED THEN UPDATE SET {updates}, target.updated_at = GETUTCDATE(), target.version = target.version + 1 "
+        f"WHEN NOT MATCHED THEN INSERT ({columns}, created_at, updated_at) "
+        f"VALUES ({values}, GETUTCDATE(), GETUTCDATE());"
+    )
+
+def _write_chunk(db: Session, rows: List[Dict[str, Any]], upsert: bool, key: str, existing: Dict[Any, Any]):
+    """
+    نوشتن یک دسته با executemany
+    """
+    table = Asset.__table__
+    if upsert and db.bind.dialect.name == "mssql":
+        db.execute(_merge_statement(key), rows)
+        return
+
+    new_rows = [row for row in rows if row[key] not in existing]
+    changed_rows = [row for row in rows if row[key] in existing]
+    if new_rows:
+        db.execute(insert(table), new_rows)
+    if changed_rows:
+        now = datetime.utcnow()
+        statement = (
+            update(table)
+            .where(table.c[key] == bindparam("b_key"))
+            .values({
+                **{field: bindparam(f"b_{field}") for field in ASSET_FIELDS if field != key},
+                "updated_at": now,
+                "version": table.c.version + 1,
+            })
+        )
+        db.execute(statement, [
+            {"b_key": row[key], **{f"b_{field}": row[field] for field in ASSET_FIELDS if field != key}}
+            for row in changed_rows
+        ])
+
+def _existing_rows(db: Session, chunk: List[Tuple[int, Dict[str, Any]]], key: str, result: BulkImportResult):
+    """
+    وضعیت فعلی دارایی‌های هم‌کلید با ردیف‌های دسته (قفل‌شده تا پایان تراکنش دسته)
+
+    serial_number یکتا نیست؛ ردیفی که کلیدش با بیش از یک دارایی مطابقت دارد به‌جای
+    به‌روزرسانی چند دارایی در گزارش خطا می‌آید. (ردیف‌های باقی‌مانده، {کلید: ردیف فعلی})
+    """
+    table = Asset.__table__
+    matches = defaultdict(list)
+    for row in db.execute(
+        select(table.c.id, table.c.version, *(table.c[field] for field in ASSET_FIELDS))
+        .where(table.c[key].in_([data[key] for _, data in chunk]))
+        .with_for_update()
+    ).mappings():
+        matches[row[key]].append(row)
+
+    remaining = []
+    for index, data in chunk:
+        if len(matches[data[key]]) > 1:
+            _fail(result, index, data["asset_number"], f"مقدار {key} با {len(matches[data[key]])} دارایی مطابقت دارد")
+        else:
+            remaining.append((index, data))
+    existing = {value: rows[0] for value, rows in matches.items() if len(rows) == 1}
+    return remaining, existing
+
+def _record_changes(db: Session, written: List[Dict[str, Any]], key: str, existing: Dict[Any, Any]) -> List[Tuple[str, Dict[str, Any], Any]]:
+    """
+    تاریخچه و شمارنده‌های آمار ردیف‌های نوشته‌شده، مثل ایجاد و ویرایش تکی دارایی؛
+    رویدادهای جریان تغییرات برای انتشار پس از commit برمی‌گردند
+    """
+    table = Asset.__table__
+    inserted = [data for data in written if data[key] not in existing]
+    created = db.execute(
+        select(table).where(table.c.asset_number.in_([data["asset_number"] for data in inserted]))
+    ).all() if inserted else []
+
+    entries, deltas, events = [], [], []
+    for row in created:
+        entries.extend(audit.creation_entries(row))
+        deltas.append((None, stat_key(row)))
+        events.append(("create", {
+            "asset_id": row.id,
+            "version": row.version,
+            "asset": AssetResponse.model_validate(row).dict(),
+        }, asset_keys(row)))
+    for data in written:
+        old = existing.get(data[key])
+        if old is None:
+            continue
+        new = SimpleNamespace(**data)
+        entries.extend(audit.diff_entries(old["id"], old, data))
+        deltas.append((stat_key(SimpleNamespace(**old)), stat_key(new)))
+        events.append(("update", {
+            "asset_id": old["id"],
+            "version": old["version"] + 1,
+            "changes": {field: value for field, value in data.items() if old[field] != value},
+        }, asset_keys(SimpleNamespace(**old), new)))
+
+    apply_asset_deltas(db, deltas)
+    audit.record_bulk(db, entries)
+    return events
+
+def bulk_import_assets(db: Session, rows: List[Dict[str, Any]], upsert: bool = False, key: str = "asset_number") -> BulkImportResult:
+    """
+    ورود دسته‌ای دارایی‌ها در تراکنش‌های جداگانه برای هر دسته
+
+    اگر نوشتن یک دسته شکست بخورد، ردیف‌های همان دسته یکی‌یکی (هرکدام در savepoint)
+    تکرار می‌شوند تا فقط ردیف‌های خراب در گزارش خطا بیایند و بقیه ذخیره شوند.
+    تاریخچه، شمارنده‌های آمار و رویدادهای جریان تغییرات همان‌هایی‌اند که ایجاد و
+    ویرایش تکی دارایی ثبت می‌کنند.
+    """
+    result = BulkImportResult()
+    valid = _validate_rows(rows, upsert, key, result)
+    chunk_size = settings.BULK_CHUNK_SIZE
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        existing = {}
+        if upsert:
+            chunk, existing = _existing_rows(db, chunk, key, result)
+        try:
+            with db.begin_nested():
+                _write_chunk(db, [data for _, data in chunk], upsert, key, existing)
+            succeeded = chunk
+        except DBAPIError:
+            succeeded = []
+            for index, data in chunk:
+                try:
+                    with db.begin_nested():
+                        _write_chunk(db, [data], upsert, key, existing)
+                    succeeded.append((index, data))
+                except DBAPIError as e:
+                    current = existing.get(data[key])
+                    _fail(result, index, data["asset_number"], _row_error(db, data, e, current["id"] if current else None))
+
+        written = [data for _, data in succeeded]
+        events = _record_changes(db, written, key, existing)
+        db.commit()
+        for kind, payload, keys in events:
+            change_feed.publish(kind, payload, keys)
+
+        updated = sum(1 for data in written if data[key] in existing)
+        result.inserted += len(written) - updated
+        result.updated += updated
+
+    # ردیف‌های جدید از روی watermark در جستجوی بعدی به ایندکس اضافه می‌شوند
+    search_index.mark_stale()
+    warranty_scheduler.mark_stale()
+
+    return result
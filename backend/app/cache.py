@@ -0,0 +1,137 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from .config import settings
+
+# ============ کش داده‌های مرجع (واحدها، دسته‌ها، مکان‌ها) ============
+
+class TTLCache:
+    """
+    کش درون‌پردازه‌ای با انقضای زمانی (TTL) و حذف LRU
+
+    در کش داده‌های مرجع کلیدها tuple هستند و عضو اول آن‌ها namespace است تا
+    بتوان همه‌ی کلیدهای یک موجودیت را یکجا باطل کرد.
+
+    هر invalidate شماره‌ی نسل namespace را یکی بالا می‌برد. خواننده نسل را پیش از
+    بارگذاری می‌گیرد و به set می‌دهد؛ اگر در این فاصله نوشتنی کش را باطل کرده باشد
+    مقدار (احتمالاً کهنه) ذخیره نمی‌شود.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generations: Dict[Hashable, int] = defaultdict(int)
+        self._cleared = 0
+
+    def generation(self, namespace: Hashable) -> Tuple[int, int]:
+        with self._lock:
+            return self._cleared, self._generations[namespace]
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, generation: Optional[Tuple[int, int]] = None):
+        """
+        ذخیره‌ی مقدار؛ ttl اختیاری (کوتاه‌تر از ttl پیش‌فرض) برای مقادیری که خودشان منقضی می‌شوند
+
+        با generation (از generation(key[0]) پیش از بارگذاری) مقدار فقط وقتی ذخیره
+        می‌شود که namespace در این فاصله باطل نشده باشد.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            if generation is not None and generation != (self._cleared, self._generations[key[0]]):
+                return
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, namespace: str):
+        """
+        حذف همه‌ی کلیدهای یک namespace
+        """
+        with self._lock:
+            self._generations[namespace] += 1
+            for key in [key for key in self._data if key[0] == namespace]:
+                del self._data[key]
+
+    def remove_if(self, predicate: Callable[[Any], bool]):
+        """
+        حذف همه‌ی مقادیری که predicate برایشان درست است
+        """
+        with self._lock:
+            for key in [key for key, (_, value) in self._data.items() if predicate(value)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._cleared += 1
+            self._data.clear()
+
+reference_cache = TTLCache(settings.REFERENCE_CACHE_MAXSIZE, settings.REFERENCE_CACHE_TTL)
+
+# ============ پاسخ با ETag ============
+
+@lru_cache(maxsize=None)
+def _adapter(response_type) -> TypeAdapter:
+    return TypeAdapter(response_type)
+
+def _encode(data: Any, response_type) -> Tuple[bytes, str]:
+    """
+    سریال‌سازی پاسخ و ساخت ETag قوی از هش بدنه
+    """
+    adapter = _adapter(response_type)
+    body = adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def _respond(request: Request, body: bytes, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def cached_response(request: Request, key: tuple, loader: Callable[[], Any], response_type) -> Response:
+    """
+    پاسخ از کش (بدون پرس‌وجوی پایگاه‌داده) یا بارگذاری، سریال‌سازی و ذخیره در کش
+    """
+    entry = reference_cache.get(key)
+    if entry is None:
+        generation = reference_cache.generation(key[0])
+        entry = _encode(loader(), response_type)
+        reference_cache.set(key, entry, generation=generation)
+    return _respond(request, *entry)
+
+async def cached_response_async(request: Request, key: tuple, loader, response_type) -> Response:
+    """
+    نسخه‌ی async از cached_response (loader یک coroutine function است)
+    """
+    entry = reference_cache.get(key)
+    if entry is None:
+        generation = reference_cache.generation(key[0])
+        entry = _encode(await loader(), response_type)
+        reference_cache.set(key, entry, generation=generation)
+    return _respond(request, *entry)
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from .config import settings
+from .fastjson import dumps
+
+logger = logging.getLogger(__name__)
+
+# ============ جریان تغییرات دارایی‌ها (Server-Sent Events) ============
+#
+# مسیرهای نوشتن (ایجاد، ویرایش، حذف، ورود و جابه‌جایی دسته‌ای و ثبت تاریخچه) پس از commit
+# یک رویداد منتشر می‌کنند و GET /api/assets/stream آن را به مشترکان می‌فرستد تا
+# داشبوردها به‌جای پرس‌وجوی دوره‌ای فهرست‌ها فقط تغییرات را بگیرند.
+#
+#   - انتشار از هر نخی امن است (threadpool، run_sync، نخ‌های پس‌زمینه)؛ رویداد یک‌بار
+#     کدگذاری و با call_soon_threadsafe به صف هر مشترک در حلقه‌ی رویداد خودش سپرده می‌شود
+#   - STREAM_BUFFER_SIZE رویداد آخر در یک بافر حلقوی می‌ماند تا اتصال دوباره با
+#     Last-Event-ID از همان‌جا ادامه دهد؛ اگر آن رویداد دیگر در بافر نباشد (یا سرور
+#     دوباره راه‌اندازی شده باشد) اول رویداد reset می‌آید و کلاینت باید فهرست را دوباره بخواند
+#   - صف هر مشترک STREAM_CLIENT_QUEUE رویداد جا دارد؛ مشترکی که عقب بماند پس از
+#     رساندن رویدادهای صفش قطع می‌شود و با اتصال دوباره بقیه را از بافر می‌گیرد
+#
+# رویدادها در حافظه‌ی همان worker اند؛ با چند worker، مشترک فقط تغییرات workerی را
+# می‌بیند که به آن وصل است. uvicorn پیش از توقف منتظر بسته شدن اتصال‌ها می‌ماند، پس
+# سرور باید با --timeout-graceful-shutdown اجرا شود تا جریان‌های باز مانع خروج نشوند.
+
+FILTER_FIELDS = ("department_id", "location_id", "asset_type")
+
+Keys = Optional[Dict[str, Set[Any]]]
+
+def asset_keys(*states) -> Dict[str, Set[Any]]:
+    """
+    کلیدهای فیلتر یک رویداد از وضعیت‌های دارایی (قبل و بعد از تغییر)
+
+    دارایی‌ای که از یک واحد یا مکان بیرون می‌رود برای مشترکان همان واحد یا مکان هم اعلام می‌شود.
+    """
+    return {
+        field: {getattr(state, field) for state in states if hasattr(state, field)}
+        for field in FILTER_FIELDS
+    }
+
+class Subscription:
+    """
+    یک مشترک جریان: صف محدود در حلقه‌ی رویداد همان اتصال
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, filters: Dict[str, Any], maxsize: int):
+        self.loop = loop
+        self.filters = {field: value for field, value in filters.items() if value is not None}
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue(maxsize)
+        self.lagging = False
+
+    def matches(self, keys: Keys) -> bool:
+        if keys is None:
+            return True
+        return all(value in keys.get(field, ()) for field, value in self.filters.items())
+
+    def offer(self, frame: bytes):
+        # فقط در حلقه‌ی رویداد مشترک اجرا می‌شود
+        if self.lagging:
+            return
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+class ChangeFeed:
+    """
+    انتشار رویدادهای تغییر و نگه‌داری بافر حلقوی برای ادامه‌ی اتصال
+    """
+
+    def __init__(self, buffer_size: int, client_queue: int, max_clients: int):
+        self.client_queue = client_queue
+        self.max_clients = max_clients
+        # شناسه‌ی رویدادها «epoch.seq» است تا شناسه‌های پیش از راه‌اندازی دوباره شناخته شوند
+        self.epoch = format(int(time.time() * 1000), "x")
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._buffer: "deque[Tuple[int, Keys, bytes]]" = deque(maxlen=buffer_size)
+        self._subscribers: List[Subscription] = []
+        self.dropped = 0
+
+    def publish(self, kind: str, payload: Dict[str, Any], keys: Keys = None):
+        """
+        انتشار یک رویداد؛ keys=None یعنی برای همه‌ی مشترکان
+        """
+        data = dumps({"type": kind, **payload})
+        with self._lock:
+            self._seq += 1
+            frame = b"id: %s.%d\nevent: %s\ndata: %s\n\n" % (self.epoch.encode(), self._seq, kind.encode(), data)
+            self._buffer.append((self._seq, keys, frame))
+            subscribers = [subscriber for subscriber in self._subscribers if subscriber.matches(keys)]
+            # زیر قفل، تا ترتیب رسیدن به هر صف همان ترتیب seq باشد
+            for subscriber in subscribers:
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.offer, frame)
+                except RuntimeError:
+                    # حلقه‌ی رویداد مشترک بسته شده است
+                    self._subscribers.remove(subscriber)
+
+    def _replay(self, last_event_id: Optional[str], subscription: Subscription) -> List[bytes]:
+        """
+        رویدادهای بعد از last_event_id از بافر (زیر قفل صدا زده می‌شود)
+        """
+        if last_event_id is None:
+            return []
+        epoch, _, seq = last_event_id.partition(".")
+        first = self._buffer[0][0] if self._buffer else self._seq + 1
+        if epoch != self.epoch or not seq.isdigit() or not first - 1 <= int(seq) <= self._seq:
+            return [b"event: reset\ndata: {\"type\":\"reset\"}\n\n"]
+        return [frame for _, keys, frame in islice(self._buffer, int(seq) - first + 1, None) if subscription.matches(keys)]
+
+    def subscribe(self, filters: Dict[str, Any], last_event_id: Optional[str] = None) -> Tuple[Subscription, List[bytes]]:
+        """
+        ثبت مشترک در حلقه‌ی رویداد جاری؛ (مشترک، رویدادهای جاافتاده از بافر)
+        """
+        subscription = Subscription(asyncio.get_running_loop(), filters, self.client_queue)
+        with self._lock:
+            replay = self._replay(last_event_id, subscription)
+            self._subscribers.append(subscription)
+        return subscription, replay
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.remove(subscription)
+            if subscription.lagging:
+                self.dropped += 1
+
+    @property
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+
+    def accepting(self) -> bool:
+        return self.subscriber_count < self.max_clients
+
+    async def stream(self, filters: Dict[str, Any], last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        بدنه‌ی text/event-stream؛ در بیکاری هر STREAM_HEARTBEAT ثانیه یک comment می‌فرستد
+
+        ثبت مشترک با شروع پیمایش بدنه انجام می‌شود تا اتصالی که پیش از آن بسته شود
+        مشترک بی‌صاحب باقی نگذارد.
+        """
+        subscription, replay = self.subscribe(filters, last_event_id)
+        try:
+            yield b"retry: %d\n\n" % settings.STREAM_RETRY_MS
+            for frame in replay:
+                yield frame
+            while True:
+                if subscription.lagging and subscription.queue.empty():
+                    logger.info("مشترک جریان تغییرات عقب ماند و قطع شد")
+                    return
+                try:
+                    frame = await asyncio.wait_for(subscription.queue.get(), settings.STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                yield frame
+        finally:
+            self.unsubscribe(subscription)
+
+change_feed = ChangeFeed(settings.STREAM_BUFFER_SIZE, settings.STREAM_CLIENT_QUEUE, settings.STREAM_MAX_CLIENTS)
@@ -11,12 +11,48 @@ class Settings(BaseSettings):
     DATABASE_NAME: str = "IT_Asset_Management"
     DATABASE_USER: str = "sa"
     DATABASE_PASSWORD: str = "YourPassword123!"
+    # آدرس کامل اتصال (مثلاً sqlite:///./local.db برای اجرای محلی)؛ در صورت خالی بودن از MSSQL استفاده می‌شود
+    DATABASE_URL: Optional[str] = None
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # حالت دسترسی به پایگاه‌داده در مسیرهای CRUD: sync یا async
+    DB_MODE: str = "sync"
+    # لاگ همه‌ی دستورها (فقط برای اشکال‌زدایی محلی؛ در عمل از پروفایل SQL پایین استفاده کنید)
+    DB_ECHO: bool = False
+    
+    # پروفایل SQL هر درخواست (app/profiler.py): هدر Server-Timing، لاگ دستورهای کند و تشخیص N+1
+    SQL_PROFILE: bool = True
+    SQL_PROFILE_TOP: int = 3
+    SLOW_QUERY_MS: float = 200.0
+    SLOW_QUERY_SAMPLE_RATE: float = 1.0
+    N_PLUS_ONE_THRESHOLD: int = 10
+    
+    # Connection Pool
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    
+    # شروع worker: بررسی نسخه‌ی شِما (app/migrate.py) و بودجه‌ی زمان شروع (import + lifespan)
+    SCHEMA_CHECK: bool = True
+    SCHEMA_CHECK_TIMEOUT: float = 5.0
+    STARTUP_BUDGET_MS: int = 1500
     
     # Active Directory
     AD_SERVER: str = "ldap://your-ad-server. com"
     AD_USERNAME:  str = "admin@yourdomain.com"
     AD_PASSWORD: str = "YourADPassword"
     AD_BASE_DN: str = "dc=yourdomain,dc=com"
+    # بررسی رمز حساب‌های AD (کاربران دارای ad_user_id)؛ با false فقط حساب‌های محلی وارد می‌شوند
+    AD_ENABLED: bool = True
+    # فیلتر جستجوی کاربر؛ {username} با ad_user_id یا نام کاربری جایگزین می‌شود
+    AD_USER_FILTER: str = "(|(sAMAccountName={username})(userPrincipalName={username}))"
+    AD_POOL_SIZE: int = 4
+    AD_TIMEOUT: float = 5.0
+    # کش ورودهای موفق (hash نمک‌دار رمز)
+    AD_CACHE_TTL: float = 300.0
+    AD_CACHE_MAXSIZE: int = 10000
+    AD_CACHE_HASH_ITERATIONS: int = 10000
     
     # API
     API_TITLE: str = "IT Asset Management API"
@@ -24,6 +60,79 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # احراز هویت همه‌ی مسیرهای API با توکن Bearer
+    AUTH_ENABLED: bool = True
+    # کش توکن‌های تاییدشده (ثانیه)؛ هر ورودی حداکثر تا انقضای خود توکن می‌ماند
+    AUTH_CACHE_TTL: float = 60.0
+    AUTH_CACHE_MAXSIZE: int = 10000
+    # رمز عبور حساب‌های محلی: تعداد پردازه‌های hash و دورهای pbkdf2_sha256
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_ROUNDS: int = 100000
+    
+    # صفحه‌بندی فهرست‌ها
+    DEFAULT_PAGE_SIZE: int = 100
+    MAX_PAGE_SIZE: int = 1000
+    
+    # کش داده‌های مرجع (واحدها، دسته‌ها، مکان‌ها)
+    REFERENCE_CACHE_TTL: float = 300.0
+    REFERENCE_CACHE_MAXSIZE: int = 1024
+    
+    # آمار داشبورد: فاصله‌ی محاسبه‌ی کامل برای اصلاح انحراف شمارنده‌ها (ثانیه، 0 = غیرفعال)
+    STATS_RECONCILE_INTERVAL: int = 3600
+    
+    # جستجوی دارایی‌ها: فاصله‌ی خواندن تغییرات پردازه‌های دیگر در ایندکس (ثانیه)
+    SEARCH_REFRESH_INTERVAL: float = 5.0
+    # بازه‌ی پیش از watermark که در هر خواندن دوباره بررسی می‌شود (ثانیه)؛ updated_at پیش از
+    # commit در پایتون تعیین می‌شود، پس تراکنشی که دیرتر commit شود می‌تواند زمانی قبل از watermark داشته باشد
+    SEARCH_WATERMARK_OVERLAP: float = 60.0
+    SEARCH_WARMUP: bool = True
+    # حداکثر نامزدهای امتیازدهی‌شده در جستجوی چندکلمه‌ای و postingهای پیمایش‌شده در تطابق تقریبی
+    SEARCH_MAX_CANDIDATES: int = 2000
+    SEARCH_FUZZY_BUDGET: int = 20000
+    
+    # تاریخچه‌ی خودکار تغییرات دارایی: async (نوشتن دسته‌ای در پس‌زمینه) یا sync (در همان تراکنش)
+    AUDIT_MODE: str = "async"
+    AUDIT_FLUSH_INTERVAL: float = 1.0
+    AUDIT_MAX_BATCH: int = 500
+    AUDIT_MAX_QUEUE: int = 10000
+    # کاربر ثبت‌کننده‌ی تغییرات خودکار (None = سیستم)
+    AUDIT_USER_ID: Optional[int] = None
+    
+    # آرشیو ستونی تاریخچه‌ی تغییرات (python -m app.archive)
+    ARCHIVE_DIR: str = "./archive"
+    ARCHIVE_AFTER_DAYS: int = 365
+    ARCHIVE_ROW_GROUP_SIZE: int = 4096
+    ARCHIVE_COMPRESSION_LEVEL: int = 6
+    
+    # زمان‌بند پایان گارانتی: افق نگه‌داری در حافظه و بازه‌ی جبران پس از راه‌اندازی (روز)
+    WARRANTY_SCHEDULER: bool = True
+    WARRANTY_HORIZON_DAYS: int = 7
+    WARRANTY_CATCHUP_DAYS: int = 1
+    WARRANTY_RETRY_INTERVAL: float = 60.0
+    
+    # خروجی (Export)
+    EXPORT_BATCH_SIZE: int = 1000
+    
+    # فهرست‌ها بدون مدل Pydantic و با orjson سریال می‌شوند (expand همیشه از مسیر عادی)
+    FAST_JSON: bool = True
+    
+    # ورود دسته‌ای (Bulk Import)
+    BULK_CHUNK_SIZE: int = 2000
+    BULK_MAX_ROWS: int = 100000
+    
+    # جابه‌جایی دسته‌ای: تا این تعداد در همان درخواست، بیشتر در نخ پس‌زمینه با گزارش پیشرفت
+    BULK_TRANSITION_INLINE_LIMIT: int = 2000
+    BULK_TRANSITION_JOBS_KEPT: int = 100
+    
+    # جریان تغییرات دارایی‌ها (GET /api/assets/stream): بافر ادامه‌ی اتصال، صف هر مشترک
+    # (بزرگ‌تر از BULK_CHUNK_SIZE تا یک دسته‌ی جابه‌جایی مشترک را قطع نکند) و ضربان (ثانیه)
+    STREAM_BUFFER_SIZE: int = 10000
+    STREAM_CLIENT_QUEUE: int = 5000
+    STREAM_MAX_CLIENTS: int = 1000
+    STREAM_HEARTBEAT: float = 15.0
+    STREAM_RETRY_MS: int = 3000
+    # توکن کوتاه‌عمر ?token= برای EventSource مرورگر (که هدر Authorization نمی‌فرستد)
+    STREAM_TOKEN_EXPIRE_SECONDS: int = 60
     
     # CORS
     ALLOWED_ORIGINS: list = [
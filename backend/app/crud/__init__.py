@@ -0,0 +1 @@
+# CRUD Package
@@ -0,0 +1,58 @@
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from .. cache import reference_cache
+from .. models import AssetCategory
+from .. schemas import AssetCategoryCreate, AssetCategoryUpdate
+from .. versioning import versioned_update
+
+# ============ عملیات CRUD دسته‌های دارایی ============
+# این توابع بین مسیرهای sync و async (از طریق AsyncSession.run_sync) مشترک‌اند.
+
+def list_asset_categories(db: Session, skip: int, limit: int):
+    """
+    دریافت تمام دسته‌های دارایی
+    """
+    return db.query(AssetCategory).offset(skip).limit(limit).all()
+
+def get_asset_category(db: Session, category_id: int):
+    """
+    دریافت یک دسته دارایی
+    """
+    category = db.query(AssetCategory).filter(AssetCategory.id == category_id).first()
+    if not category:
+        raise HTTPException(status_code=404, detail="دسته دارایی یافت نشد")
+    return category
+
+def create_asset_category(db: Session, category: AssetCategoryCreate):
+    """
+    ایجاد دسته دارایی جدید
+    """
+    db_category = AssetCategory(**category.dict())
+    db.add(db_category)
+    db.commit()
+    reference_cache.invalidate("asset_categories")
+    db.refresh(db_category)
+    return db_category
+
+def update_asset_category(db: Session, category_id: int, category: AssetCategoryUpdate, if_match: Optional[int] = None):
+    """
+    به‌روزرسانی دسته دارایی (یک UPDATE با شرط version)
+    """
+    db_category, _ = versioned_update(
+        db, AssetCategory, category_id, category.dict(exclude_unset=True, exclude={"version"}),
+        if_match, category.version, "دسته دارایی یافت نشد",
+    )
+    db.commit()
+    reference_cache.invalidate("asset_categories")
+    return db_category
+
+def delete_asset_category(db: Session, category_id: int):
+    """
+    حذف دسته دارایی
+    """
+    db_category = get_asset_category(db, category_id)
+    db.delete(db_category)
+    db.commit()
+    reference_cache.invalidate("asset_categories")
+    return {"message": "دسته دارایی حذف شد"}
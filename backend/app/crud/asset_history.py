@@ -0,0 +1,75 @@
+from typing import Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .. changefeed import asset_keys, change_feed
+from .. models import Asset, AssetHistory
+from .. schemas import AssetHistoryCreate, AssetHistoryResponse
+from .. fastjson import RowSchema
+from .. pagination import keyset_paginate
+from .. archive import history_archive
+
+# ============ عملیات CRUD تاریخچه‌ی تغییرات ============
+# این توابع بین مسیرهای sync و async (از طریق AsyncSession.run_sync) مشترک‌اند.
+
+def list_asset_histories(db: Session, cursor: Optional[str], limit: int, sort: str, order: str):
+    """
+    دریافت تاریخچه‌های تغییر با صفحه‌بندی cursor
+    """
+    histories, next_cursor = keyset_paginate(db.query(AssetHistory), AssetHistory, sort, order, cursor, limit)
+    return {"items": histories, "next_cursor": next_cursor}
+
+HISTORY_ROWS = RowSchema(AssetHistory, AssetHistoryResponse)
+
+def list_asset_history_rows(db: Session, cursor: Optional[str], limit: int, sort: str, order: str):
+    """
+    همان list_asset_histories برای حالت FAST_JSON
+    """
+    rows, next_cursor = keyset_paginate(db.query(*HISTORY_ROWS.columns), AssetHistory, sort, order, cursor, limit)
+    return {"items": HISTORY_ROWS.dicts(rows), "next_cursor": next_cursor}
+
+def get_asset_history_rows(db: Session, asset_id: int):
+    """
+    همان get_asset_history برای حالت FAST_JSON (ردیف‌های آرشیو هم dict هستند)
+    """
+    hot = HISTORY_ROWS.dicts(db.query(*HISTORY_ROWS.columns).filter(AssetHistory.asset_id == asset_id))
+    archived = history_archive.rows_for_asset(asset_id)
+    if not archived:
+        return hot
+    hot_ids = {row["id"] for row in hot}
+    return sorted(hot + [row for row in archived if row["id"] not in hot_ids], key=_sort_key)
+
+def get_asset_history(db: Session, asset_id: int):
+    """
+    دریافت تاریخچه‌ی تغییرات یک دارایی (ردیف‌های جدول همراه با ردیف‌های آرشیوشده)
+    """
+    hot = db.query(AssetHistory).filter(AssetHistory.asset_id == asset_id).all()
+    archived = history_archive.rows_for_asset(asset_id)
+    if not archived:
+        return hot
+    # ردیفی که هم در آرشیو و هم در جدول است (آرشیو نیمه‌تمام) یک‌بار برگردانده می‌شود
+    hot_ids = {history.id for history in hot}
+    rows = hot + [row for row in archived if row["id"] not in hot_ids]
+    return sorted(rows, key=lambda row: _sort_key(row))
+
+def _sort_key(row):
+    if isinstance(row, dict):
+        return row["created_at"], row["id"]
+    return row.created_at, row.id
+
+def create_asset_history(db: Session, history: AssetHistoryCreate):
+    """
+    ثبت تغییر جدید برای دارایی
+    """
+    db_history = AssetHistory(**history.dict())
+    db.add(db_history)
+    db.commit()
+    db.refresh(db_history)
+    # کلیدهای فیلتر جریان تغییرات از خود دارایی
+    asset = db.execute(
+        select(Asset.department_id, Asset.location_id, Asset.asset_type).where(Asset.id == db_history.asset_id)
+    ).first()
+    change_feed.publish("history", {
+        "asset_id": db_history.asset_id,
+        "history": AssetHistoryResponse.model_validate(db_history).dict(),
+    }, asset_keys(asset) if asset else None)
+    return db_history
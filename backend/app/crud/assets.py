@@ -0,0 +1,188 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session, noload, selectinload
+from .. models import Asset
+from .. schemas import AssetCreate, AssetExpandedResponse, AssetResponse, AssetUpdate
+from .. fastjson import RowSchema
+from .. pagination import keyset_paginate
+from .. filters import AssetFilters
+from .. stats import record_asset_change, stat_key
+from .. search import search_index
+from .. warranty import expiring_query, warranty_scheduler
+from .. versioning import versioned_update
+from .. changefeed import asset_keys, change_feed
+from .. import audit
+
+# ============ عملیات CRUD دارایی‌ها ============
+# این توابع بین مسیرهای sync و async (از طریق AsyncSession.run_sync) مشترک‌اند.
+
+# روابطی که با expand در پاسخ جاسازی می‌شوند
+EXPANDABLE_RELATIONS = {
+    "category": Asset.category,
+    "owner": Asset.owner,
+    "department": Asset.department,
+    "location": Asset.location,
+}
+
+def parse_expand(expand: Optional[str]) -> set:
+    """
+    تبدیل پارامتر expand (مثل category,owner) به مجموعه‌ی روابط
+    """
+    if not expand:
+        return set()
+    names = {name.strip() for name in expand.split(",") if name.strip()}
+    unknown = names - EXPANDABLE_RELATIONS.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"مقدار expand نامعتبر است: {', '.join(sorted(unknown))}")
+    return names
+
+def expand_options(expand: set):
+    """
+    روابط درخواست‌شده با selectinload (یک پرس‌وجو برای هر رابطه، مستقل از اندازه‌ی صفحه)
+    و بقیه با noload بارگذاری می‌شوند تا سریال‌سازی پاسخ هیچ lazy load ای ایجاد نکند.
+    """
+    return [
+        selectinload(relation) if name in expand else noload(relation)
+        for name, relation in EXPANDABLE_RELATIONS.items()
+    ]
+
+def list_assets(db: Session, filters: AssetFilters, cursor: Optional[str], limit: int, sort: str, order: str,
+                expand: Optional[str] = None):
+    """
+    دریافت دارایی‌ها با فیلتر و صفحه‌بندی cursor
+    """
+    query = (
+        db.query(Asset)
+        .options(*expand_options(parse_expand(expand)))
+        .filter(*filters.conditions())
+    )
+    assets, next_cursor = keyset_paginate(query, Asset, sort, order, cursor, limit)
+    return {"items": assets, "next_cursor": next_cursor}
+
+# ستون‌های پاسخ فهرست‌ها در حالت FAST_JSON
+ASSET_PAGE_ROWS = RowSchema(Asset, AssetExpandedResponse)
+ASSET_ROWS = RowSchema(Asset, AssetResponse)
+
+def list_asset_rows(db: Session, filters: AssetFilters, cursor: Optional[str], limit: int, sort: str, order: str,
+                    schema: RowSchema = ASSET_PAGE_ROWS):
+    """
+    همان list_assets برای حالت FAST_JSON: ردیف‌ها مستقیماً از ستون‌ها به dict تبدیل می‌شوند
+    """
+    query = db.query(*schema.columns).filter(*filters.conditions())
+    rows, next_cursor = keyset_paginate(query, Asset, sort, order, cursor, limit)
+    return {"items": schema.dicts(rows), "next_cursor": next_cursor}
+
+def get_asset(db: Session, asset_id: int, expand: Optional[str] = None):
+    """
+    دریافت یک دارایی
+    """
+    asset = (
+        db.query(Asset)
+        .options(*expand_options(parse_expand(expand)))
+        .filter(Asset.id == asset_id)
+        .first()
+    )
+    if not asset:
+        raise HTTPException(status_code=404, detail="دارایی یافت نشد")
+    return asset
+
+def search_assets(db: Session, q: str, limit: int):
+    """
+    جستجوی تقریبی دارایی‌ها به ترتیب مرتبط بودن
+
+    دارایی‌ای که پردازه‌ی دیگری حذف کرده با watermark از ایندکس این پردازه بیرون
+    نمی‌رود؛ اگر بخشی از نتیجه در پایگاه‌داده نباشد، همان شناسه‌ها از ایندکس حذف و
+    رتبه‌بندی تکرار می‌شود تا صفحه با نتیجه‌های زنده پر شود.
+    """
+    while True:
+        ranked = search_index.search(db, q, limit)
+        if not ranked:
+            return []
+        assets = {
+            asset.id: asset
+            for asset in db.query(Asset)
+            .options(*expand_options(set()))
+            .filter(Asset.id.in_([asset_id for asset_id, _ in ranked]))
+        }
+        missing = [asset_id for asset_id, _ in ranked if asset_id not in assets]
+        if not missing:
+            break
+        for asset_id in missing:
+            search_index.remove(asset_id)
+    return [
+        {**AssetResponse.model_validate(assets[asset_id]).dict(), "score": score}
+        for asset_id, score in ranked
+    ]
+
+def list_expiring_assets(db: Session, within: timedelta, cursor: Optional[str], limit: int):
+    """
+    دارایی‌هایی که گارانتی‌شان تا within آینده تمام می‌شود، به ترتیب تاریخ پایان
+    """
+    now = datetime.utcnow()
+    query = expiring_query(db, now, now + within).options(*expand_options(set()))
+    assets, next_cursor = keyset_paginate(query, Asset, "warranty_expiry", "asc", cursor, limit)
+    return {"items": assets, "next_cursor": next_cursor}
+
+def create_asset(db: Session, asset: AssetCreate):
+    """
+    ایجاد دارایی جدید
+    """
+    db_asset = Asset(**asset.dict())
+    db.add(db_asset)
+    db.flush()
+    record_asset_change(db, None, stat_key(db_asset))
+    audit.record(db, audit.creation_entries(db_asset))
+    db.commit()
+    db.refresh(db_asset)
+    search_index.add(db_asset)
+    warranty_scheduler.track(db_asset.id, db_asset.warranty_expiry)
+    change_feed.publish("create", {
+        "asset_id": db_asset.id,
+        "version": db_asset.version,
+        "asset": AssetResponse.model_validate(db_asset).dict(),
+    }, asset_keys(db_asset))
+    return db_asset
+
+# ستون‌هایی که مقدار قبلی‌شان برای کلید آماری لازم است
+STAT_FIELDS = ("department_id", "status", "purchase_price")
+
+def update_asset(db: Session, asset_id: int, asset: AssetUpdate, if_match: Optional[int] = None):
+    """
+    به‌روزرسانی دارایی (یک UPDATE با شرط version)
+
+    مقادیر قبلی ستون‌های تغییرکرده و ستون‌های کلید آماری همراه با همان UPDATE
+    برمی‌گردند و تاریخچه و شمارنده‌ها از روی آن‌ها ثبت می‌شوند.
+    """
+    update_data = asset.dict(exclude_unset=True, exclude={"version"})
+    db_asset, old_values = versioned_update(
+        db, Asset, asset_id, update_data, if_match, asset.version, "دارایی یافت نشد",
+        previous=sorted(set(update_data) | set(STAT_FIELDS)),
+    )
+
+    record_asset_change(db, stat_key(SimpleNamespace(**old_values)), stat_key(db_asset))
+    audit.record(db, audit.diff_entries(asset_id, old_values, update_data))
+    db.commit()
+    search_index.add(db_asset)
+    warranty_scheduler.track(db_asset.id, db_asset.warranty_expiry)
+    change_feed.publish("update", {
+        "asset_id": asset_id,
+        "version": db_asset.version,
+        "changes": {field: value for field, value in update_data.items() if old_values[field] != value},
+    }, asset_keys(db_asset, SimpleNamespace(**old_values)))
+    return db_asset
+
+def delete_asset(db: Session, asset_id: int):
+    """
+    حذف دارایی
+    """
+    db_asset = get_asset(db, asset_id)
+    record_asset_change(db, stat_key(db_asset), None)
+    keys = asset_keys(db_asset)
+    db.delete(db_asset)
+    db.commit()
+    search_index.remove(asset_id)
+    warranty_scheduler.untrack(asset_id)
+    change_feed.publish("delete", {"asset_id": asset_id}, keys)
+    return {"message": "دارایی حذف شد"}
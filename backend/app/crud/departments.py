@@ -0,0 +1,87 @@
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from .. cache import reference_cache
+from .. hierarchy import attach_department, detach_department, move_department
+from .. config import settings
+from .. models import Asset, Department
+from .. schemas import DepartmentCreate, DepartmentUpdate
+from .. stats import forget_department
+from .. transitions import publish_transition, transition_rows
+from .. versioning import versioned_update
+
+# ============ عملیات CRUD واحدهای سازمانی ============
+# این توابع بین مسیرهای sync و async (از طریق AsyncSession.run_sync) مشترک‌اند.
+
+def list_departments(db: Session, skip: int, limit: int):
+    """
+    دریافت تمام واحدهای سازمانی
+    """
+    return db.query(Department).offset(skip).limit(limit).all()
+
+def get_department(db: Session, department_id: int):
+    """
+    دریافت یک واحد سازمانی
+    """
+    department = db.query(Department).filter(Department.id == department_id).first()
+    if not department:
+        raise HTTPException(status_code=404, detail="واحد سازمانی یافت نشد")
+    return department
+
+def create_department(db: Session, department: DepartmentCreate):
+    """
+    ایجاد واحد سازمانی جدید
+    """
+    db_department = Department(**department.dict())
+    db.add(db_department)
+    db.flush()
+    attach_department(db, db_department)
+    db.commit()
+    reference_cache.invalidate("departments")
+    db.refresh(db_department)
+    return db_department
+
+def update_department(db: Session, department_id: int, department: DepartmentUpdate, if_match: Optional[int] = None):
+    """
+    به‌روزرسانی واحد سازمانی (یک UPDATE با شرط version)
+
+    جدول بستار فقط وقتی به‌روز می‌شود که والد واقعاً عوض شده باشد؛ با خطای دور در
+    درخت تراکنش commit نمی‌شود و UPDATE هم برگردانده می‌شود.
+    """
+    update_data = department.dict(exclude_unset=True, exclude={"version"})
+    moved = "parent_id" in update_data
+    db_department, old = versioned_update(
+        db, Department, department_id, update_data,
+        if_match, department.version, "واحد سازمانی یافت نشد",
+        previous=("parent_id",) if moved else (),
+    )
+    if moved and old["parent_id"] != db_department.parent_id:
+        move_department(db, department_id, db_department.parent_id)
+
+    db.commit()
+    reference_cache.invalidate("departments")
+    return db_department
+
+def delete_department(db: Session, department_id: int):
+    """
+    حذف واحد سازمانی
+
+    دارایی‌های واحد در همان تراکنش بدون واحد می‌شوند، مثل یک bulk-transition با
+    department_id=null: UPDATE دسته‌ای با version، تاریخچه، آمار و پس از commit
+    رویداد update برای هر دارایی (بدون بارگذاری دارایی‌ها در حافظه).
+    """
+    db_department = get_department(db, department_id)
+    detach_department(db, department_id)
+    changes = {"department_id": None}
+    ids = db.execute(select(Asset.id).where(Asset.department_id == department_id).order_by(Asset.id)).scalars().all()
+    released = []
+    for start in range(0, len(ids), settings.BULK_CHUNK_SIZE):
+        rows, _ = transition_rows(db, ids[start:start + settings.BULK_CHUNK_SIZE], changes, "حذف واحد سازمانی")
+        released.extend(rows)
+    forget_department(db, department_id)
+    db.delete(db_department)
+    db.commit()
+    reference_cache.invalidate("departments")
+    publish_transition(released, changes)
+    return {"message": "واحد سازمانی حذف شد"}
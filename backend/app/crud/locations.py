@@ -0,0 +1,58 @@
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from .. cache import reference_cache
+from .. models import Location
+from .. schemas import LocationCreate, LocationUpdate
+from .. versioning import versioned_update
+
+# ============ عملیات CRUD مکان‌های دارایی ============
+# این توابع بین مسیرهای sync و async (از طریق AsyncSession.run_sync) مشترک‌اند.
+
+def list_locations(db: Session, skip: int, limit: int):
+    """
+    دریافت تمام مکان‌های دارایی
+    """
+    return db.query(Location).offset(skip).limit(limit).all()
+
+def get_location(db: Session, location_id: int):
+    """
+    دریافت یک مکان دارایی
+    """
+    location = db.query(Location).filter(Location.id == location_id).first()
+    if not location:
+        raise HTTPException(status_code=404, detail="مکان دارایی یافت نشد")
+    return location
+
+def create_location(db: Session, location: LocationCreate):
+    """
+    ایجاد مکان دارایی جدید
+    """
+    db_location = Location(**location.dict())
+    db.add(db_location)
+    db.commit()
+    reference_cache.invalidate("locations")
+    db.refresh(db_location)
+    return db_location
+
+def update_location(db: Session, location_id: int, location: LocationUpdate, if_match: Optional[int] = None):
+    """
+    به‌روزرسانی مکان دارایی (یک UPDATE با شرط version)
+    """
+    db_location, _ = versioned_update(
+        db, Location, location_id, location.dict(exclude_unset=True, exclude={"version"}),
+        if_match, location.version, "مکان دارایی یافت نشد",
+    )
+    db.commit()
+    reference_cache.invalidate("locations")
+    return db_location
+
+def delete_location(db: Session, location_id: int):
+    """
+    حذف مکان دارایی
+    """
+    db_location = get_location(db, location_id)
+    db.delete(db_location)
+    db.commit()
+    reference_cache.invalidate("locations")
+    return {"message": "مکان دارایی حذف شد"}
@@ -0,0 +1,105 @@
+from typing import Optional
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+from .. auth import invalidate_user
+from .. fastjson import RowSchema
+from .. models import User
+from .. schemas import UserCreate, UserResponse, UserUpdate
+from .. versioning import versioned_update
+
+# ============ عملیات CRUD کاربران ============
+# این توابع بین مسیرهای sync و async (از طریق AsyncSession.run_sync) مشترک‌اند.
+
+def list_users(db: Session, skip: int, limit: int):
+    """
+    دریافت تمام کاربران
+    """
+    return db.query(User).offset(skip).limit(limit).all()
+
+USER_ROWS = RowSchema(User, UserResponse)
+
+def list_user_rows(db: Session, skip: int, limit: int):
+    """
+    همان list_users برای حالت FAST_JSON (بدون ساخت اشیای ORM)
+    """
+    return USER_ROWS.dicts(db.query(*USER_ROWS.columns).offset(skip).limit(limit).all())
+
+def get_user(db: Session, user_id: int):
+    """
+    دریافت یک کاربر
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="کاربر یافت نشد")
+    return user
+
+def get_user_by_username(db: Session, username: str):
+    """
+    دریافت کاربر با نام کاربری
+    """
+    return db.query(User).filter(User.username == username).first()
+
+def _ad_password_rejected():
+    return HTTPException(status_code=400, detail="حساب‌های Active Directory رمز محلی ندارند")
+
+def check_new_user_password(user: UserCreate):
+    """
+    رمز فقط برای حساب‌های محلی و برای آن‌ها الزامی (پیش از hash در مسیر هم صدا زده می‌شود)
+    """
+    if user.ad_user_id and user.password:
+        raise _ad_password_rejected()
+    if not user.ad_user_id and not user.password:
+        raise HTTPException(status_code=400, detail="رمز عبور برای حساب‌های محلی لازم است")
+
+def check_local_account(db: Session, user_id: int):
+    """
+    رد تغییر رمز حساب AD (پیش از hash در مسیر)
+    """
+    if get_user(db, user_id).ad_user_id:
+        raise _ad_password_rejected()
+
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    """
+    ایجاد کاربر جدید (hashed_password از passwords.password_hasher)
+    """
+    if get_user_by_username(db, user.username):
+        raise HTTPException(status_code=400, detail="نام کاربری قبلاً استفاده شده است")
+    check_new_user_password(user)
+
+    db_user = User(**user.dict(exclude={"password"}), hashed_password=hashed_password)
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+    return db_user
+
+def update_user(db: Session, user_id: int, user: UserUpdate, hashed_password: Optional[str] = None,
+                if_match: Optional[int] = None):
+    """
+    به‌روزرسانی کاربر (یک UPDATE با شرط version)
+    """
+    update_data = user.dict(exclude_unset=True, exclude={"password", "version"})
+    if hashed_password:
+        check_local_account(db, user_id)
+        update_data["hashed_password"] = hashed_password
+
+    db_user, _ = versioned_update(db, User, user_id, update_data, if_match, user.version, "کاربر یافت نشد")
+    db.commit()
+    invalidate_user(user_id)
+    return db_user
+
+def set_password_hash(db: Session, user_id: int, hashed_password: str):
+    """
+    جایگزینی hash رمز (مثلاً پس از تغییر PASSWORD_HASH_ROUNDS)
+    """
+    db.query(User).filter(User.id == user_id).update({User.hashed_password: hashed_password}, synchronize_session=False)
+    db.commit()
+
+def delete_user(db: Session, user_id: int):
+    """
+    حذف کاربر
+    """
+    db_user = get_user(db, user_id)
+    db.delete(db_user)
+    db.commit()
+    invalidate_user(user_id)
+    return {"message": "کاربر حذف شد"}
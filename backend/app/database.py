@@ -1,13 +1,40 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from . config import settings
+from . metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, async_pool_metrics, sync_pool_metrics
+from . import profiler
 
 # اتصال به Microsoft SQL Server
-DATABASE_URL = f"mssql+pyodbc://{settings.DATABASE_USER}:{settings.DATABASE_PASSWORD}@{settings.DATABASE_SERVER}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}?driver=ODBC+Driver+17+for+SQL+Server"
+DATABASE_URL = settings.DATABASE_URL or f"mssql+pyodbc://{settings.DATABASE_USER}:{settings.DATABASE_PASSWORD}@{settings.DATABASE_SERVER}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}?driver=ODBC+Driver+17+for+SQL+Server"
+ASYNC_DATABASE_URL = settings.ASYNC_DATABASE_URL or f"mssql+aioodbc://{settings.DATABASE_USER}:{settings.DATABASE_PASSWORD}@{settings.DATABASE_SERVER}:{settings.DATABASE_PORT}/{settings.DATABASE_NAME}?driver=ODBC+Driver+17+for+SQL+Server"
 
-engine = create_engine(DATABASE_URL, echo=True)
+# pre_ping اتصال‌های مرده پس از failover را پیش از استفاده کنار می‌گذارد و
+# recycle از نگه‌داشتن اتصال‌های ODBC قدیمی جلوگیری می‌کند.
+pool_options = {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "pool_timeout": settings.DB_POOL_TIMEOUT,
+    "pool_recycle": settings.DB_POOL_RECYCLE,
+    "pool_pre_ping": settings.DB_POOL_PRE_PING,
+}
+
+# fast_executemany: ارسال یکجای پارامترهای executemany در pyodbc (ورود دسته‌ای)
+engine_options = {"fast_executemany": True} if DATABASE_URL.startswith("mssql+pyodbc") else {}
+engine = create_engine(DATABASE_URL, echo=settings.DB_ECHO, poolclass=TimedQueuePool, **pool_options, **engine_options)
+sync_pool_metrics.attach(engine)
+profiler.attach(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# موتور async فقط در حالت DB_MODE=async ساخته می‌شود (aioodbc برای MSSQL، aiosqlite برای اجرای محلی)
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_MODE == "async":
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=settings.DB_ECHO, poolclass=TimedAsyncAdaptedQueuePool, **pool_options)
+    async_pool_metrics.attach(async_engine.sync_engine)
+    profiler.attach(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -19,3 +46,24 @@ def get_db():
         yield db
     finally:
         db.close()
+
+def check_database_ready():
+    """
+    بررسی آمادگی: pool خالی نشده باشد و یک اتصال pool شده به SELECT 1 پاسخ دهد
+    """
+    for metrics in (sync_pool_metrics, async_pool_metrics):
+        if metrics.pool is not None and metrics.is_starved():
+            return False, f"همه‌ی اتصال‌های pool ({metrics.name}) در حال استفاده‌اند"
+    try:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    except Exception as e:
+        return False, str(e)
+    return True, None
+
+async def get_async_db():
+    """
+    وابستگی برای دریافت جلسه‌ی async پایگاه‌داده
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,79 @@
+import csv
+import io
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from fastapi.responses import StreamingResponse
+
+from .config import settings
+from .database import SessionLocal
+from .fastjson import dumps
+
+# ============ خروجی جریانی (CSV / NDJSON) ============
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+def _stream_rows(statement) -> Iterator[tuple]:
+    """
+    خواندن ردیف‌ها از cursor سمت سرور به‌صورت دسته‌ای
+
+    جلسه‌ی پایگاه‌داده در خود generator باز و بسته می‌شود، چون وابستگی get_db
+    پیش از ارسال بدنه‌ی پاسخ بسته می‌شود.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        db.close()
+
+def _csv_chunks(columns, rows: Iterable[tuple]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # BOM برای نمایش درست متن فارسی در Excel
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    pending = 0
+    for row in rows:
+        writer.writerow(["" if value is None else value.isoformat() if isinstance(value, datetime) else value for value in row])
+        pending += 1
+        if pending >= settings.EXPORT_BATCH_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+def _ndjson_chunks(columns, rows: Iterable[tuple]) -> Iterator[bytes]:
+    lines = []
+    for row in rows:
+        lines.append(dumps(dict(zip(columns, row))))
+        if len(lines) >= settings.EXPORT_BATCH_SIZE:
+            yield b"\n".join(lines) + b"\n"
+            lines = []
+    if lines:
+        yield b"\n".join(lines) + b"\n"
+
+def export_response(statement, format: str, filename: str) -> StreamingResponse:
+    """
+    ساخت StreamingResponse برای یک select ستونی
+
+    حافظه‌ی worker مستقل از اندازه‌ی جدول ثابت می‌ماند.
+    """
+    columns = [column.name for column in statement.selected_columns]
+    return rows_response(columns, _stream_rows(statement), format, filename)
+
+def rows_response(columns, rows: Iterable[tuple], format: str, filename: str) -> StreamingResponse:
+    """
+    StreamingResponse برای ردیف‌های از پیش آماده (مثلاً نتیجه‌ی یک محاسبه)
+    """
+    chunks = _csv_chunks(columns, rows) if format == "csv" else _ndjson_chunks(columns, rows)
+    return StreamingResponse(
+        chunks,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{format}"'},
+    )
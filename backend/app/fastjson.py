@@ -0,0 +1,55 @@
+import json
+from datetime import datetime
+from typing import Any, Iterable, List
+
+from fastapi import Response
+
+# ============ سریال‌سازی سریع JSON برای فهرست‌های بزرگ ============
+#
+# مسیر عادی FastAPI هر ردیف ORM را به مدل Pydantic تبدیل و اعتبارسنجی می‌کند و
+# سپس دوباره سریال می‌کند. در حالت FAST_JSON مسیرهای فهرست فقط ستون‌های لازم را
+# به‌صورت tuple می‌خوانند، مستقیماً dict می‌سازند و با orjson کدگذاری می‌کنند.
+# response_model مسیرها تغییر نمی‌کند، پس شِمای OpenAPI همان schemas.py است.
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+try:
+    import orjson
+except ImportError:  # بدون orjson همان خروجی با json استاندارد ساخته می‌شود
+    orjson = None
+
+def dumps(value: Any) -> bytes:
+    """
+    کدگذاری UTF-8 (datetime بدون منطقه‌ی زمانی به قالب ISO، مثل Pydantic)
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+class RowSchema:
+    """
+    ستون‌های جدول model به ترتیب فیلدهای schema پاسخ
+
+    فیلدهایی از schema که ستون ندارند (مثل روابط جاسازی‌شده‌ی expand) مانند مسیر
+    عادی بدون بارگذاری رابطه، null برمی‌گردند.
+    """
+
+    def __init__(self, model, schema):
+        table = model.__table__
+        fields = list(schema.model_fields)
+        names = [name for name in fields if name in table.c]
+        self.columns = [table.c[name] for name in names]
+        self.keys = names + [name for name in fields if name not in table.c]
+        self.padding = (None,) * (len(self.keys) - len(names))
+
+    def dicts(self, rows: Iterable[tuple]) -> List[dict]:
+        keys, padding = self.keys, self.padding
+        if padding:
+            return [dict(zip(keys, (*row, *padding))) for row in rows]
+        return [dict(zip(keys, row)) for row in rows]
+
+def json_response(content: Any) -> Response:
+    return Response(content=dumps(content), media_type="application/json")
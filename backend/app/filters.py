@@ -0,0 +1,78 @@
+from datetime import datetime
+from typing import Annotated, Optional
+
+from fastapi import HTTPException, Query
+
+from .hierarchy import descendant_ids
+from .models import Asset
+
+# ============ فیلترهای فهرست دارایی‌ها ============
+
+# ستون‌های قابل مرتب‌سازی (هر کدام با ایندکس (ستون، id) برای صفحه‌بندی cursor)
+ASSET_SORT_FIELDS = ("id", "updated_at", "created_at", "purchase_date", "purchase_price", "name", "asset_number")
+ASSET_SORT_PATTERN = f"^({'|'.join(ASSET_SORT_FIELDS)})$"
+
+class AssetFilters:
+    """
+    فیلترهای مشترک فهرست، خروجی و مسیرهای قدیمی دارایی‌ها (به‌صورت Depends)
+
+    فیلترهای برابری با ایندکس‌های ترکیبی (ستون، status، id) هم‌خوان‌اند تا
+    پایگاه‌داده روی ایندکس seek کند و ترتیب id را از همان ایندکس بگیرد.
+    """
+
+    def __init__(
+        self,
+        status: Optional[str] = None,
+        asset_type: Optional[str] = None,
+        category_id: Optional[int] = None,
+        department_id: Optional[int] = None,
+        include_descendants: Annotated[bool, Query(description="شامل دارایی‌های زیرواحدهای department_id")] = False,
+        location_id: Optional[int] = None,
+        owner_id: Optional[int] = None,
+        manufacturer: Optional[str] = None,
+        purchased_from: Annotated[Optional[datetime], Query(description="تاریخ خرید از (شامل)")] = None,
+        purchased_to: Annotated[Optional[datetime], Query(description="تاریخ خرید تا (شامل)")] = None,
+        min_price: Annotated[Optional[float], Query(ge=0)] = None,
+        max_price: Annotated[Optional[float], Query(ge=0)] = None,
+    ):
+        if purchased_from and purchased_to and purchased_from > purchased_to:
+            raise HTTPException(status_code=400, detail="purchased_from نباید بعد از purchased_to باشد")
+        if min_price is not None and max_price is not None and min_price > max_price:
+            raise HTTPException(status_code=400, detail="min_price نباید بیشتر از max_price باشد")
+        self.status = status
+        self.asset_type = asset_type
+        self.category_id = category_id
+        self.department_id = department_id
+        self.include_descendants = include_descendants
+        self.location_id = location_id
+        self.owner_id = owner_id
+        self.manufacturer = manufacturer
+        self.purchased_from = purchased_from
+        self.purchased_to = purchased_to
+        self.min_price = min_price
+        self.max_price = max_price
+
+    def conditions(self):
+        """
+        شرط‌های SQL فیلترهای تعیین‌شده
+        """
+        conditions = []
+        for field in ("status", "asset_type", "category_id", "location_id", "owner_id", "manufacturer"):
+            value = getattr(self, field)
+            if value is not None:
+                conditions.append(getattr(Asset, field) == value)
+        if self.department_id is not None:
+            if self.include_descendants:
+                # کل زیردرخت در همان پرس‌وجو از جدول بستار خوانده می‌شود
+                conditions.append(Asset.department_id.in_(descendant_ids(self.department_id)))
+            else:
+                conditions.append(Asset.department_id == self.department_id)
+        if self.purchased_from is not None:
+            conditions.append(Asset.purchase_date >= self.purchased_from)
+        if self.purchased_to is not None:
+            conditions.append(Asset.purchase_date <= self.purchased_to)
+        if self.min_price is not None:
+            conditions.append(Asset.purchase_price >= self.min_price)
+        if self.max_price is not None:
+            conditions.append(Asset.purchase_price <= self.max_price)
+        return conditions
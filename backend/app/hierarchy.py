@@ -0,0 +1,125 @@
+import logging
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from .database import SessionLocal
+from .models import Department, DepartmentClosure
+
+logger = logging.getLogger(__name__)
+
+# ============ درخت واحدهای سازمانی (جدول بستار) ============
+#
+# department_closure برای هر جفت (جد، نواده) یک ردیف دارد؛ هر واحد با عمق 0
+# نواده‌ی خودش است. زیردرخت یک واحد با یک seek روی کلید اصلی (ancestor_id, ...)
+# و اجداد آن با ایندکس (descendant_id, ancestor_id) خوانده می‌شود.
+# جدول همراه با ایجاد، جابه‌جایی و حذف واحدها در همان تراکنش نگه‌داری می‌شود.
+
+def descendant_ids(department_id: int):
+    """
+    زیرپرس‌وجوی شناسه‌ی خود واحد و همه‌ی زیرواحدهای آن (برای IN)
+    """
+    return select(DepartmentClosure.descendant_id).where(DepartmentClosure.ancestor_id == department_id)
+
+def _check_parent(db: Session, parent_id: Optional[int]):
+    if parent_id is not None and db.get(Department, parent_id) is None:
+        raise HTTPException(status_code=400, detail="واحد والد یافت نشد")
+
+def _link(db: Session, department_id: int, parent_id: Optional[int], subtree: List[tuple]):
+    """
+    اتصال زیردرخت (descendant_id، عمق از department_id) به اجداد parent_id
+    """
+    if parent_id is None:
+        return
+    ancestors = db.execute(
+        select(DepartmentClosure.ancestor_id, DepartmentClosure.depth)
+        .where(DepartmentClosure.descendant_id == parent_id)
+    ).all()
+    db.execute(insert(DepartmentClosure), [
+        {"ancestor_id": ancestor_id, "descendant_id": descendant_id, "depth": ancestor_depth + depth + 1}
+        for ancestor_id, ancestor_depth in ancestors
+        for descendant_id, depth in subtree
+    ])
+
+def attach_department(db: Session, department: Department):
+    """
+    ثبت واحد تازه‌ایجادشده (پس از flush) در درخت
+    """
+    _check_parent(db, department.parent_id)
+    db.execute(insert(DepartmentClosure), [{"ancestor_id": department.id, "descendant_id": department.id, "depth": 0}])
+    _link(db, department.id, department.parent_id, [(department.id, 0)])
+
+def move_department(db: Session, department_id: int, parent_id: Optional[int]):
+    """
+    جابه‌جایی یک واحد (همراه با زیردرختش) زیر والد جدید
+
+    اگر والد جدید خود واحد یا یکی از زیرواحدهای آن باشد، درخت دور پیدا می‌کند
+    و درخواست با خطای 400 رد می‌شود.
+    """
+    _check_parent(db, parent_id)
+    subtree = db.execute(
+        select(DepartmentClosure.descendant_id, DepartmentClosure.depth)
+        .where(DepartmentClosure.ancestor_id == department_id)
+    ).all()
+    subtree_ids = [descendant_id for descendant_id, _ in subtree]
+    if parent_id in subtree_ids:
+        raise HTTPException(status_code=400, detail="والد انتخاب‌شده زیرمجموعه‌ی همین واحد است (ایجاد دور در درخت)")
+
+    # پیوند زیردرخت با اجداد قبلی حذف و با اجداد والد جدید ساخته می‌شود
+    db.execute(
+        delete(DepartmentClosure)
+        .where(DepartmentClosure.descendant_id.in_(subtree_ids), DepartmentClosure.ancestor_id.not_in(subtree_ids))
+        .execution_options(synchronize_session=False)
+    )
+    _link(db, department_id, parent_id, subtree)
+
+def detach_department(db: Session, department_id: int):
+    """
+    حذف واحد از درخت؛ واحدی که زیرواحد دارد حذف نمی‌شود
+    """
+    if db.execute(select(Department.id).where(Department.parent_id == department_id).limit(1)).first():
+        raise HTTPException(status_code=400, detail="ابتدا زیرواحدهای این واحد را جابه‌جا یا حذف کنید")
+    db.execute(
+        delete(DepartmentClosure)
+        .where(DepartmentClosure.descendant_id == department_id)
+        .execution_options(synchronize_session=False)
+    )
+
+# ============ ساخت دوباره ============
+
+def rebuild_department_closure(db: Session) -> int:
+    """
+    ساخت کامل جدول بستار از روی parent_id (مقداردهی اولیه یا اصلاح)
+
+    دورهای احتمالی داده‌های قدیمی با توقف در اولین گره تکراری قطع می‌شوند.
+    """
+    parents: Dict[int, Optional[int]] = dict(db.execute(select(Department.id, Department.parent_id)).all())
+    rows = []
+    for department_id in parents:
+        node, depth, seen = department_id, 0, set()
+        while node is not None and node in parents and node not in seen:
+            seen.add(node)
+            rows.append({"ancestor_id": node, "descendant_id": department_id, "depth": depth})
+            node, depth = parents[node], depth + 1
+        if node in seen:
+            logger.warning("دور در درخت واحدها در واحد %s", department_id)
+    db.execute(delete(DepartmentClosure))
+    if rows:
+        db.execute(insert(DepartmentClosure), rows)
+    db.commit()
+    return len(rows)
+
+def ensure_department_closure():
+    """
+    ساخت جدول بستار در شروع سرور اگر هنوز برای همه‌ی واحدها پر نشده باشد
+    """
+    db = SessionLocal()
+    try:
+        departments = db.execute(select(func.count(Department.id))).scalar_one()
+        roots = db.execute(select(func.count()).where(DepartmentClosure.depth == 0)).scalar_one()
+        if departments != roots:
+            rebuild_department_closure(db)
+    finally:
+        db.close()
@@ -1,17 +1,60 @@
-from fastapi import FastAPI
+import time
+
+# شروع زمان‌سنجی پیش از همه‌ی importها (app_startup_seconds{phase="import"})
+_import_started = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from . config import settings
-from .database import Base, engine
-from .routes import departments, users, asset_categories, locations, assets, asset_history
+from .database import check_database_ready
+from .metrics import async_pool_metrics, render_prometheus, startup_metrics, sync_pool_metrics
+from .migrate import schema_status, verify_schema_on_startup
+from .profiler import SQLProfilerMiddleware
+from .routes import departments, users, asset_categories, locations, assets, asset_history, stats
+from .ad import ad_authenticator
+from .audit import audit_writer
+from .auth import get_current_user, get_stream_user
+from .changefeed import change_feed
+from .passwords import password_hasher
+from .search import warm_up_search_index
+from .stats import stats_reconciler
+from .transitions import transition_jobs
+from .warranty import warranty_scheduler
 
-# ایجاد تمام جداول در پایگاه‌داده
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    شروع و توقف کارهای پس‌زمینه
+
+    ساخت و به‌روزرسانی جدول‌ها با python -m app.migrate جداگانه انجام می‌شود؛
+    اینجا فقط نسخه‌ی شِما بررسی می‌شود.
+    """
+    started = time.perf_counter()
+    await verify_schema_on_startup()
+    stats_reconciler.start()
+    audit_writer.start()
+    if settings.WARRANTY_SCHEDULER:
+        warranty_scheduler.start()
+    if settings.SEARCH_WARMUP:
+        warm_up_search_index()
+    startup_metrics.record("lifespan", time.perf_counter() - started)
+    startup_metrics.check_budget(settings.STARTUP_BUDGET_MS)
+    yield
+    transition_jobs.stop()
+    warranty_scheduler.stop()
+    audit_writer.stop()
+    stats_reconciler.stop()
+    ad_authenticator.close()
+    password_hasher.close()
 
 # ایجاد اپلیکیشن FastAPI
 app = FastAPI(
     title=settings.API_TITLE,
     version=settings.API_VERSION,
-    description="سامانه مدیریت دارایی فناوری اطلاعات"
+    description="سامانه مدیریت دارایی فناوری اطلاعات",
+    lifespan=lifespan,
 )
 
 # ============ CORS Middleware ============
@@ -23,16 +66,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # تا Frontend بتواند هدر Server-Timing (app/profiler.py) را بخواند
+    expose_headers=["Server-Timing"],
 )
 
+# ============ پروفایل SQL ============
+# تعداد و زمان دستورهای هر درخواست در هدر Server-Timing؛ دستورهای کند و N+1 در لاگ
+
+app.add_middleware(SQLProfilerMiddleware)
+
 # ============ Routers (مسیرها) ============
 
-app.include_router(departments.router)
-app.include_router(users.router)
-app.include_router(asset_categories.router)
-app.include_router(locations.router)
-app.include_router(assets.router)
-app.include_router(asset_history.router)
+ROUTER_MODULES = (departments, users, asset_categories, locations, assets, asset_history)
+
+# همه‌ی مسیرهای API به جز ورود کاربر، health و metrics توکن Bearer لازم دارند؛
+# جریان تغییرات توکن کوتاه‌عمر ?token= را هم می‌پذیرد (پیش از /api/assets/{asset_id} ثبت می‌شود)
+AUTHENTICATED = [Depends(get_current_user)]
+
+app.include_router(users.login_router)
+app.include_router(assets.stream_router, dependencies=[Depends(get_stream_user)])
+
+# در حالت async مسیرهای CRUD نسخه‌ی async زودتر ثبت می‌شوند و درخواست‌ها را پاسخ می‌دهند؛
+# مسیرهای دیگر (خروجی، ورود دسته‌ای و ...) همچنان از router اصلی سرویس می‌گیرند.
+if settings.DB_MODE == "async":
+    for module in ROUTER_MODULES:
+        app.include_router(module.async_router, dependencies=AUTHENTICATED)
+
+for module in ROUTER_MODULES:
+    app.include_router(module.router, dependencies=AUTHENTICATED)
+
+app.include_router(stats.router, dependencies=AUTHENTICATED)
 
 # ============ صفحه اصلی ============
 
@@ -54,8 +117,31 @@ def health_check():
     """
     return {"status": "healthy"}
 
+@app.get("/health/ready")
+def readiness_check():
+    """
+    بررسی آمادگی برای دریافت ترافیک (اتصال واقعی از pool)
+    """
+    ready, reason = check_database_ready()
+    if ready:
+        reason = schema_status()
+        ready = reason is None
+    if not ready:
+        return JSONResponse(status_code=503, content={"status": "not ready", "reason": reason, "pool": sync_pool_metrics.snapshot()})
+    return {"status": "ready", "pool": sync_pool_metrics.snapshot()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """
+    آمار connection pool و زمان شروع worker در قالب Prometheus
+    """
+    return render_prometheus([sync_pool_metrics, async_pool_metrics], startup_metrics, change_feed)
+
+startup_metrics.record("import", time.perf_counter() - _import_started)
+
 # ============ شروع سرور ============
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # جریان‌های باز تغییرات (/api/assets/stream) خودشان تمام نمی‌شوند
+    uvicorn.run(app, host="0.0.0.0", port=8000, timeout_graceful_shutdown=5)
@@ -0,0 +1,192 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+logger = logging.getLogger(__name__)
+
+# ============ آمار Connection Pool ============
+
+# مرزهای هیستوگرام زمان انتظار برای گرفتن اتصال (ثانیه)
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class PoolMetrics:
+    """
+    شمارنده‌های یک connection pool
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.checkout_timeouts = 0
+        self.wait_bucket_counts = [0] * len(WAIT_BUCKETS)
+        self.wait_count = 0
+        self.wait_sum = 0.0
+
+    def observe_wait(self, seconds: float):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_sum += seconds
+            for index, bound in enumerate(WAIT_BUCKETS):
+                if seconds <= bound:
+                    self.wait_bucket_counts[index] += 1
+                    break
+
+    def _increment(self, name: str):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def attach(self, engine):
+        """
+        ثبت listenerهای رویداد pool روی engine
+        """
+        self.pool = engine.pool
+        event.listen(engine, "connect", lambda *args: self._increment("connects"))
+        event.listen(engine, "checkout", lambda *args: self._increment("checkouts"))
+        event.listen(engine, "checkin", lambda *args: self._increment("checkins"))
+        event.listen(engine, "invalidate", lambda *args: self._increment("invalidations"))
+        event.listen(engine, "soft_invalidate", lambda *args: self._increment("soft_invalidations"))
+
+    def snapshot(self) -> Dict:
+        """
+        وضعیت لحظه‌ای pool و شمارنده‌ها
+        """
+        pool = self.pool
+        with self._lock:
+            data = {
+                "size": pool.size() if pool is not None else 0,
+                "checked_out": pool.checkedout() if pool is not None else 0,
+                "checked_in": pool.checkedin() if pool is not None else 0,
+                "overflow": max(pool.overflow(), 0) if pool is not None else 0,
+                "max_overflow": getattr(pool, "_max_overflow", 0),
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "invalidations": self.invalidations,
+                "soft_invalidations": self.soft_invalidations,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_count": self.wait_count,
+                "checkout_wait_sum": self.wait_sum,
+                "checkout_wait_buckets": list(self.wait_bucket_counts),
+            }
+        return data
+
+    def is_starved(self) -> bool:
+        """
+        آیا همه‌ی اتصال‌های ممکن (size + max_overflow) در حال استفاده‌اند؟
+        """
+        snapshot = self.snapshot()
+        return snapshot["checked_out"] >= snapshot["size"] + max(snapshot["max_overflow"], 0)
+
+def timed_pool_class(base, metrics: PoolMetrics):
+    """
+    ساخت زیرکلاس pool که زمان انتظار checkout را اندازه می‌گیرد
+
+    metrics در خود کلاس نگه داشته می‌شود تا بعد از pool.recreate() (مثلاً dispose) از بین نرود.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return base._do_get(self)
+        except exc.TimeoutError:
+            metrics._increment("checkout_timeouts")
+            raise
+        finally:
+            metrics.observe_wait(time.perf_counter() - start)
+
+    return type(f"Timed{base.__name__}", (base,), {"_do_get": _do_get})
+
+sync_pool_metrics = PoolMetrics("sync")
+async_pool_metrics = PoolMetrics("async")
+
+TimedQueuePool = timed_pool_class(QueuePool, sync_pool_metrics)
+TimedAsyncAdaptedQueuePool = timed_pool_class(AsyncAdaptedQueuePool, async_pool_metrics)
+
+# ============ خروجی Prometheus ============
+
+def render_prometheus(pools: List[PoolMetrics], startup: Optional["StartupMetrics"] = None, feed=None) -> str:
+    """
+    نمایش آمار poolها در قالب متنی Prometheus
+    """
+    gauges = {
+        "size": "db_pool_size",
+        "checked_out": "db_pool_checked_out",
+        "checked_in": "db_pool_checked_in",
+        "overflow": "db_pool_overflow",
+    }
+    counters = {
+        "connects": "db_pool_connects_total",
+        "checkouts": "db_pool_checkouts_total",
+        "checkins": "db_pool_checkins_total",
+        "invalidations": "db_pool_invalidations_total",
+        "soft_invalidations": "db_pool_soft_invalidations_total",
+        "checkout_timeouts": "db_pool_checkout_timeouts_total",
+    }
+    snapshots = [(metrics.name, metrics.snapshot()) for metrics in pools if metrics.pool is not None]
+    lines = []
+    for key, name in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f'{name}{{pool="{pool}"}} {data[key]}' for pool, data in snapshots)
+    for key, name in counters.items():
+        lines.append(f"# TYPE {name} counter")
+        lines.extend(f'{name}{{pool="{pool}"}} {data[key]}' for pool, data in snapshots)
+
+    name = "db_pool_checkout_wait_seconds"
+    lines.append(f"# TYPE {name} histogram")
+    for pool, data in snapshots:
+        cumulative = 0
+        for bound, count in zip(WAIT_BUCKETS, data["checkout_wait_buckets"]):
+            cumulative += count
+            lines.append(f'{name}_bucket{{pool="{pool}",le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{pool="{pool}",le="+Inf"}} {data["checkout_wait_count"]}')
+        lines.append(f'{name}_sum{{pool="{pool}"}} {data["checkout_wait_sum"]:.6f}')
+        lines.append(f'{name}_count{{pool="{pool}"}} {data["checkout_wait_count"]}')
+
+    if startup is not None:
+        name = "app_startup_seconds"
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(f'{name}{{phase="{phase}"}} {seconds:.6f}' for phase, seconds in startup.phases.items())
+    if feed is not None:
+        # جریان تغییرات (app/changefeed.py): مشترکان فعلی و مشترکان قطع‌شده به‌خاطر عقب ماندن
+        lines.append("# TYPE app_stream_clients gauge")
+        lines.append(f"app_stream_clients {feed.subscriber_count}")
+        lines.append("# TYPE app_stream_dropped_total counter")
+        lines.append(f"app_stream_dropped_total {feed.dropped}")
+    return "\n".join(lines) + "\n"
+
+# ============ زمان شروع worker ============
+
+class StartupMetrics:
+    """
+    مدت هر مرحله‌ی شروع (import و ثبت routerها، lifespan) در مقایسه با بودجه‌ی STARTUP_BUDGET_MS
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+
+    @property
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+    def check_budget(self, budget_ms: float) -> bool:
+        summary = ", ".join(f"{phase} {seconds * 1000:.0f} ms" for phase, seconds in self.phases.items())
+        if budget_ms and self.total * 1000 > budget_ms:
+            logger.warning("شروع worker %.0f ms طول کشید (بودجه %d ms): %s", self.total * 1000, budget_ms, summary)
+            return False
+        logger.info("شروع worker در %.0f ms: %s", self.total * 1000, summary)
+        return True
+
+startup_metrics = StartupMetrics()
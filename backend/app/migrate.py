@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import Base, engine as default_engine
+from .models import Asset, AssetHistory, AssetStatistic, DepartmentClosure, SchemaVersion
+from .warranty import CHANGE_TYPE_WARRANTY_EXPIRED
+
+logger = logging.getLogger(__name__)
+
+# ============ نسخه‌ی شِمای پایگاه‌داده ============
+#
+# جدول‌ها دیگر هنگام import ساخته نمی‌شوند؛ شِما یک‌بار پیش از استقرار با
+#     python -m app.migrate
+# به نسخه‌ی SCHEMA_VERSION می‌رسد و هر worker در شروع فقط بزرگ‌ترین version جدول
+# schema_version را با آن مقایسه می‌کند (یک پرس‌وجو).
+#
+# برای تغییر شِما: تابع migration جدید در MIGRATIONS با شماره‌ی بعدی و افزایش SCHEMA_VERSION.
+#
+# پایگاه خالی مستقیم با create_all به شِمای نهایی می‌رسد. پایگاه‌های قبلی (ساخته‌شده با
+# create_all نسخه‌ی اولیه یا schema.sql) migrationها را به ترتیب می‌گذرانند؛ create_all
+# جدول‌های موجود را تغییر نمی‌دهد، پس هر تغییر جدول موجود یک ALTER صریح است. migrationهای
+# 2 به بعد پیش از تغییر وضعیت فعلی را بررسی می‌کنند، چون پایگاه‌هایی که با نسخه‌ی قبلی
+# این ماژول به نسخه‌ی 2 رسیده‌اند بخشی از این تغییرات را دارند.
+
+SCHEMA_VERSION = 6
+
+def _drop_index(connection: Connection, table: str, name: str):
+    if connection.dialect.name == "mssql":
+        connection.execute(text(f"DROP INDEX {name} ON {table}"))
+    else:
+        connection.execute(text(f"DROP INDEX {name}"))
+
+def _baseline(connection: Connection):
+    # جدول‌هایی که بعد از نسخه‌ی اولیه اضافه شده‌اند
+    Base.metadata.create_all(bind=connection, tables=[
+        AssetStatistic.__table__, DepartmentClosure.__table__, SchemaVersion.__table__,
+    ])
+    # مقداردهی شمارنده‌های آمار؛ جدول بستار واحدها را main پس از upgrade پر می‌کند
+    from .stats import recompute_asset_statistics
+    with Session(bind=connection) as db:
+        recompute_asset_statistics(db)
+
+# جدول‌هایی که با versioning.versioned_update ویرایش می‌شوند
+VERSIONED_TABLES = ("departments", "users", "asset_categories", "locations", "assets")
+
+def _add_version_columns(connection: Connection):
+    inspector = inspect(connection)
+    for table in VERSIONED_TABLES:
+        if any(column["name"] == "version" for column in inspector.get_columns(table)):
+            continue
+        if connection.dialect.name == "mssql":
+            ddl = f"ALTER TABLE {table} ADD version INT NOT NULL CONSTRAINT df_{table}_version DEFAULT 1"
+        else:
+            ddl = f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1"
+        connection.execute(text(ddl))
+
+def _add_password_column(connection: Connection):
+    # رمز حساب‌های محلی (app/passwords.py)
+    if any(column["name"] == "hashed_password" for column in inspect(connection).get_columns("users")):
+        return
+    if connection.dialect.name == "mssql":
+        connection.execute(text("ALTER TABLE users ADD hashed_password NVARCHAR(255)"))
+    else:
+        connection.execute(text("ALTER TABLE users ADD COLUMN hashed_password VARCHAR(255)"))
+
+def _rebuild_sqlite_table(connection: Connection, table):
+    # SQLite قید یا nullable ستون موجود را تغییر نمی‌دهد؛ جدول با تعریف فعلی دوباره ساخته می‌شود
+    for index in inspect(connection).get_indexes(table.name):
+        _drop_index(connection, table.name, index["name"])
+    connection.execute(text(f"ALTER TABLE {table.name} RENAME TO {table.name}_old"))
+    table.create(bind=connection)
+    columns = ", ".join(column.name for column in table.columns)
+    connection.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {table.name}_old"))
+    connection.execute(text(f"DROP TABLE {table.name}_old"))
+
+def _relax_history_user(connection: Connection):
+    # ردیف‌های خودکار تاریخچه (app/audit.py) کاربر ندارند و حذف دارایی تاریخچه‌اش را هم حذف می‌کند
+    inspector = inspect(connection)
+    user_nullable = next(column["nullable"] for column in inspector.get_columns("asset_histories") if column["name"] == "user_id")
+    asset_fks = [
+        fk for fk in inspector.get_foreign_keys("asset_histories")
+        if fk["referred_table"] == "assets" and fk["constrained_columns"] == ["asset_id"]
+    ]
+    cascades = all((fk.get("options") or {}).get("ondelete", "").upper() == "CASCADE" for fk in asset_fks)
+    if user_nullable and asset_fks and cascades:
+        return
+
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        _rebuild_sqlite_table(connection, AssetHistory.__table__)
+        return
+    if not user_nullable:
+        if dialect == "mssql":
+            # SQL Server ستونی را که در ایندکس است تغییر نمی‌دهد
+            dependent = [index for index in inspector.get_indexes("asset_histories") if "user_id" in index["column_names"]]
+            for index in dependent:
+                _drop_index(connection, "asset_histories", index["name"])
+            connection.execute(text("ALTER TABLE asset_histories ALTER COLUMN user_id INT NULL"))
+            for index in dependent:
+                columns = ", ".join(index["column_names"])
+                connection.execute(text(f"CREATE INDEX {index['name']} ON asset_histories ({columns})"))
+        else:
+            connection.execute(text("ALTER TABLE asset_histories ALTER COLUMN user_id DROP NOT NULL"))
+    if not (asset_fks and cascades):
+        for fk in asset_fks:
+            connection.execute(text(f"ALTER TABLE asset_histories DROP CONSTRAINT {fk['name']}"))
+        connection.execute(text(
+            "ALTER TABLE asset_histories ADD CONSTRAINT fk_asset_histories_asset_id "
+            "FOREIGN KEY (asset_id) REFERENCES assets(id) ON DELETE CASCADE"
+        ))
+
+# ایندکس‌های تک‌ستونی schema.sql که ایندکس‌های ترکیبی (ستون، status، id) جایگزین‌شان شده‌اند
+OBSOLETE_INDEXES = {
+    "assets": (
+        "idx_assets_category_id", "idx_assets_owner_id", "idx_assets_department_id",
+        "idx_assets_location_id", "idx_assets_asset_type",
+    ),
+}
+
+def _composite_indexes(connection: Connection):
+    # ایندکس‌های صفحه‌بندی cursor، فیلترهای ترکیبی و گارانتی در models
+    inspector = inspect(connection)
+    for table in (Asset.__table__, AssetHistory.__table__):
+        existing = {index["name"]: index["column_names"] for index in inspector.get_indexes(table.name)}
+        for name in OBSOLETE_INDEXES.get(table.name, ()):
+            if name in existing:
+                _drop_index(connection, table.name, name)
+        for index in table.indexes:
+            columns = [column.name for column in index.columns]
+            if existing.get(index.name) == columns:
+                continue
+            # مثلاً idx_asset_histories_created_at تک‌ستونی schema.sql
+            if index.name in existing:
+                _drop_index(connection, table.name, index.name)
+            index.create(bind=connection)
+
+def _add_warranty_notified(connection: Connection):
+    # نشانه‌ی ثبت رویداد پایان گارانتی (app/warranty.py)
+    if any(column["name"] == "warranty_notified" for column in inspect(connection).get_columns("assets")):
+        return
+    if connection.dialect.name == "mssql":
+        connection.execute(text("ALTER TABLE assets ADD warranty_notified DATETIME"))
+    else:
+        connection.execute(text("ALTER TABLE assets ADD COLUMN warranty_notified TIMESTAMP"))
+    # گارانتی‌های گذشته‌ای که رویدادشان پیش‌تر در تاریخچه ثبت شده دوباره اعلام نمی‌شوند
+    connection.execute(
+        text(
+            "UPDATE assets SET warranty_notified = warranty_expiry "
+            "WHERE warranty_expiry <= :now AND EXISTS (SELECT 1 FROM asset_histories h "
+            "WHERE h.asset_id = assets.id AND h.change_type = :change_type)"
+        ),
+        {"now": datetime.utcnow(), "change_type": CHANGE_TYPE_WARRANTY_EXPIRED},
+    )
+
+MIGRATIONS: Dict[int, Callable[[Connection], None]] = {
+    1: _baseline,
+    2: _add_version_columns,
+    3: _add_password_column,
+    4: _relax_history_user,
+    5: _composite_indexes,
+    6: _add_warranty_notified,
+}
+
+class SchemaMismatch(Exception):
+    """
+    نسخه‌ی شِمای پایگاه‌داده با نسخه‌ی مورد انتظار این کد یکی نیست
+    """
+
+def current_version(connection: Connection) -> Optional[int]:
+    """
+    نسخه‌ی فعلی شِما (None اگر هنوز migration اجرا نشده باشد)
+    """
+    if not inspect(connection).has_table(SchemaVersion.__tablename__):
+        return None
+    return connection.execute(select(func.max(SchemaVersion.version))).scalar()
+
+def upgrade(engine: Optional[Engine] = None) -> tuple:
+    """
+    اعمال migrationهای مانده در یک تراکنش؛ (نسخه‌ی قبلی، نسخه‌ی جدید) برمی‌گردد
+    """
+    engine = engine or default_engine
+    with engine.begin() as connection:
+        current = current_version(connection) or 0
+        if current > SCHEMA_VERSION:
+            raise SchemaMismatch(f"نسخه‌ی شِمای پایگاه‌داده ({current}) از این کد ({SCHEMA_VERSION}) جدیدتر است")
+        empty = current == 0 and not inspect(connection).get_table_names()
+        if empty:
+            logger.info("پایگاه خالی: ساخت شِمای نسخه‌ی %d", SCHEMA_VERSION)
+            Base.metadata.create_all(bind=connection)
+        for version in range(current + 1, SCHEMA_VERSION + 1):
+            if not empty:
+                logger.info("اعمال migration %d", version)
+                MIGRATIONS[version](connection)
+            connection.execute(insert(SchemaVersion).values(version=version, applied_at=datetime.utcnow()))
+    return current, SCHEMA_VERSION
+
+# ============ بررسی در شروع سرور ============
+
+_verified = False
+
+def check_schema_version():
+    """
+    خطای SchemaMismatch اگر پایگاه‌داده به نسخه‌ی SCHEMA_VERSION نرسیده باشد
+    """
+    global _verified
+    with default_engine.connect() as connection:
+        current = current_version(connection)
+    if current != SCHEMA_VERSION:
+        raise SchemaMismatch(
+            f"نسخه‌ی شِمای پایگاه‌داده {current} است ولی {SCHEMA_VERSION} لازم است؛ python -m app.migrate را اجرا کنید"
+        )
+    _verified = True
+
+async def verify_schema_on_startup():
+    """
+    بررسی نسخه‌ی شِما در lifespan
+
+    ناهمخوانی شروع worker را متوقف می‌کند، ولی در دسترس نبودن پایگاه‌داده (یا کندی
+    بیش از SCHEMA_CHECK_TIMEOUT) فقط هشدار می‌دهد: worker بالا می‌آید و
+    /health/ready تا موفقیت بررسی 503 برمی‌گرداند.
+    """
+    if not settings.SCHEMA_CHECK:
+        return
+    try:
+        await asyncio.wait_for(run_in_threadpool(check_schema_version), settings.SCHEMA_CHECK_TIMEOUT)
+    except (asyncio.TimeoutError, SQLAlchemyError) as e:
+        logger.warning("نسخه‌ی شِما در شروع بررسی نشد (%s)؛ در /health/ready دوباره بررسی می‌شود", type(e).__name__)
+
+def schema_status() -> Optional[str]:
+    """
+    None اگر نسخه‌ی شِما تأیید شده باشد، وگرنه دلیل (برای /health/ready)
+    """
+    if _verified or not settings.SCHEMA_CHECK:
+        return None
+    try:
+        check_schema_version()
+    except (SchemaMismatch, SQLAlchemyError) as e:
+        return str(e)
+    return None
+
+def main():
+    """
+    اجرا از خط فرمان، یک‌بار پیش از شروع workerها:
+
+        python -m app.migrate
+        python -m app.migrate --check
+    """
+    from .hierarchy import ensure_department_closure
+
+    parser = argparse.ArgumentParser(description="به‌روزرسانی شِمای پایگاه‌داده")
+    parser.add_argument("--check", action="store_true", help="فقط نمایش نسخه‌ی فعلی و مورد انتظار")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.check:
+        with default_engine.connect() as connection:
+            current = current_version(connection)
+        print(f"schema version: {current} (expected {SCHEMA_VERSION})")
+        raise SystemExit(0 if current == SCHEMA_VERSION else 1)
+    before, after = upgrade()
+    # مقداردهی جدول بستار واحدها (قبلاً در هر شروع سرور بررسی می‌شد)
+    ensure_department_closure()
+    print(f"schema version: {before or 'none'} -> {after}")
+
+if __name__ == "__main__":
+    main()
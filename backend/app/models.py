@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, Float, Enum, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -48,6 +48,8 @@ class Department(Base):
     parent_id = Column(Integer, ForeignKey("departments.id"))
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # کنترل هم‌زمانی خوش‌بینانه: هر UPDATE یکی اضافه می‌کند (versioning.versioned_update)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # روابط
     parent = relationship("Department", remote_side=[id])
@@ -68,8 +70,11 @@ class User(Base):
     is_admin = Column(Boolean, default=False)
     is_active = Column(Boolean, default=True)
     ad_user_id = Column(String(100))  # Active Directory User ID
+    hashed_password = Column(String(255))  # فقط حساب‌های محلی (بدون ad_user_id)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # کنترل هم‌زمانی خوش‌بینانه: هر UPDATE یکی اضافه می‌کند (versioning.versioned_update)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # روابط
     department = relationship("Department", back_populates="users")
@@ -88,6 +93,8 @@ class AssetCategory(Base):
     asset_type = Column(String(50), nullable=False)  # نوع دارایی
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # کنترل هم‌زمانی خوش‌بینانه: هر UPDATE یکی اضافه می‌کند (versioning.versioned_update)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # روابط
     assets = relationship("Asset", back_populates="category")
@@ -106,6 +113,8 @@ class Location(Base):
     description = Column(Text)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # کنترل هم‌زمانی خوش‌بینانه: هر UPDATE یکی اضافه می‌کند (versioning.versioned_update)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # روابط
     assets = relationship("Asset", back_populates="location")
@@ -129,6 +138,8 @@ class Asset(Base):
     purchase_price = Column(Float)
     depreciation_rate = Column(Float, default=0.0)
     warranty_expiry = Column(DateTime)
+    # پایان گارانتی‌ای که رویدادش ثبت شده (app/warranty.py؛ یک بار در بین همه‌ی workerها)
+    warranty_notified = Column(DateTime)
     
     # مالک و مکان
     owner_id = Column(Integer, ForeignKey("users.id"))
@@ -143,13 +154,34 @@ class Asset(Base):
     # تاریخچه
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # کنترل هم‌زمانی خوش‌بینانه: هر UPDATE یکی اضافه می‌کند (versioning.versioned_update)
+    version = Column(Integer, nullable=False, default=1, server_default="1")
     
     # روابط
     category = relationship("AssetCategory", back_populates="assets")
     owner = relationship("User", back_populates="assets")
     department = relationship("Department", back_populates="assets")
     location = relationship("Location", back_populates="assets")
-    histories = relationship("AssetHistory", back_populates="asset")
+    # حذف تاریخچه با ON DELETE CASCADE پایگاه‌داده انجام می‌شود، نه با بارگذاری ردیف‌ها
+    histories = relationship("AssetHistory", back_populates="asset", passive_deletes=True)
+
+    __table_args__ = (
+        # ایندکس‌های صفحه‌بندی cursor روی (sort_key, id)
+        Index("idx_assets_updated_at", "updated_at", "id"),
+        Index("idx_assets_created_at", "created_at", "id"),
+        Index("idx_assets_purchase_date", "purchase_date", "id"),
+        Index("idx_assets_purchase_price", "purchase_price", "id"),
+        Index("idx_assets_name", "name", "id"),
+        # ایندکس‌های ترکیبی فیلترهای رایج: (ستون برابری، status، id)
+        Index("idx_assets_category_status", "category_id", "status", "id"),
+        Index("idx_assets_department_status", "department_id", "status", "id"),
+        Index("idx_assets_location_status", "location_id", "status", "id"),
+        Index("idx_assets_type_status", "asset_type", "status", "id"),
+        Index("idx_assets_owner_status", "owner_id", "status", "id"),
+        Index("idx_assets_manufacturer", "manufacturer", "id"),
+        # گارانتی‌های رو به پایان (GET /api/assets/warranty-expiring و زمان‌بند)
+        Index("idx_assets_warranty_expiry", "warranty_expiry", "id"),
+    )
 
 class AssetHistory(Base):
     """
@@ -158,8 +190,8 @@ class AssetHistory(Base):
     __tablename__ = "asset_histories"
     
     id = Column(Integer, primary_key=True, index=True)
-    asset_id = Column(Integer, ForeignKey("assets.id"), nullable=False)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    asset_id = Column(Integer, ForeignKey("assets.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"))  # NULL = تغییر خودکار سیستم
     
     change_type = Column(String(50))  # مثل:  نقل مکان، تعویض مالک، تعمیر
     old_value = Column(Text)  # مقدار قبلی
@@ -172,6 +204,56 @@ class AssetHistory(Base):
     asset = relationship("Asset", back_populates="histories")
     user = relationship("User", back_populates="histories")
 
+    __table_args__ = (
+        Index("idx_asset_histories_created_at", "created_at", "id"),
+    )
+
+class AssetStatistic(Base):
+    """
+    شمارنده‌های تجمیعی دارایی به تفکیک واحد و وضعیت
+
+    این جدول همراه با ایجاد/ویرایش/حذف دارایی به‌صورت افزایشی به‌روز می‌شود
+    تا آمار داشبورد بدون پیمایش جدول assets محاسبه شود.
+    """
+    __tablename__ = "asset_statistics"
+
+    id = Column(Integer, primary_key=True, index=True)
+    department_id = Column(Integer, ForeignKey("departments.id"))
+    status = Column(String(20), nullable=False)
+    asset_count = Column(Integer, nullable=False, default=0)
+    total_value = Column(Float, nullable=False, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("department_id", "status", name="uq_asset_statistics_department_status"),
+    )
+
+class SchemaVersion(Base):
+    """
+    نسخه‌های شِمای اعمال‌شده با python -m app.migrate (بزرگ‌ترین version همان نسخه‌ی فعلی است)
+    """
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True, autoincrement=False)
+    applied_at = Column(DateTime, default=datetime.utcnow)
+
+class DepartmentClosure(Base):
+    """
+    جدول بستار (closure) درخت واحدها: یک ردیف برای هر جفت (جد، نواده) با عمق فاصله
+
+    هر واحد با عمق 0 نواده‌ی خودش است، پس زیردرخت یک واحد با یک پرس‌وجوی
+    ایندکس‌دار روی ancestor_id به دست می‌آید (app/hierarchy.py).
+    """
+    __tablename__ = "department_closure"
+
+    ancestor_id = Column(Integer, ForeignKey("departments.id"), primary_key=True)
+    descendant_id = Column(Integer, ForeignKey("departments.id"), primary_key=True)
+    depth = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("idx_department_closure_descendant", "descendant_id", "ancestor_id"),
+    )
+
 class Report(Base):
     """
     گزارش‌های سامانه
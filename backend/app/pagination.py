@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+# ============ Cursor (صفحه‌بندی Keyset) ============
+
+def encode_cursor(sort: str, order: str, sort_value: Any, last_id: int) -> str:
+    """
+    ساخت cursor مات از آخرین (sort_key, id) دیده‌شده
+    """
+    if isinstance(sort_value, datetime):
+        sort_value = sort_value.isoformat()
+    raw = json.dumps([sort, order, sort_value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, sort: str, order: str, sort_column) -> Tuple[Any, int]:
+    """
+    بازکردن cursor و بررسی سازگاری آن با ترتیب درخواست‌شده
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_order, sort_value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+        if (cursor_sort, cursor_order) != (sort, order):
+            raise ValueError("cursor با ترتیب درخواست‌شده سازگار نیست")
+        if sort_value is not None and sort_column.type.python_type is datetime:
+            sort_value = datetime.fromisoformat(sort_value)
+        return sort_value, int(last_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="cursor نامعتبر است")
+
+def _after(sort_column, id_column, sort_value: Any, last_id: int, descending: bool):
+    """
+    شرط «بعد از (sort_value, last_id)»
+
+    در MSSQL و SQLite مقدار NULL در ترتیب صعودی اول و در ترتیب نزولی آخر می‌آید.
+    """
+    if descending:
+        if sort_value is None:
+            return and_(sort_column.is_(None), id_column < last_id)
+        return or_(
+            sort_column < sort_value,
+            and_(sort_column == sort_value, id_column < last_id),
+            sort_column.is_(None),
+        )
+    if sort_value is None:
+        return or_(
+            and_(sort_column.is_(None), id_column > last_id),
+            sort_column.isnot(None),
+        )
+    return or_(
+        sort_column > sort_value,
+        and_(sort_column == sort_value, id_column > last_id),
+    )
+
+def keyset_paginate(query, model, sort: str, order: str, cursor: Optional[str], limit: int) -> Tuple[List[Any], Optional[str]]:
+    """
+    صفحه‌بندی بر اساس (sort_key, id) به‌جای OFFSET
+
+    هزینه‌ی هر صفحه مستقل از عمق آن است، چون پایگاه‌داده مستقیماً روی ایندکس
+    به آخرین کلید دیده‌شده seek می‌کند.
+    """
+    sort_column = getattr(model, sort)
+    id_column = model.id
+    descending = order == "desc"
+
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor, sort, order, sort_column)
+        if sort == "id":
+            query = query.filter(id_column < last_id if descending else id_column > last_id)
+        else:
+            query = query.filter(_after(sort_column, id_column, sort_value, last_id, descending))
+
+    if sort == "id":
+        ordering = [id_column.desc() if descending else id_column.asc()]
+    elif descending:
+        ordering = [sort_column.desc(), id_column.desc()]
+    else:
+        ordering = [sort_column.asc(), id_column.asc()]
+
+    rows = query.order_by(*ordering).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, order, getattr(last, sort), last.id)
+    return rows, next_cursor
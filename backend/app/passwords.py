@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import getpass
+import multiprocessing
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from .config import settings
+
+# ============ رمز عبور حساب‌های محلی (غیر AD) ============
+#
+# hash با pbkdf2_sha256 از passlib (نمک تصادفی برای هر رمز) و تعداد دور
+# PASSWORD_HASH_ROUNDS. محاسبه‌ی عمداً کند در یک process pool جداگانه انجام
+# می‌شود؛ نه در event loop و نه در threadpool مشترک درخواست‌ها، پس موجی از
+# ورودها بقیه‌ی درخواست‌ها را معطل نمی‌کند و محدود به GIL هم نیست.
+
+@lru_cache(maxsize=None)
+def _context(rounds: int):
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["pbkdf2_sha256"], pbkdf2_sha256__rounds=rounds)
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+def _verify(password: str, hashed: Optional[str], rounds: int) -> Tuple[bool, Optional[str]]:
+    context = _context(rounds)
+    if not hashed:
+        # هزینه‌ی برابر با بررسی واقعی تا نبودن کاربر از زمان پاسخ معلوم نشود
+        context.dummy_verify()
+        return False, None
+    # اگر PASSWORD_HASH_ROUNDS تغییر کرده باشد، hash تازه هم برگردانده می‌شود
+    return context.verify_and_update(password, hashed)
+
+class PasswordHasher:
+    """
+    hash و بررسی رمز در process pool با PASSWORD_HASH_WORKERS پردازه
+    """
+
+    def __init__(self, workers: int, rounds: int):
+        self.workers = workers
+        self.rounds = rounds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn به‌جای fork: پردازه‌ی سرور نخ‌های پس‌زمینه و اتصال‌های باز دارد
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+        """
+        (درست بودن رمز، hash جدید در صورت نیاز به به‌روزرسانی)
+        """
+        return await self._run(_verify, password, hashed, self.rounds)
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS, settings.PASSWORD_HASH_ROUNDS)
+
+# ============ تعیین رمز از خط فرمان ============
+
+def set_password(username: str, password: str, local: bool = False) -> int:
+    """
+    تعیین رمز یک کاربر موجود؛ شناسه‌ی کاربر را برمی‌گرداند
+
+    رمز حساب‌های AD (دارای ad_user_id) هرگز بررسی نمی‌شود؛ با local=True
+    ad_user_id پاک و حساب محلی می‌شود (مثلاً admin اولیه وقتی AD_ENABLED خاموش است).
+    """
+    from .auth import invalidate_user
+    from .database import SessionLocal
+    from .models import User
+
+    db = SessionLocal()
+    try:
+        user = db.query(User).filter(User.username == username).first()
+        if user is None:
+            raise LookupError(f"کاربر {username} یافت نشد")
+        if user.ad_user_id and not local:
+            raise ValueError(f"کاربر {username} با Active Directory وارد می‌شود؛ برای حساب محلی --local بدهید")
+        user.hashed_password = _hash(password, settings.PASSWORD_HASH_ROUNDS)
+        user.ad_user_id = None
+        user.version = User.version + 1
+        db.commit()
+        invalidate_user(user.id)
+        return user.id
+    finally:
+        db.close()
+
+def main():
+    """
+    تعیین رمز حساب‌های محلی (کاربران اولیه‌ی schema.sql رمز ندارند):
+
+        python -m app.passwords set admin --local
+        echo "$ADMIN_PASSWORD" | python -m app.passwords set admin --password-stdin
+    """
+    parser = argparse.ArgumentParser(description="مدیریت رمز حساب‌های محلی")
+    commands = parser.add_subparsers(dest="command", required=True)
+    set_parser = commands.add_parser("set", help="تعیین رمز یک کاربر موجود")
+    set_parser.add_argument("username")
+    set_parser.add_argument("--password-stdin", action="store_true", help="خواندن رمز از ورودی استاندارد")
+    set_parser.add_argument("--local", action="store_true", help="تبدیل حساب AD به حساب محلی")
+    args = parser.parse_args()
+
+    if args.password_stdin:
+        password = sys.stdin.readline().rstrip("\r\n")
+    else:
+        password = getpass.getpass("رمز جدید: ")
+        if password != getpass.getpass("تکرار رمز: "):
+            parser.exit(1, "رمزها یکسان نیستند\n")
+    if not password:
+        parser.exit(1, "رمز خالی مجاز نیست\n")
+    try:
+        user_id = set_password(args.username, password, args.local)
+    except (LookupError, ValueError) as error:
+        parser.exit(1, f"{error}\n")
+    print(f"password set for user {args.username} (id {user_id})")
+
+if __name__ == "__main__":
+    main()
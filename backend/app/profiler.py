@@ -0,0 +1,144 @@
+import logging
+import random
+import re
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.sql.slow")
+
+# ============ پروفایل SQL هر درخواست ============
+#
+# رویدادهای cursor موتورها (before/after_cursor_execute) زمان هر دستور را در
+# پروفایل درخواست جاری (ContextVar) جمع می‌کنند. threadpool مسیرهای sync و
+# run_sync مسیرهای async هر دو context درخواست را به ارث می‌برند؛ دستورهای
+# نخ‌های پس‌زمینه (audit، آمار، گارانتی) پروفایلی ندارند و شمرده نمی‌شوند.
+#
+# در پایان هر درخواست:
+#   - هدر Server-Timing با تعداد دستورها و زمان کل پایگاه‌داده
+#   - دستورهای کندتر از SLOW_QUERY_MS (با نرخ SLOW_QUERY_SAMPLE_RATE) در لاگ app.sql.slow
+#   - تکرار یک «شکل» دستور بیش از N_PLUS_ONE_THRESHOLD بار به‌عنوان N+1 در لاگ
+
+# فهرست پارامترهای IN با طول‌های مختلف یک شکل حساب می‌شوند
+_IN_LIST = re.compile(r"\((?:\s*\?\s*,)+\s*\?\s*\)")
+_SPACES = re.compile(r"\s+")
+
+def statement_shape(statement: str) -> str:
+    return _SPACES.sub(" ", _IN_LIST.sub("(?)", statement)).strip()
+
+class RequestProfile:
+    """
+    آمار دستورهای SQL یک درخواست
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.db_time = 0.0
+        # شکل دستور -> (تعداد، زمان کل)
+        self.shapes: Dict[str, List] = {}
+        # کندترین دستورها به ترتیب نزولی: (زمان، متن)
+        self.slowest: List[Tuple[float, str]] = []
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.db_time += seconds
+        shape = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        shape[0] += 1
+        shape[1] += seconds
+        if len(self.slowest) < settings.SQL_PROFILE_TOP or seconds > self.slowest[-1][0]:
+            self.slowest.append((seconds, statement))
+            self.slowest.sort(key=lambda item: item[0], reverse=True)
+            del self.slowest[settings.SQL_PROFILE_TOP:]
+
+    def repeated(self) -> List[Tuple[str, int, float]]:
+        """
+        شکل‌هایی که بیش از N_PLUS_ONE_THRESHOLD بار اجرا شده‌اند
+        """
+        return sorted(
+            ((shape, count, seconds) for shape, (count, seconds) in self.shapes.items() if count > settings.N_PLUS_ONE_THRESHOLD),
+            key=lambda item: item[1], reverse=True,
+        )
+
+_current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("sql_profile", default=None)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile.get() is not None:
+        context._profile_started = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.record(statement, time.perf_counter() - started)
+
+def attach(engine):
+    """
+    ثبت رویدادهای cursor روی یک موتور sync (برای async، engine.sync_engine)
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+# ============ Middleware ============
+
+def _route_name(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or scope.get("path", "")
+
+def _server_timing(profile: RequestProfile, total: float) -> bytes:
+    parts = [
+        f'db;dur={profile.db_time * 1000:.1f};desc="{profile.count} queries"',
+        f"app;dur={max(total - profile.db_time, 0.0) * 1000:.1f}",
+    ]
+    repeated = profile.repeated()
+    if repeated:
+        parts.append(f'n1;desc="{repeated[0][1]}x same statement"')
+    return ", ".join(parts).encode("latin-1")
+
+def _report(scope, profile: RequestProfile, total: float):
+    route = _route_name(scope)
+    method = scope.get("method", "")
+    for seconds, statement in profile.slowest:
+        if seconds * 1000 < settings.SLOW_QUERY_MS:
+            break
+        if random.random() < settings.SLOW_QUERY_SAMPLE_RATE:
+            slow_query_logger.warning("%s %s: %.1f ms: %s", method, route, seconds * 1000, statement_shape(statement)[:1000])
+    for shape, count, seconds in profile.repeated():
+        logger.warning("N+1 در %s %s: %d بار (%.1f ms): %s", method, route, count, seconds * 1000, shape[:300])
+    logger.debug("%s %s: %d دستور SQL در %.1f ms از %.1f ms", method, route, profile.count, profile.db_time * 1000, total * 1000)
+
+class SQLProfilerMiddleware:
+    """
+    middleware خالص ASGI (بدون بافر کردن بدنه، پس خروجی‌های جریانی هم سالم می‌مانند)
+
+    Server-Timing همراه با سرآیندها فرستاده می‌شود؛ دستورهایی که هنگام ارسال بدنه‌ی
+    پاسخ‌های جریانی اجرا می‌شوند فقط در لاگ پایان درخواست حساب می‌شوند.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_PROFILE:
+            await self.app(scope, receive, send)
+            return
+        profile = RequestProfile()
+        token = _current_profile.set(profile)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", _server_timing(profile, time.perf_counter() - started)))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_profile.reset(token)
+            _report(scope, profile, time.perf_counter() - started)
@@ -1,31 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. database import get_db
-from .. models import AssetCategory
+from typing import List, Optional
+from .. database import get_db, get_async_db
+from .. crud import asset_categories as crud
+from .. cache import cached_response, cached_response_async
 from .. schemas import AssetCategoryCreate, AssetCategoryUpdate, AssetCategoryResponse
+from .. versioning import if_match_version
 
 router = APIRouter(prefix="/api/asset-categories", tags=["Asset Categories"])
+# نسخه‌ی async همان مسیرهای CRUD (در حالت DB_MODE=async پیش از router ثبت می‌شود)
+async_router = APIRouter(prefix="/api/asset-categories", tags=["Asset Categories"], include_in_schema=False)
 
 # ============ GET (خواندن) ============
 
 @router.get("/", response_model=List[AssetCategoryResponse])
-def get_asset_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_asset_categories(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """
     دریافت تمام دسته‌های دارایی
     """
-    categories = db.query(AssetCategory).offset(skip).limit(limit).all()
-    return categories
+    return cached_response(request, ("asset_categories", "list", skip, limit), lambda: crud.list_asset_categories(db, skip, limit), List[AssetCategoryResponse])
 
 @router.get("/{category_id}", response_model=AssetCategoryResponse)
-def get_asset_category(category_id:  int, db: Session = Depends(get_db)):
+def get_asset_category(request: Request, category_id: int, db: Session = Depends(get_db)):
     """
     دریافت یک دسته دارایی
     """
-    category = db.query(AssetCategory).filter(AssetCategory. id == category_id).first()
-    if not category:
-        raise HTTPException(status_code=404, detail="دسته دارایی یافت نشد")
-    return category
+    return cached_response(request, ("asset_categories", "item", category_id), lambda: crud.get_asset_category(db, category_id), AssetCategoryResponse)
 
 # ============ POST (ایجاد) ============
 
@@ -34,30 +35,16 @@ def create_asset_category(category:  AssetCategoryCreate, db:  Session = Depends
     """
     ایجاد دسته دارایی جدید
     """
-    db_category = AssetCategory(**category.dict())
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
-    return db_category
+    return crud.create_asset_category(db, category)
 
 # ============ PUT (به‌روزرسانی) ============
 
 @router.put("/{category_id}", response_model=AssetCategoryResponse)
-def update_asset_category(category_id: int, category: AssetCategoryUpdate, db: Session = Depends(get_db)):
+def update_asset_category(category_id: int, category: AssetCategoryUpdate, if_match: Optional[int] = Depends(if_match_version), db: Session = Depends(get_db)):
     """
     به‌روزرسانی دسته دارایی
     """
-    db_category = db. query(AssetCategory).filter(AssetCategory.id == category_id).first()
-    if not db_category:
-        raise HTTPException(status_code=404, detail="دسته دارایی یافت نشد")
-    
-    update_data = category.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_category, field, value)
-    
-    db.commit()
-    db.refresh(db_category)
-    return db_category
+    return crud.update_asset_category(db, category_id, category, if_match)
 
 # ============ DELETE (حذف) ============
 
@@ -66,10 +53,41 @@ def delete_asset_category(category_id: int, db: Session = Depends(get_db)):
     """
     حذف دسته دارایی
     """
-    db_category = db. query(AssetCategory).filter(AssetCategory.id == category_id).first()
-    if not db_category:
-        raise HTTPException(status_code=404, detail="دسته دارایی یافت نشد")
-    
-    db.delete(db_category)
-    db.commit()
-    return {"message":  "دسته دارایی حذف شد"}
+    return crud.delete_asset_category(db, category_id)
+
+# ============ Async ============
+
+@async_router.get("/", response_model=List[AssetCategoryResponse])
+async def get_asset_categories_async(request: Request, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت تمام دسته‌های دارایی
+    """
+    return await cached_response_async(request, ("asset_categories", "list", skip, limit), lambda: db.run_sync(crud.list_asset_categories, skip, limit), List[AssetCategoryResponse])
+
+@async_router.get("/{category_id:int}", response_model=AssetCategoryResponse)
+async def get_asset_category_async(request: Request, category_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت یک دسته دارایی
+    """
+    return await cached_response_async(request, ("asset_categories", "item", category_id), lambda: db.run_sync(crud.get_asset_category, category_id), AssetCategoryResponse)
+
+@async_router.post("/", response_model=AssetCategoryResponse)
+async def create_asset_category_async(category: AssetCategoryCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    ایجاد دسته دارایی جدید
+    """
+    return await db.run_sync(crud.create_asset_category, category)
+
+@async_router.put("/{category_id:int}", response_model=AssetCategoryResponse)
+async def update_asset_category_async(category_id: int, category: AssetCategoryUpdate, if_match: Optional[int] = Depends(if_match_version), db: AsyncSession = Depends(get_async_db)):
+    """
+    به‌روزرسانی دسته دارایی
+    """
+    return await db.run_sync(crud.update_asset_category, category_id, category, if_match)
+
+@async_router.delete("/{category_id:int}")
+async def delete_asset_category_async(category_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    حذف دسته دارایی
+    """
+    return await db.run_sync(crud.delete_asset_category, category_id)
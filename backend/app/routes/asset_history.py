@@ -1,29 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from ..  database import get_db
+from typing import List, Optional
+from ..  database import get_db, get_async_db
 from ..  models import AssetHistory
-from ..  schemas import AssetHistoryCreate, AssetHistoryResponse
+from ..  crud import asset_history as crud
+from ..  schemas import AssetHistoryCreate, AssetHistoryResponse, AssetHistoryPage
+from ..  export import export_response
+from ..  fastjson import json_response
+from ..  config import settings
 
 router = APIRouter(prefix="/api/asset-history", tags=["Asset History"])
+# نسخه‌ی async همان مسیرهای CRUD (در حالت DB_MODE=async پیش از router ثبت می‌شود)
+async_router = APIRouter(prefix="/api/asset-history", tags=["Asset History"], include_in_schema=False)
 
 # ============ GET (خواندن) ============
 
-@router.get("/", response_model=List[AssetHistoryResponse])
-def get_asset_histories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/", response_model=AssetHistoryPage)
+def get_asset_histories(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    sort: str = Query("id", pattern="^(id|created_at)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: Session = Depends(get_db),
+):
     """
-    دریافت تمام تاریخچه‌های تغییر
+    دریافت تاریخچه‌های تغییر با صفحه‌بندی cursor
     """
-    histories = db.query(AssetHistory).offset(skip).limit(limit).all()
-    return histories
+    if settings.FAST_JSON:
+        return json_response(crud.list_asset_history_rows(db, cursor, limit, sort, order))
+    return crud.list_asset_histories(db, cursor, limit, sort, order)
+
+@router.get("/export")
+def export_asset_histories(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    asset_id: Optional[int] = None,
+):
+    """
+    خروجی کامل تاریخچه‌ی تغییرات به‌صورت جریانی (CSV یا NDJSON)
+    """
+    statement = select(*AssetHistory.__table__.columns).order_by(AssetHistory.id)
+    if asset_id is not None:
+        statement = statement.where(AssetHistory.asset_id == asset_id)
+    return export_response(statement, format, "asset_histories")
 
 @router.get("/asset/{asset_id}", response_model=List[AssetHistoryResponse])
 def get_asset_history(asset_id: int, db: Session = Depends(get_db)):
     """
     دریافت تاریخچه‌ی تغییرات یک دارایی
     """
-    histories = db.query(AssetHistory).filter(AssetHistory.asset_id == asset_id).all()
-    return histories
+    if settings.FAST_JSON:
+        return json_response(crud.get_asset_history_rows(db, asset_id))
+    return crud.get_asset_history(db, asset_id)
 
 # ============ POST (ایجاد) ============
 
@@ -32,8 +61,37 @@ def create_asset_history(history: AssetHistoryCreate, db: Session = Depends(get_
     """
     ثبت تغییر جدید برای دارایی
     """
-    db_history = AssetHistory(**history.dict())
-    db.add(db_history)
-    db.commit()
-    db.refresh(db_history)
-    return db_history
+    return crud.create_asset_history(db, history)
+
+# ============ Async ============
+
+@async_router.get("/", response_model=AssetHistoryPage)
+async def get_asset_histories_async(
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    sort: str = Query("id", pattern="^(id|created_at)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    دریافت تاریخچه‌های تغییر با صفحه‌بندی cursor
+    """
+    if settings.FAST_JSON:
+        return json_response(await db.run_sync(crud.list_asset_history_rows, cursor, limit, sort, order))
+    return await db.run_sync(crud.list_asset_histories, cursor, limit, sort, order)
+
+@async_router.get("/asset/{asset_id:int}", response_model=List[AssetHistoryResponse])
+async def get_asset_history_async(asset_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت تاریخچه‌ی تغییرات یک دارایی
+    """
+    if settings.FAST_JSON:
+        return json_response(await db.run_sync(crud.get_asset_history_rows, asset_id))
+    return await db.run_sync(crud.get_asset_history, asset_id)
+
+@async_router.post("/", response_model=AssetHistoryResponse)
+async def create_asset_history_async(history: AssetHistoryCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    ثبت تغییر جدید برای دارایی
+    """
+    return await db.run_sync(crud.create_asset_history, history)
@@ -1,47 +1,210 @@
-from fastapi import APIRouter, Depends, HTTPException
+import csv
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. database import get_db
-from .. models import Asset, AssetHistory
-from .. schemas import AssetCreate, AssetUpdate, AssetResponse
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from .. database import get_db, get_async_db
+from .. models import Asset
+from .. crud import assets as crud
+from .. schemas import AssetCreate, AssetUpdate, AssetResponse, AssetExpandedResponse, AssetPage, AssetSearchHit, AssetValuation, BulkImportResult, BulkTransitionRequest, BulkTransitionResult, StreamToken
+from .. auth import Principal, create_stream_token, get_current_user
+from .. export import export_response, rows_response
+from .. fastjson import json_response
+from .. bulk import bulk_import_assets, parse_csv
+from .. transitions import bulk_transition, transition_jobs
+from .. changefeed import change_feed
+from .. config import settings
+from .. filters import ASSET_SORT_PATTERN, AssetFilters
+from .. valuation import asset_valuation, valuation_rows
+from .. warranty import WITHIN_PATTERN, parse_within
+from .. versioning import if_match_version
 
 router = APIRouter(prefix="/api/assets", tags=["Assets"])
+# نسخه‌ی async همان مسیرهای CRUD (در حالت DB_MODE=async پیش از router ثبت می‌شود)
+async_router = APIRouter(prefix="/api/assets", tags=["Assets"], include_in_schema=False)
+# جریان تغییرات با وابستگی get_stream_user (توکن ?token= برای EventSource) جدا ثبت می‌شود
+stream_router = APIRouter(prefix="/api/assets", tags=["Assets"])
 
 # ============ GET (خواندن) ============
 
-@router.get("/", response_model=List[AssetResponse])
-def get_assets(skip:  int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/", response_model=AssetPage)
+def get_assets(
+    filters: AssetFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    sort: str = Query("id", pattern=ASSET_SORT_PATTERN),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    expand: Optional[str] = Query(None, description="روابط جاسازی‌شده: category,owner,department,location"),
+    db: Session = Depends(get_db),
+):
     """
-    دریافت تمام دارایی‌ها
+    دریافت دارایی‌ها با فیلتر و صفحه‌بندی cursor
+
+    همه‌ی فیلترها (status، asset_type، category_id، department_id، location_id، owner_id،
+    manufacturer، بازه‌ی تاریخ خرید و قیمت) با هم ترکیب می‌شوند؛ با include_descendants=true
+    دارایی‌های زیرواحدهای department_id هم برمی‌گردند.
+    برای صفحه‌ی بعد مقدار next_cursor پاسخ را در پارامتر cursor بفرستید.
+    """
+    if settings.FAST_JSON and not expand:
+        return json_response(crud.list_asset_rows(db, filters, cursor, limit, sort, order))
+    return crud.list_assets(db, filters, cursor, limit, sort, order, expand)
+
+@router.get("/export")
+def export_assets(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    filters: AssetFilters = Depends(),
+):
+    """
+    خروجی کامل دارایی‌ها به‌صورت جریانی (CSV یا NDJSON)
+    """
+    statement = (
+        select(*Asset.__table__.columns)
+        .where(*filters.conditions())
+        .order_by(Asset.id)
+    )
+    return export_response(statement, format, "assets")
+
+@router.get("/valuation", response_model=AssetValuation)
+def get_asset_valuation(
+    filters: AssetFilters = Depends(),
+    as_of: Optional[datetime] = Query(None, description="تاریخ ارزش‌گذاری (پیش‌فرض: اکنون)"),
+    group_by: Optional[str] = Query(None, pattern="^(department|category|location)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    ارزش دفتری، استهلاک انباشته و تعداد دارایی‌های کاملاً مستهلک‌شده
+
+    استهلاک به روش خط مستقیم با depreciation_rate به‌عنوان درصد سالانه محاسبه می‌شود؛
+    با group_by جمع هر واحد، دسته یا مکان هم برمی‌گردد.
+    """
+    return asset_valuation(db, filters, as_of, group_by)
+
+@router.get("/valuation/export")
+def export_asset_valuation(
+    filters: AssetFilters = Depends(),
+    as_of: Optional[datetime] = None,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    خروجی ارزش دفتری هر دارایی (CSV یا NDJSON)
+    """
+    as_of, rows = valuation_rows(db, filters, as_of)
+    columns = ["id", "asset_number", "purchase_value", "accumulated_depreciation", "book_value", "fully_depreciated"]
+    return rows_response(columns, rows, format, f"valuation-{as_of:%Y-%m-%d}")
+
+@router.get("/warranty-expiring", response_model=AssetPage)
+def get_warranty_expiring_assets(
+    within: str = Query("30d", pattern=WITHIN_PATTERN, description="بازه از اکنون، مثل 30d، 12h یا 2w"),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
+    """
+    دارایی‌هایی که گارانتی‌شان در بازه‌ی within آینده تمام می‌شود (نزدیک‌ترین اول)
+    """
+    return crud.list_expiring_assets(db, parse_within(within), cursor, limit)
+
+@router.get("/search", response_model=List[AssetSearchHit])
+def search_assets(
+    q: str = Query(..., min_length=3, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+):
     """
-    assets = db.query(Asset).offset(skip).limit(limit).all()
-    return assets
+    جستجوی تقریبی در شماره دارایی، شماره سریال، نام، مدل و سازنده
 
-@router.get("/{asset_id}", response_model=AssetResponse)
-def get_asset(asset_id: int, db: Session = Depends(get_db)):
+    حروف عربی/فارسی، ارقام و نیم‌فاصله یکسان‌سازی می‌شوند؛ نتایج به ترتیب
+    مرتبط بودن (برابر کامل، پیشوند، شامل بودن و در آخر تطابق تقریبی) برمی‌گردند.
+    """
+    return crud.search_assets(db, q, limit)
+
+@router.post("/stream/token", response_model=StreamToken)
+def issue_stream_token(principal: Optional[Principal] = Depends(get_current_user)):
+    """
+    توکن کوتاه‌عمر برای GET /api/assets/stream?token= (EventSource هدر Authorization نمی‌فرستد)
+    """
+    if principal is None:
+        return StreamToken()
+    return StreamToken(token=create_stream_token(principal), expires_in=settings.STREAM_TOKEN_EXPIRE_SECONDS)
+
+@stream_router.get("/stream", response_class=StreamingResponse)
+async def stream_asset_changes(
+    department_id: Optional[int] = None,
+    location_id: Optional[int] = None,
+    asset_type: Optional[str] = None,
+    since: Optional[str] = Query(None, description="شناسه‌ی آخرین رویداد دریافت‌شده (اگر هدر Last-Event-ID نباشد)"),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    جریان تغییرات دارایی‌ها (Server-Sent Events): create، update، delete و history
+
+    با فیلترهای department_id، location_id و asset_type فقط رویدادهای همان دارایی‌ها
+    (پیش یا پس از تغییر) می‌آید. اتصال دوباره با Last-Event-ID رویدادهای جاافتاده را
+    از بافر می‌فرستد؛ اگر در بافر نباشند رویداد reset یعنی فهرست را دوباره بخوانید.
+    """
+    if not change_feed.accepting():
+        raise HTTPException(status_code=503, detail="تعداد اتصال‌های جریان تغییرات به حداکثر رسیده است")
+    filters = {"department_id": department_id, "location_id": location_id, "asset_type": asset_type}
+    return StreamingResponse(
+        change_feed.stream(filters, last_event_id or since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/{asset_id}", response_model=AssetExpandedResponse)
+def get_asset(asset_id: int, expand: Optional[str] = None, db: Session = Depends(get_db)):
     """
     دریافت یک دارایی
     """
-    asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not asset:
-        raise HTTPException(status_code=404, detail="دارایی یافت نشد")
-    return asset
+    return crud.get_asset(db, asset_id, expand)
+
+def _legacy_page(db: Session, filters: AssetFilters, cursor: Optional[str], limit: int, response: Response):
+    """
+    یک صفحه‌ی محدود برای مسیرهای قدیمی؛ cursor صفحه‌ی بعد در هدر X-Next-Cursor می‌آید
+    """
+    if not settings.FAST_JSON:
+        page = crud.list_assets(db, filters, cursor, limit, "id", "asc")
+        if page["next_cursor"]:
+            response.headers["X-Next-Cursor"] = page["next_cursor"]
+        return page["items"]
 
-@router.get("/category/{category_id}", response_model=List[AssetResponse])
-def get_assets_by_category(category_id: int, db: Session = Depends(get_db)):
+    page = crud.list_asset_rows(db, filters, cursor, limit, "id", "asc", crud.ASSET_ROWS)
+    # هدرهای response تزریق‌شده روی Responseی که خود route برمی‌گرداند اعمال نمی‌شوند
+    fast = json_response(page["items"])
+    if page["next_cursor"]:
+        fast.headers["X-Next-Cursor"] = page["next_cursor"]
+    return fast
+
+@router.get("/category/{category_id}", response_model=List[AssetResponse], deprecated=True)
+def get_assets_by_category(
+    category_id: int,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     """
-    دریافت دارایی‌های یک دسته
+    دریافت دارایی‌های یک دسته (منسوخ؛ از GET /api/assets?category_id= استفاده کنید)
     """
-    assets = db.query(Asset).filter(Asset.category_id == category_id).all()
-    return assets
+    return _legacy_page(db, AssetFilters(category_id=category_id), cursor, limit, response)
 
-@router.get("/department/{department_id}", response_model=List[AssetResponse])
-def get_assets_by_department(department_id: int, db: Session = Depends(get_db)):
+@router.get("/department/{department_id}", response_model=List[AssetResponse], deprecated=True)
+def get_assets_by_department(
+    department_id: int,
+    response: Response,
+    include_descendants: bool = False,
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    db: Session = Depends(get_db),
+):
     """
-    دریافت دارایی‌های یک واحد
+    دریافت دارایی‌های یک واحد (منسوخ؛ از GET /api/assets?department_id= استفاده کنید)
     """
-    assets = db.query(Asset).filter(Asset.department_id == department_id).all()
-    return assets
+    return _legacy_page(db, AssetFilters(department_id=department_id, include_descendants=include_descendants), cursor, limit, response)
 
 # ============ POST (ایجاد) ============
 
@@ -50,30 +213,78 @@ def create_asset(asset: AssetCreate, db: Session = Depends(get_db)):
     """
     ایجاد دارایی جدید
     """
-    db_asset = Asset(**asset.dict())
-    db.add(db_asset)
-    db.commit()
-    db.refresh(db_asset)
-    return db_asset
+    return crud.create_asset(db, asset)
+
+def _run_bulk_import(db: Session, rows: List[Dict[str, Any]], mode: str, key: str) -> BulkImportResult:
+    if len(rows) > settings.BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"حداکثر {settings.BULK_MAX_ROWS} ردیف در هر درخواست مجاز است")
+    return bulk_import_assets(db, rows, upsert=mode == "upsert", key=key)
+
+@router.post("/bulk", response_model=BulkImportResult)
+def bulk_create_assets(
+    rows: List[Dict[str, Any]] = Body(...),
+    mode: str = Query("insert", pattern="^(insert|upsert)$"),
+    key: str = Query("asset_number", pattern="^(asset_number|serial_number)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    ورود دسته‌ای دارایی‌ها از آرایه‌ی JSON
+
+    در حالت upsert ردیف‌های موجود بر اساس key به‌روزرسانی می‌شوند؛ کلیدی که با بیش از
+    یک دارایی مطابقت دارد (serial_number یکتا نیست) خطای همان ردیف است.
+    ردیف‌های نامعتبر کل دسته را متوقف نمی‌کنند و در errors گزارش می‌شوند.
+    """
+    return _run_bulk_import(db, rows, mode, key)
+
+@router.post("/bulk/csv", response_model=BulkImportResult)
+def bulk_create_assets_csv(
+    file: UploadFile = File(...),
+    mode: str = Query("insert", pattern="^(insert|upsert)$"),
+    key: str = Query("asset_number", pattern="^(asset_number|serial_number)$"),
+    db: Session = Depends(get_db),
+):
+    """
+    ورود دسته‌ای دارایی‌ها از فایل CSV (سرستون‌ها مطابق AssetCreate)
+    """
+    try:
+        rows = parse_csv(file.file.read())
+    except (UnicodeDecodeError, csv.Error):
+        raise HTTPException(status_code=400, detail="فایل CSV نامعتبر است")
+    return _run_bulk_import(db, rows, mode, key)
+
+@router.post("/bulk-transition", response_model=BulkTransitionResult)
+def bulk_transition_assets(request: BulkTransitionRequest, response: Response, db: Session = Depends(get_db)):
+    """
+    جابه‌جایی یا واگذاری دسته‌ای: مکان، مالک، واحد یا وضعیت دارایی‌های asset_ids یا filters
+
+    تغییرات در دسته‌های BULK_CHUNK_SIZE تایی با SQL مجموعه‌ای اعمال و تاریخچه‌ی هر دارایی
+    ثبت می‌شود. تا BULK_TRANSITION_INLINE_LIMIT دارایی نتیجه همین‌جا برمی‌گردد؛ برای
+    مجموعه‌های بزرگ‌تر پاسخ 202 با job_id است و پیشرفت از هدر Location خوانده می‌شود.
+    """
+    result = bulk_transition(db, request)
+    if result.job_id:
+        response.status_code = 202
+        response.headers["Location"] = f"{router.prefix}/bulk-transition/{result.job_id}"
+    return result
+
+@router.get("/bulk-transition/{job_id}", response_model=BulkTransitionResult)
+def get_bulk_transition(job_id: str):
+    """
+    پیشرفت یک جابه‌جایی دسته‌ای پس‌زمینه (فقط روی همان worker که آن را شروع کرده)
+    """
+    result = transition_jobs.get(job_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="کار جابه‌جایی یافت نشد")
+    return result
 
 # ============ PUT (به‌روزرسانی) ============
 
 @router.put("/{asset_id}", response_model=AssetResponse)
-def update_asset(asset_id: int, asset: AssetUpdate, db:  Session = Depends(get_db)):
+def update_asset(asset_id: int, asset: AssetUpdate, if_match: Optional[int] = Depends(if_match_version), db: Session = Depends(get_db)):
     """
     به‌روزرسانی دارایی
     """
-    db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not db_asset:
-        raise HTTPException(status_code=404, detail="دارایی یافت نشد")
-    
-    update_data = asset.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_asset, field, value)
-    
-    db.commit()
-    db.refresh(db_asset)
-    return db_asset
+    return crud.update_asset(db, asset_id, asset, if_match)
 
 # ============ DELETE (حذف) ============
 
@@ -82,10 +293,51 @@ def delete_asset(asset_id: int, db: Session = Depends(get_db)):
     """
     حذف دارایی
     """
-    db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not db_asset:
-        raise HTTPException(status_code=404, detail="دارایی یافت نشد")
-    
-    db.delete(db_asset)
-    db.commit()
-    return {"message": "دارایی حذف شد"}
+    return crud.delete_asset(db, asset_id)
+
+# ============ Async ============
+
+@async_router.get("/", response_model=AssetPage)
+async def get_assets_async(
+    filters: AssetFilters = Depends(),
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.DEFAULT_PAGE_SIZE, ge=1, le=settings.MAX_PAGE_SIZE),
+    sort: str = Query("id", pattern=ASSET_SORT_PATTERN),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    expand: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    دریافت دارایی‌ها با فیلتر و صفحه‌بندی cursor
+    """
+    if settings.FAST_JSON and not expand:
+        return json_response(await db.run_sync(crud.list_asset_rows, filters, cursor, limit, sort, order))
+    return await db.run_sync(crud.list_assets, filters, cursor, limit, sort, order, expand)
+
+@async_router.get("/{asset_id:int}", response_model=AssetExpandedResponse)
+async def get_asset_async(asset_id: int, expand: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت یک دارایی
+    """
+    return await db.run_sync(crud.get_asset, asset_id, expand)
+
+@async_router.post("/", response_model=AssetResponse)
+async def create_asset_async(asset: AssetCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    ایجاد دارایی جدید
+    """
+    return await db.run_sync(crud.create_asset, asset)
+
+@async_router.put("/{asset_id:int}", response_model=AssetResponse)
+async def update_asset_async(asset_id: int, asset: AssetUpdate, if_match: Optional[int] = Depends(if_match_version), db: AsyncSession = Depends(get_async_db)):
+    """
+    به‌روزرسانی دارایی
+    """
+    return await db.run_sync(crud.update_asset, asset_id, asset, if_match)
+
+@async_router.delete("/{asset_id:int}")
+async def delete_asset_async(asset_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    حذف دارایی
+    """
+    return await db.run_sync(crud.delete_asset, asset_id)
@@ -1,31 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from ..  database import get_db
-from ..  models import Department
+from typing import List, Optional
+from ..  database import get_db, get_async_db
+from ..  crud import departments as crud
+from .. cache import cached_response, cached_response_async
 from .. schemas import DepartmentCreate, DepartmentUpdate, DepartmentResponse
+from .. versioning import if_match_version
 
 router = APIRouter(prefix="/api/departments", tags=["Departments"])
+# نسخه‌ی async همان مسیرهای CRUD (در حالت DB_MODE=async پیش از router ثبت می‌شود)
+async_router = APIRouter(prefix="/api/departments", tags=["Departments"], include_in_schema=False)
 
 # ============ GET (خواندن) ============
 
 @router. get("/", response_model=List[DepartmentResponse])
-def get_departments(skip: int = 0, limit:  int = 100, db: Session = Depends(get_db)):
+def get_departments(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """
     دریافت تمام واحدهای سازمانی
     """
-    departments = db.query(Department).offset(skip).limit(limit).all()
-    return departments
+    return cached_response(request, ("departments", "list", skip, limit), lambda: crud.list_departments(db, skip, limit), List[DepartmentResponse])
 
 @router.get("/{department_id}", response_model=DepartmentResponse)
-def get_department(department_id: int, db: Session = Depends(get_db)):
+def get_department(request: Request, department_id: int, db: Session = Depends(get_db)):
     """
     دریافت یک واحد سازمانی
     """
-    department = db.query(Department).filter(Department.id == department_id).first()
-    if not department: 
-        raise HTTPException(status_code=404, detail="واحد سازمانی یافت نشد")
-    return department
+    return cached_response(request, ("departments", "item", department_id), lambda: crud.get_department(db, department_id), DepartmentResponse)
 
 # ============ POST (ایجاد) ============
 
@@ -34,30 +35,16 @@ def create_department(department: DepartmentCreate, db:  Session = Depends(get_d
     """
     ایجاد واحد سازمانی جدید
     """
-    db_department = Department(**department.dict())
-    db.add(db_department)
-    db.commit()
-    db.refresh(db_department)
-    return db_department
+    return crud.create_department(db, department)
 
 # ============ PUT (به‌روزرسانی) ============
 
 @router.put("/{department_id}", response_model=DepartmentResponse)
-def update_department(department_id: int, department: DepartmentUpdate, db: Session = Depends(get_db)):
+def update_department(department_id: int, department: DepartmentUpdate, if_match: Optional[int] = Depends(if_match_version), db: Session = Depends(get_db)):
     """
     به‌روزرسانی واحد سازمانی
     """
-    db_department = db.query(Department).filter(Department.id == department_id).first()
-    if not db_department:
-        raise HTTPException(status_code=404, detail="واحد سازمانی یافت نشد")
-    
-    update_data = department.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_department, field, value)
-    
-    db.commit()
-    db.refresh(db_department)
-    return db_department
+    return crud.update_department(db, department_id, department, if_match)
 
 # ============ DELETE (حذف) ============
 
@@ -66,10 +53,41 @@ def delete_department(department_id: int, db: Session = Depends(get_db)):
     """
     حذف واحد سازمانی
     """
-    db_department = db.query(Department).filter(Department.id == department_id).first()
-    if not db_department:
-        raise HTTPException(status_code=404, detail="واحد سازمانی یافت نشد")
-    
-    db.delete(db_department)
-    db.commit()
-    return {"message": "واحد سازمانی حذف شد"}
+    return crud.delete_department(db, department_id)
+
+# ============ Async ============
+
+@async_router.get("/", response_model=List[DepartmentResponse])
+async def get_departments_async(request: Request, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت تمام واحدهای سازمانی
+    """
+    return await cached_response_async(request, ("departments", "list", skip, limit), lambda: db.run_sync(crud.list_departments, skip, limit), List[DepartmentResponse])
+
+@async_router.get("/{department_id:int}", response_model=DepartmentResponse)
+async def get_department_async(request: Request, department_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت یک واحد سازمانی
+    """
+    return await cached_response_async(request, ("departments", "item", department_id), lambda: db.run_sync(crud.get_department, department_id), DepartmentResponse)
+
+@async_router.post("/", response_model=DepartmentResponse)
+async def create_department_async(department: DepartmentCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    ایجاد واحد سازمانی جدید
+    """
+    return await db.run_sync(crud.create_department, department)
+
+@async_router.put("/{department_id:int}", response_model=DepartmentResponse)
+async def update_department_async(department_id: int, department: DepartmentUpdate, if_match: Optional[int] = Depends(if_match_version), db: AsyncSession = Depends(get_async_db)):
+    """
+    به‌روزرسانی واحد سازمانی
+    """
+    return await db.run_sync(crud.update_department, department_id, department, if_match)
+
+@async_router.delete("/{department_id:int}")
+async def delete_department_async(department_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    حذف واحد سازمانی
+    """
+    return await db.run_sync(crud.delete_department, department_id)
@@ -1,31 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. database import get_db
-from .. models import Location
+from typing import List, Optional
+from .. database import get_db, get_async_db
+from .. crud import locations as crud
+from .. cache import cached_response, cached_response_async
 from .. schemas import LocationCreate, LocationUpdate, LocationResponse
+from .. versioning import if_match_version
 
 router = APIRouter(prefix="/api/locations", tags=["Locations"])
+# نسخه‌ی async همان مسیرهای CRUD (در حالت DB_MODE=async پیش از router ثبت می‌شود)
+async_router = APIRouter(prefix="/api/locations", tags=["Locations"], include_in_schema=False)
 
 # ============ GET (خواندن) ============
 
 @router.get("/", response_model=List[LocationResponse])
-def get_locations(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_locations(request: Request, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
     """
     دریافت تمام مکان‌های دارایی
     """
-    locations = db.query(Location).offset(skip).limit(limit).all()
-    return locations
+    return cached_response(request, ("locations", "list", skip, limit), lambda: crud.list_locations(db, skip, limit), List[LocationResponse])
 
 @router.get("/{location_id}", response_model=LocationResponse)
-def get_location(location_id: int, db: Session = Depends(get_db)):
+def get_location(request: Request, location_id: int, db: Session = Depends(get_db)):
     """
     دریافت یک مکان دارایی
     """
-    location = db.query(Location).filter(Location.id == location_id).first()
-    if not location:
-        raise HTTPException(status_code=404, detail="مکان دارایی یافت نشد")
-    return location
+    return cached_response(request, ("locations", "item", location_id), lambda: crud.get_location(db, location_id), LocationResponse)
 
 # ============ POST (ایجاد) ============
 
@@ -34,30 +35,16 @@ def create_location(location: LocationCreate, db:  Session = Depends(get_db)):
     """
     ایجاد مکان دارایی جدید
     """
-    db_location = Location(**location.dict())
-    db.add(db_location)
-    db.commit()
-    db.refresh(db_location)
-    return db_location
+    return crud.create_location(db, location)
 
 # ============ PUT (به‌روزرسانی) ============
 
 @router.put("/{location_id}", response_model=LocationResponse)
-def update_location(location_id: int, location: LocationUpdate, db: Session = Depends(get_db)):
+def update_location(location_id: int, location: LocationUpdate, if_match: Optional[int] = Depends(if_match_version), db: Session = Depends(get_db)):
     """
     به‌روزرسانی مکان دارایی
     """
-    db_location = db.query(Location).filter(Location.id == location_id).first()
-    if not db_location:
-        raise HTTPException(status_code=404, detail="مکان دارایی یافت نشد")
-    
-    update_data = location.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_location, field, value)
-    
-    db.commit()
-    db.refresh(db_location)
-    return db_location
+    return crud.update_location(db, location_id, location, if_match)
 
 # ============ DELETE (حذف) ============
 
@@ -66,10 +53,41 @@ def delete_location(location_id:  int, db: Session = Depends(get_db)):
     """
     حذف مکان دارایی
     """
-    db_location = db.query(Location).filter(Location.id == location_id).first()
-    if not db_location: 
-        raise HTTPException(status_code=404, detail="مکان دارایی یافت نشد")
-    
-    db.delete(db_location)
-    db.commit()
-    return {"message": "مکان دارایی حذف شد"}
+    return crud.delete_location(db, location_id)
+
+# ============ Async ============
+
+@async_router.get("/", response_model=List[LocationResponse])
+async def get_locations_async(request: Request, skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت تمام مکان‌های دارایی
+    """
+    return await cached_response_async(request, ("locations", "list", skip, limit), lambda: db.run_sync(crud.list_locations, skip, limit), List[LocationResponse])
+
+@async_router.get("/{location_id:int}", response_model=LocationResponse)
+async def get_location_async(request: Request, location_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت یک مکان دارایی
+    """
+    return await cached_response_async(request, ("locations", "item", location_id), lambda: db.run_sync(crud.get_location, location_id), LocationResponse)
+
+@async_router.post("/", response_model=LocationResponse)
+async def create_location_async(location: LocationCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    ایجاد مکان دارایی جدید
+    """
+    return await db.run_sync(crud.create_location, location)
+
+@async_router.put("/{location_id:int}", response_model=LocationResponse)
+async def update_location_async(location_id: int, location: LocationUpdate, if_match: Optional[int] = Depends(if_match_version), db: AsyncSession = Depends(get_async_db)):
+    """
+    به‌روزرسانی مکان دارایی
+    """
+    return await db.run_sync(crud.update_location, location_id, location, if_match)
+
+@async_router.delete("/{location_id:int}")
+async def delete_location_async(location_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    حذف مکان دارایی
+    """
+    return await db.run_sync(crud.delete_location, location_id)
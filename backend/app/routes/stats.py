@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List
+from .. database import get_db
+from .. schemas import DashboardStats, DepartmentAssetStats
+from .. stats import get_department_stats, get_summary, recompute_asset_statistics
+
+router = APIRouter(prefix="/api/stats", tags=["Statistics"])
+
+# ============ GET (خواندن) ============
+
+@router.get("/summary", response_model=DashboardStats)
+def get_stats_summary(db: Session = Depends(get_db)):
+    """
+    آمار کلی دارایی‌ها برای داشبورد
+    """
+    return get_summary(db)
+
+@router.get("/departments", response_model=List[DepartmentAssetStats])
+def get_stats_departments(include_descendants: bool = False, db: Session = Depends(get_db)):
+    """
+    آمار دارایی به تفکیک واحد سازمانی (با include_descendants شامل زیرواحدها)
+    """
+    return get_department_stats(db, include_descendants)
+
+# ============ POST (محاسبه‌ی دوباره) ============
+
+@router.post("/recompute", response_model=DashboardStats)
+def recompute_stats(db: Session = Depends(get_db)):
+    """
+    محاسبه‌ی کامل آمار از جدول دارایی‌ها (اصلاح انحراف شمارنده‌ها)
+    """
+    recompute_asset_statistics(db)
+    return get_summary(db)
@@ -1,14 +1,24 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
-from .. database import get_db
-from .. models import User
+from typing import List, Optional
+from .. database import get_db, get_async_db
+from .. crud import users as crud
 from .. schemas import UserCreate, UserUpdate, UserResponse, UserLogin, Token
-from .. auth import create_access_token
+from .. ad import DirectoryUnavailable
+from .. auth import authenticate_user_ad, create_access_token
+from .. passwords import password_hasher
+from .. versioning import if_match_version
+from .. fastjson import json_response
+from fastapi.concurrency import run_in_threadpool
 from datetime import timedelta
 from .. config import settings
 
 router = APIRouter(prefix="/api/users", tags=["Users"])
+# نسخه‌ی async همان مسیرهای CRUD (در حالت DB_MODE=async پیش از router ثبت می‌شود)
+async_router = APIRouter(prefix="/api/users", tags=["Users"], include_in_schema=False)
+# ورود کاربر بدون نیاز به توکن (بقیه‌ی مسیرها در main.py پشت get_current_user هستند)
+login_router = APIRouter(prefix="/api/users", tags=["Users"])
 
 # ============ GET (خواندن) ============
 
@@ -17,43 +27,53 @@ def get_users(skip: int = 0, limit:  int = 100, db: Session = Depends(get_db)):
     """
     دریافت تمام کاربران
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    if settings.FAST_JSON:
+        return json_response(crud.list_user_rows(db, skip, limit))
+    return crud.list_users(db, skip, limit)
 
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(user_id: int, db: Session = Depends(get_db)):
     """
     دریافت یک کاربر
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(status_code=404, detail="کاربر یافت نشد")
-    return user
+    return crud.get_user(db, user_id)
 
 # ============ POST (ایجاد) ============
 
+async def _hash_password(password: Optional[str]) -> Optional[str]:
+    return await password_hasher.hash(password) if password else None
+
 @router.post("/", response_model=UserResponse)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     """
     ایجاد کاربر جدید
     """
-    db_user = db.query(User).filter(User.username == user.username).first()
-    if db_user:
-        raise HTTPException(status_code=400, detail="نام کاربری قبلاً استفاده شده است")
-    
-    db_user = User(**user.dict())
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    crud.check_new_user_password(user)
+    hashed_password = await _hash_password(user.password)
+    return await run_in_threadpool(crud.create_user, db, user, hashed_password)
 
-@router.post("/login", response_model=Token)
-def login(user_login: UserLogin, db: Session = Depends(get_db)):
+@login_router.post("/login", response_model=Token)
+async def login(user_login: UserLogin, db: Session = Depends(get_db)):
     """
     ورود کاربر
+
+    رمز حساب‌های AD (دارای ad_user_id) با bind روی Active Directory و رمز حساب‌های
+    محلی با hash ذخیره‌شده بررسی می‌شود.
     """
-    user = db.query(User).filter(User.username == user_login.username).first()
-    if not user: 
+    user = await run_in_threadpool(crud.get_user_by_username, db, user_login.username)
+    if user and user.ad_user_id and settings.AD_ENABLED:
+        try:
+            authenticated = await authenticate_user_ad(user.ad_user_id, user_login.password)
+        except DirectoryUnavailable:
+            raise HTTPException(status_code=503, detail="سرور Active Directory در دسترس نیست")
+    else:
+        # برای کاربر ناموجود و حساب AD با AD_ENABLED خاموش هم یک بررسی ساختگی انجام می‌شود
+        # (پاسخ و زمان آن یکسان، تا نوع حساب از بیرون معلوم نشود)
+        local_hash = user.hashed_password if user and not user.ad_user_id else None
+        authenticated, new_hash = await password_hasher.verify(user_login.password, local_hash)
+        if authenticated and new_hash:
+            await run_in_threadpool(crud.set_password_hash, db, user.id, new_hash)
+    if not authenticated or not user.is_active: 
         raise HTTPException(status_code=401, detail="نام کاربری یا رمز عبور اشتباه است")
     
     # توکن ایجاد کنید
@@ -67,21 +87,14 @@ def login(user_login: UserLogin, db: Session = Depends(get_db)):
 # ============ PUT (به‌روزرسانی) ============
 
 @router. put("/{user_id}", response_model=UserResponse)
-def update_user(user_id:  int, user: UserUpdate, db: Session = Depends(get_db)):
+async def update_user(user_id:  int, user: UserUpdate, if_match: Optional[int] = Depends(if_match_version), db: Session = Depends(get_db)):
     """
     به‌روزرسانی کاربر
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user: 
-        raise HTTPException(status_code=404, detail="کاربر یافت نشد")
-    
-    update_data = user.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_user, field, value)
-    
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    if user.password:
+        await run_in_threadpool(crud.check_local_account, db, user_id)
+    hashed_password = await _hash_password(user.password)
+    return await run_in_threadpool(crud.update_user, db, user_id, user, hashed_password, if_match)
 
 # ============ DELETE (حذف) ============
 
@@ -90,10 +103,48 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     """
     حذف کاربر
     """
-    db_user = db.query(User).filter(User.id == user_id).first()
-    if not db_user:
-        raise HTTPException(status_code=404, detail="کاربر یافت نشد")
-    
-    db.delete(db_user)
-    db.commit()
-    return {"message": "کاربر حذف شد"}
+    return crud.delete_user(db, user_id)
+
+# ============ Async ============
+
+@async_router.get("/", response_model=List[UserResponse])
+async def get_users_async(skip: int = 0, limit: int = 100, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت تمام کاربران
+    """
+    if settings.FAST_JSON:
+        return json_response(await db.run_sync(crud.list_user_rows, skip, limit))
+    return await db.run_sync(crud.list_users, skip, limit)
+
+@async_router.get("/{user_id:int}", response_model=UserResponse)
+async def get_user_async(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    دریافت یک کاربر
+    """
+    return await db.run_sync(crud.get_user, user_id)
+
+@async_router.post("/", response_model=UserResponse)
+async def create_user_async(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """
+    ایجاد کاربر جدید
+    """
+    crud.check_new_user_password(user)
+    hashed_password = await _hash_password(user.password)
+    return await db.run_sync(crud.create_user, user, hashed_password)
+
+@async_router.put("/{user_id:int}", response_model=UserResponse)
+async def update_user_async(user_id: int, user: UserUpdate, if_match: Optional[int] = Depends(if_match_version), db: AsyncSession = Depends(get_async_db)):
+    """
+    به‌روزرسانی کاربر
+    """
+    if user.password:
+        await db.run_sync(crud.check_local_account, user_id)
+    hashed_password = await _hash_password(user.password)
+    return await db.run_sync(crud.update_user, user_id, user, hashed_password, if_match)
+
+@async_router.delete("/{user_id:int}")
+async def delete_user_async(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    حذف کاربر
+    """
+    return await db.run_sync(crud.delete_user, user_id)
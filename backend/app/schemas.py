@@ -27,6 +27,8 @@ class DepartmentUpdate(BaseModel):
     code: Optional[str] = None
     description: Optional[str] = None
     parent_id: Optional[int] = None
+    # نسخه‌ای که کلاینت خوانده است (به‌جای هدر If-Match)؛ ناهمخوانی = 409
+    version: Optional[int] = None
 
 class DepartmentResponse(DepartmentBase):
     """
@@ -35,6 +37,7 @@ class DepartmentResponse(DepartmentBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -56,7 +59,8 @@ class UserCreate(UserBase):
     """
     ایجاد User جدید
     """
-    password:  str
+    # برای حساب‌های محلی لازم است؛ حساب‌های AD (با ad_user_id) رمز محلی ندارند
+    password:  Optional[str] = None
 
 class UserUpdate(BaseModel):
     """
@@ -66,6 +70,8 @@ class UserUpdate(BaseModel):
     full_name: Optional[str] = None
     department_id: Optional[int] = None
     is_admin: Optional[bool] = None
+    password: Optional[str] = None
+    version: Optional[int] = None
 
 class UserResponse(UserBase):
     """
@@ -75,6 +81,7 @@ class UserResponse(UserBase):
     is_active: bool
     created_at:  datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -93,6 +100,13 @@ class Token(BaseModel):
     access_token: str
     token_type:  str = "bearer"
 
+class StreamToken(BaseModel):
+    """
+    توکن کوتاه‌عمر جریان تغییرات (فقط برای GET /api/assets/stream?token=)؛ بدون احراز هویت null
+    """
+    token: Optional[str] = None
+    expires_in: int = 0
+
 # ============ AssetCategory Schemas ============
 
 class AssetCategoryBase(BaseModel):
@@ -116,6 +130,7 @@ class AssetCategoryUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     asset_type: Optional[str] = None
+    version: Optional[int] = None
 
 class AssetCategoryResponse(AssetCategoryBase):
     """
@@ -124,6 +139,7 @@ class AssetCategoryResponse(AssetCategoryBase):
     id: int
     created_at:  datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -155,6 +171,7 @@ class LocationUpdate(BaseModel):
     floor: Optional[int] = None
     room: Optional[str] = None
     description: Optional[str] = None
+    version: Optional[int] = None
 
 class LocationResponse(LocationBase):
     """
@@ -163,6 +180,7 @@ class LocationResponse(LocationBase):
     id: int
     created_at:  datetime
     updated_at: datetime
+    version: int
 
     class Config:
         from_attributes = True
@@ -207,6 +225,7 @@ class AssetUpdate(BaseModel):
     department_id: Optional[int] = None
     location_id: Optional[int] = None
     warranty_expiry: Optional[datetime] = None
+    version: Optional[int] = None
 
 class AssetResponse(AssetBase):
     """
@@ -215,10 +234,99 @@ class AssetResponse(AssetBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: int
 
     class Config: 
         from_attributes = True
 
+class AssetExpandedResponse(AssetResponse):
+    """
+    پاسخ Asset همراه با اشیای مرتبط درخواست‌شده در expand
+    """
+    category: Optional[AssetCategoryResponse] = None
+    owner: Optional[UserResponse] = None
+    department: Optional[DepartmentResponse] = None
+    location: Optional[LocationResponse] = None
+
+class AssetSearchHit(AssetResponse):
+    """
+    نتیجه‌ی جستجوی دارایی همراه با امتیاز مرتبط بودن
+    """
+    score: float
+
+class AssetPage(BaseModel):
+    """
+    صفحه‌ای از Assetها با cursor صفحه‌ی بعد
+    """
+    items: List[AssetExpandedResponse]
+    next_cursor: Optional[str] = None
+
+class BulkRowError(BaseModel):
+    """
+    خطای یک ردیف در ورود دسته‌ای
+    """
+    row: int
+    asset_number: Optional[str] = None
+    error: str
+
+class BulkImportResult(BaseModel):
+    """
+    نتیجه‌ی ورود دسته‌ای Assetها
+    """
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[BulkRowError] = []
+
+class AssetSelection(BaseModel):
+    """
+    انتخاب Assetها با همان فیلترهای فهرست (GET /api/assets/)
+    """
+    status: Optional[str] = None
+    asset_type: Optional[str] = None
+    category_id: Optional[int] = None
+    department_id: Optional[int] = None
+    include_descendants: bool = False
+    location_id: Optional[int] = None
+    owner_id: Optional[int] = None
+    manufacturer: Optional[str] = None
+    purchased_from: Optional[datetime] = None
+    purchased_to: Optional[datetime] = None
+    min_price: Optional[float] = None
+    max_price: Optional[float] = None
+
+class BulkTransitionRequest(BaseModel):
+    """
+    جابه‌جایی یا واگذاری دسته‌ای Assetها
+
+    دقیقاً یکی از asset_ids یا filters؛ فیلدهای مقصدی که در بدنه آمده‌اند
+    (حتی با null، مثلاً owner_id: null برای آزاد کردن) روی همه اعمال می‌شوند.
+    """
+    asset_ids: Optional[List[int]] = None
+    filters: Optional[AssetSelection] = None
+    location_id: Optional[int] = None
+    owner_id: Optional[int] = None
+    department_id: Optional[int] = None
+    status: Optional[str] = None
+    # در توضیح ردیف‌های تاریخچه ثبت می‌شود
+    note: Optional[str] = None
+
+class BulkTransitionResult(BaseModel):
+    """
+    نتیجه یا پیشرفت جابه‌جایی دسته‌ای
+    """
+    job_id: Optional[str] = None
+    state: str
+    total: int
+    processed: int = 0
+    changed: int = 0
+    # یافت نشده یا از قبل در وضعیت مقصد
+    skipped: int = 0
+    history_rows: int = 0
+    error: Optional[str] = None
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
 # ============ AssetHistory Schemas ============
 
 class AssetHistoryBase(BaseModel):
@@ -226,7 +334,7 @@ class AssetHistoryBase(BaseModel):
     پایه‌ی AssetHistory
     """
     asset_id: int
-    user_id: int
+    user_id: Optional[int] = None
     change_type: str
     old_value: Optional[str] = None
     new_value: Optional[str] = None
@@ -248,6 +356,13 @@ class AssetHistoryResponse(AssetHistoryBase):
     class Config:
         from_attributes = True
 
+class AssetHistoryPage(BaseModel):
+    """
+    صفحه‌ای از AssetHistoryها با cursor صفحه‌ی بعد
+    """
+    items: List[AssetHistoryResponse]
+    next_cursor: Optional[str] = None
+
 # ============ Report Schemas ============
 
 class ReportBase(BaseModel):
@@ -278,6 +393,32 @@ class ReportResponse(ReportBase):
 
 # ============ Dashboard Schemas ============
 
+class ValuationTotals(BaseModel):
+    """
+    جمع ارزش‌گذاری مجموعه‌ای از دارایی‌ها
+    """
+    asset_count: int
+    purchase_value: float
+    accumulated_depreciation: float
+    book_value: float
+    fully_depreciated_count: int
+
+class ValuationGroup(ValuationTotals):
+    """
+    جمع ارزش‌گذاری یک گروه (واحد، دسته یا مکان)
+    """
+    key: Optional[int] = None
+    name: Optional[str] = None
+
+class AssetValuation(BaseModel):
+    """
+    ارزش‌گذاری دارایی‌ها در یک تاریخ
+    """
+    as_of: datetime
+    group_by: Optional[str] = None
+    totals: ValuationTotals
+    groups: List[ValuationGroup] = []
+
 class DashboardStats(BaseModel):
     """
     آمار داشبورد
@@ -291,6 +432,16 @@ class DashboardStats(BaseModel):
     total_departments: int
     total_users:  int
 
+class DepartmentAssetStats(BaseModel):
+    """
+    آمار دارایی یک واحد (معادل vw_department_assets)
+    """
+    id: int
+    department_name: str
+    asset_count: int
+    department_total_value: float
+    active_count: int
+
 class DepartmentDashboard(BaseModel):
     """
     داشبورد واحد
@@ -0,0 +1,507 @@
+import heapq
+import logging
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import or_, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .models import Asset
+
+logger = logging.getLogger(__name__)
+
+# ============ یکسان‌سازی متن فارسی/عربی ============
+
+# تبدیل حروف عربی به فارسی، ارقام فارسی/عربی به لاتین، حذف اعراب، کشیده و نیم‌فاصله
+_TRANSLATION = str.maketrans({
+    "ي": "ی", "ى": "ی", "ئ": "ی",
+    "ك": "ک",
+    "ة": "ه", "ۀ": "ه",
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ؤ": "و",
+    **{chr(0x06F0 + digit): str(digit) for digit in range(10)},
+    **{chr(0x0660 + digit): str(digit) for digit in range(10)},
+    **{chr(code): None for code in range(0x064B, 0x0660)},
+    "ٰ": None,  # الف کوچک بالای حرف
+    "ـ": None,  # کشیده (ـ)
+    "‌": None,  # نیم‌فاصله
+    "‍": None,
+    "‏": None,
+})
+
+def normalize(text: Optional[str]) -> str:
+    """
+    یکسان‌سازی متن برای جستجو (حروف، ارقام، فاصله‌ها و حروف کوچک)
+    """
+    if not text:
+        return ""
+    return " ".join(text.translate(_TRANSLATION).casefold().split())
+
+def trigrams(text: str) -> Set[str]:
+    """
+    سه‌حرفی‌های یک متن یکسان‌شده
+    """
+    return {text[index:index + 3] for index in range(len(text) - 2)}
+
+# ============ ایندکس n-gram دارایی‌ها ============
+
+# فیلدهای قابل جستجو و وزن هر کدام در رتبه‌بندی
+SEARCH_FIELDS = (
+    ("asset_number", 5.0),
+    ("serial_number", 5.0),
+    ("name", 3.0),
+    ("model", 2.0),
+    ("manufacturer", 1.0),
+)
+
+# امتیاز نوع تطابق: برابر کامل > پیشوند > شامل بودن؛ تطابق تقریبی همیشه پایین‌تر از این‌هاست
+EXACT, PREFIX, CONTAINS = 3.0, 2.0, 1.0
+# هر خطای تایپی حداکثر سه سه‌حرفی را خراب می‌کند
+FUZZY_GRAMS_PER_EDIT = 3
+
+# نشانه‌های ابتدا و انتهای متن؛ سه‌حرفی‌های شامل آن‌ها پیشوند و برابر کامل را پیدا می‌کنند
+START, END = "\x02", "\x03"
+
+# سطح‌های امتیاز یک کلمه به ترتیب نزولی: (امتیاز، شماره‌ی فیلد، نوع تطابق)
+TIERS = sorted(
+    ((weight * kind, field, kind) for field, (_, weight) in enumerate(SEARCH_FIELDS) for kind in (EXACT, PREFIX, CONTAINS)),
+    key=lambda tier: (-tier[0], tier[1]),
+)
+
+_EMPTY = array("I")
+
+def _field_keys(field: int, value: str) -> Set[str]:
+    """
+    کلیدهای posting یک فیلد: سه‌حرفی‌های متن با نشانه‌ی ابتدا/انتها و پیشوند شماره‌ی فیلد
+    """
+    if not value:
+        return set()
+    tag = str(field)
+    return {tag + gram for gram in trigrams(START + value + END)}
+
+def _matches(value: str, term: str, kind: float) -> bool:
+    if kind == EXACT:
+        return value == term
+    if kind == PREFIX:
+        return value.startswith(term)
+    return term in value
+
+class AssetSearchIndex:
+    """
+    ایندکس معکوس سه‌حرفی (trigram) درون‌پردازه‌ای روی فیلدهای متنی دارایی‌ها
+
+    هر posting یک array('I') مرتب از شناسه‌های دارایی است و کلید آن سه‌حرفی همراه
+    با شماره‌ی فیلد است. نوشتن‌های همین پردازه بلافاصله اعمال می‌شوند و تغییرات
+    پردازه‌های دیگر (و ورود دسته‌ای) با watermark روی updated_at/created_at خوانده می‌شوند.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # فقط یک refresh در هر زمان؛ پرس‌وجوی پایگاه‌داده بیرون از _lock اجرا می‌شود
+        self._refresh_lock = threading.Lock()
+        self._documents: Dict[int, Tuple[str, ...]] = {}
+        self._postings: Dict[str, array] = {}
+        # واژگان متنی (بدون رقم) برای اصلاح خطای تایپی: واژه -> تعداد و سه‌حرفی -> واژه‌ها
+        self._words: Counter = Counter()
+        self._word_grams: Dict[str, Set[str]] = {}
+        self._watermark: Optional[datetime] = None
+        self._loaded = False
+        self._refreshed_at = 0.0
+
+    # ---------- نگه‌داری ایندکس ----------
+
+    @staticmethod
+    def _fields(asset) -> Tuple[str, ...]:
+        return tuple(normalize(getattr(asset, field)) for field, _ in SEARCH_FIELDS)
+
+    @staticmethod
+    def _keys(fields: Tuple[str, ...]) -> Set[str]:
+        keys = set()
+        for field, value in enumerate(fields):
+            keys |= _field_keys(field, value)
+        return keys
+
+    def _post(self, key: str, asset_id: int):
+        postings = self._postings.get(key)
+        if postings is None:
+            self._postings[key] = array("I", [asset_id])
+            return
+        # شناسه‌های جدید معمولاً بزرگ‌ترین‌اند و فقط به انتها اضافه می‌شوند
+        if postings[-1] < asset_id:
+            postings.append(asset_id)
+            return
+        position = bisect_left(postings, asset_id)
+        if position == len(postings) or postings[position] != asset_id:
+            postings.insert(position, asset_id)
+
+    def _unpost(self, key: str, asset_id: int):
+        postings = self._postings.get(key)
+        if postings is None:
+            return
+        position = bisect_left(postings, asset_id)
+        if position < len(postings) and postings[position] == asset_id:
+            del postings[position]
+            if not postings:
+                del self._postings[key]
+
+    @staticmethod
+    def _vocabulary(fields: Tuple[str, ...]) -> Counter:
+        return Counter(
+            word for value in fields for word in value.split()
+            if len(word) >= 3 and not any(char.isdigit() for char in word)
+        )
+
+    def _count_words(self, words: Counter, sign: int):
+        for word, count in words.items():
+            before = self._words[word]
+            self._words[word] = before + sign * count
+            if before <= 0 < self._words[word]:
+                for gram in trigrams(START + word + END):
+                    self._word_grams.setdefault(gram, set()).add(word)
+            elif self._words[word] <= 0:
+                del self._words[word]
+                for gram in trigrams(START + word + END):
+                    self._word_grams[gram].discard(word)
+
+    def _put(self, asset_id: int, fields: Tuple[str, ...]):
+        old = self._documents.get(asset_id)
+        if old == fields:
+            return
+        old_keys = self._keys(old) if old is not None else set()
+        new_keys = self._keys(fields)
+        for key in old_keys - new_keys:
+            self._unpost(key, asset_id)
+        for key in new_keys - old_keys:
+            self._post(key, asset_id)
+        if old is not None:
+            self._count_words(self._vocabulary(old), -1)
+        self._count_words(self._vocabulary(fields), 1)
+        self._documents[asset_id] = fields
+
+    def add(self, asset):
+        """
+        افزودن یا به‌روزرسانی یک دارایی در ایندکس
+        """
+        with self._lock:
+            if self._loaded:
+                self._put(asset.id, self._fields(asset))
+
+    def remove(self, asset_id: int):
+        """
+        حذف یک دارایی از ایندکس
+        """
+        with self._lock:
+            fields = self._documents.pop(asset_id, None)
+            if fields is not None:
+                for key in self._keys(fields):
+                    self._unpost(key, asset_id)
+                self._count_words(self._vocabulary(fields), -1)
+
+    def mark_stale(self):
+        """
+        خواندن تغییرات از پایگاه‌داده در جستجوی بعدی (مثلاً پس از ورود دسته‌ای)
+        """
+        self._refreshed_at = 0.0
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self._postings.clear()
+            self._words.clear()
+            self._word_grams.clear()
+            self._watermark = None
+            self._loaded = False
+            self._refreshed_at = 0.0
+
+    def refresh(self, db: Session):
+        """
+        بارگذاری کامل (بار اول) یا خواندن ردیف‌های تغییرکرده از آخرین watermark
+
+        خواندن از پایگاه‌داده بیرون از _lock انجام می‌شود و فقط اعمال هر دسته‌ی
+        EXPORT_BATCH_SIZE تایی قفل را می‌گیرد، پس جستجوها پشت یک refresh طولانی
+        (مثلاً ساخت اولیه) نمی‌مانند. اگر refresh دیگری در جریان باشد و ایندکس از قبل
+        ساخته شده باشد، همین فراخوانی کاری نمی‌کند. ردیفی که هم‌زمان با خواندن حذف شود
+        ممکن است دوباره در ایندکس بیاید؛ crud.search_assets آن را کنار می‌گذارد.
+        """
+        if not self._refresh_lock.acquire(blocking=not self._loaded):
+            return
+        try:
+            refreshed_at = time.monotonic()
+            columns = [Asset.id, Asset.created_at, Asset.updated_at] + [getattr(Asset, field) for field, _ in SEARCH_FIELDS]
+            statement = select(*columns)
+            with self._lock:
+                watermark = self._watermark
+            if watermark is not None:
+                # ردیف‌های SEARCH_WATERMARK_OVERLAP ثانیه‌ی پیش از watermark دوباره خوانده می‌شوند تا
+                # تراکنش‌هایی که پس از خواندن قبلی با زمان قدیمی‌تر commit شده‌اند جا نمانند؛
+                # _put سندهای بدون تغییر را نادیده می‌گیرد
+                since = watermark - timedelta(seconds=settings.SEARCH_WATERMARK_OVERLAP)
+                statement = statement.where(or_(Asset.updated_at >= since, Asset.created_at >= since))
+            started = time.perf_counter()
+            count = 0
+            result = db.execute(statement.execution_options(yield_per=settings.EXPORT_BATCH_SIZE))
+            for rows in result.partitions():
+                batch = []
+                for asset_id, created_at, updated_at, *values in rows:
+                    batch.append((asset_id, tuple(normalize(value) for value in values)))
+                    for moment in (created_at, updated_at):
+                        if moment is not None and (watermark is None or moment > watermark):
+                            watermark = moment
+                with self._lock:
+                    for asset_id, fields in batch:
+                        self._put(asset_id, fields)
+                count += len(batch)
+            with self._lock:
+                self._watermark = watermark
+                if not self._loaded:
+                    logger.info("ایندکس جستجو با %d دارایی در %.2f ثانیه ساخته شد", count, time.perf_counter() - started)
+                self._loaded = True
+                self._refreshed_at = refreshed_at
+        finally:
+            self._refresh_lock.release()
+
+    def ensure_fresh(self, db: Session):
+        if not self._loaded or time.monotonic() - self._refreshed_at >= settings.SEARCH_REFRESH_INTERVAL:
+            self.refresh(db)
+
+    # ---------- جستجو ----------
+
+    @staticmethod
+    def _contains(postings: array, asset_id: int) -> bool:
+        position = bisect_left(postings, asset_id)
+        return position < len(postings) and postings[position] == asset_id
+
+    @staticmethod
+    def _walk(lists: List[array]) -> Iterator[int]:
+        """
+        شناسه‌های مشترک همه‌ی postingها به ترتیب صعودی (leapfrog join)
+
+        هر posting با جستجوی دودویی تا نامزد فعلی جلو می‌رود و چون تولید تنبل است
+        مصرف‌کننده پس از پیدا کردن تعداد لازم متوقف می‌شود؛ هزینه به اندازه‌ی postingها
+        بستگی ندارد.
+        """
+        if not lists or not all(lists):
+            return
+        lists = sorted(lists, key=len)
+        positions = [0] * len(lists)
+        target = max(postings[0] for postings in lists)
+        while True:
+            for index, postings in enumerate(lists):
+                position = bisect_left(postings, target, positions[index])
+                if position == len(postings):
+                    return
+                positions[index] = position
+                if postings[position] != target:
+                    target = postings[position]
+                    break
+            else:
+                yield target
+                target += 1
+
+    def _term_lists(self, term: str, field: int, kind: float) -> List[array]:
+        """
+        postingهای لازم برای یک نوع تطابق کلمه در یک فیلد
+        """
+        tag = str(field)
+        keys = [tag + gram for gram in trigrams(term)]
+        if kind != CONTAINS:
+            keys.append(tag + START + term[:2])
+        if kind == EXACT:
+            keys.append(tag + term[-2:] + END)
+        return [self._postings.get(key, _EMPTY) for key in keys]
+
+    def _rank_term(self, term: str, limit: int, scale: float = 1.0) -> Dict[int, float]:
+        """
+        بهترین limit نتیجه برای یک کلمه
+
+        سطح‌های امتیاز به ترتیب نزولی پیمایش می‌شوند و هر سطح به ترتیب شناسه؛
+        با پر شدن limit کار تمام می‌شود.
+        """
+        results: Dict[int, float] = {}
+        for score, field, kind in TIERS:
+            for asset_id in self._walk(self._term_lists(term, field, kind)):
+                if asset_id not in results and _matches(self._documents[asset_id][field], term, kind):
+                    results[asset_id] = score * scale
+                    if len(results) >= limit:
+                        return results
+        return results
+
+    def _containing(self, term: str) -> Iterator[int]:
+        """
+        شناسه‌های دارای term در هر فیلدی، صعودی و بدون تکرار
+        """
+        previous = None
+        walks = [self._walk(self._term_lists(term, field, CONTAINS)) for field in range(len(SEARCH_FIELDS))]
+        for asset_id in heapq.merge(*walks):
+            if asset_id != previous:
+                previous = asset_id
+                yield asset_id
+
+    def _estimate(self, term: str) -> int:
+        """
+        برآورد تعداد دارایی‌های دارای term (کوتاه‌ترین posting در هر فیلد)
+        """
+        return sum(
+            min(len(postings) for postings in self._term_lists(term, field, CONTAINS))
+            for field in range(len(SEARCH_FIELDS))
+        )
+
+    @staticmethod
+    def _score(fields: Tuple[str, ...], terms: List[str]) -> float:
+        """
+        امتیاز تطابق چندکلمه‌ای: همه‌ی کلمه‌ها باید در یکی از فیلدها باشند
+        """
+        joined = "\n".join(fields)
+        if not all(term in joined for term in terms):
+            return 0.0
+        total = 0.0
+        for term in terms:
+            for score, field, kind in TIERS:
+                if _matches(fields[field], term, kind):
+                    total += score
+                    break
+            else:
+                return 0.0
+        return total
+
+    def _rank_terms(self, query: str, terms: List[str], limit: int) -> Dict[int, float]:
+        """
+        جستجوی چندکلمه‌ای: ابتدا کل عبارت، سپس دارایی‌هایی که همه‌ی کلمه‌ها را دارند
+
+        نامزدها از کم‌تکرارترین کلمه و به ترتیب شناسه خوانده می‌شوند و حداکثر
+        SEARCH_MAX_CANDIDATES نامزد امتیاز می‌گیرد.
+        """
+        results = self._rank_term(query, limit, scale=len(terms))
+        if len(results) >= limit:
+            return results
+        driver = min((term for term in terms if len(term) >= 3), key=self._estimate)
+        for scanned, asset_id in enumerate(self._containing(driver)):
+            if scanned >= settings.SEARCH_MAX_CANDIDATES:
+                break
+            if asset_id not in results:
+                score = self._score(self._documents[asset_id], terms)
+                if score:
+                    results[asset_id] = score
+        return results
+
+    def _correct(self, term: str) -> str:
+        """
+        نزدیک‌ترین واژه‌ی موجود به term (شباهت Jaccard سه‌حرفی‌ها، سپس پرتکرارتر)
+        """
+        if term in self._words or len(term) < 3 or any(char.isdigit() for char in term):
+            return term
+        grams = trigrams(START + term + END)
+        minimum = max(len(grams) - FUZZY_GRAMS_PER_EDIT, (len(grams) + 1) // 2)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self._word_grams.get(gram, ()))
+        best, best_rank = term, None
+        for word, count in shared.items():
+            if count < minimum:
+                continue
+            rank = (count / (len(grams) + len(word) + 1 - count), self._words[word])
+            if best_rank is None or rank > best_rank:
+                best, best_rank = word, rank
+        return best
+
+    def _fuzzy(self, query: str) -> Dict[int, float]:
+        """
+        تطابق تقریبی (خطای تایپی): دارایی‌هایی که بیشتر سه‌حرفی‌های عبارت را دارند
+
+        طبق اصل لانه‌کبوتری دارایی‌ای که دست‌کم minimum سه‌حرفی مشترک دارد حتماً در یکی از
+        (len - minimum + 1) posting کم‌تکرارتر هست؛ پس نامزدها فقط از همان‌ها جمع می‌شوند.
+        سه‌حرفی‌های بسیار پرتکرار (بیش از SEARCH_FUZZY_BUDGET) نادیده گرفته می‌شوند.
+        """
+        grams = trigrams(query)
+        if len(grams) <= FUZZY_GRAMS_PER_EDIT:
+            return {}
+        minimum = max(len(grams) - FUZZY_GRAMS_PER_EDIT, (len(grams) + 1) // 2)
+        budget = settings.SEARCH_FUZZY_BUDGET
+        results: Dict[int, float] = {}
+        for field, (_, weight) in enumerate(SEARCH_FIELDS):
+            lists = sorted((self._postings.get(str(field) + gram, _EMPTY) for gram in grams), key=len)
+            seeds = len(lists) - minimum + 1
+            scanned = sum(len(postings) for postings in lists[:seeds])
+            if not scanned or scanned > budget:
+                continue
+            budget -= scanned
+            counts = Counter()
+            for postings in lists[:seeds]:
+                counts.update(postings)
+            for postings in lists[seeds:]:
+                if len(postings) > 32 * len(counts):
+                    counts.update(asset_id for asset_id in list(counts) if self._contains(postings, asset_id))
+                else:
+                    counts.update(counts.keys() & postings)
+            for asset_id, shared in counts.items():
+                if shared >= minimum:
+                    # همیشه کمتر از CONTAINS با کم‌وزن‌ترین فیلد
+                    score = CONTAINS * weight / TIERS[0][0] * shared / (len(grams) + 1)
+                    results[asset_id] = max(results.get(asset_id, 0.0), score)
+        return results
+
+    def _rank(self, query: str, terms: List[str], limit: int) -> Dict[int, float]:
+        if len(terms) == 1:
+            return self._rank_term(query, limit)
+        return self._rank_terms(query, terms, limit)
+
+    def search(self, db: Session, q: str, limit: int) -> List[Tuple[int, float]]:
+        """
+        جستجوی دارایی‌ها؛ خروجی (asset_id, score) به ترتیب مرتبط بودن
+        """
+        self.ensure_fresh(db)
+        query = normalize(q)
+        terms = query.split()
+        if not any(len(term) >= 3 for term in terms):
+            return []
+
+        with self._lock:
+            results = self._rank(query, terms, limit)
+            if not results:
+                # اصلاح خطای تایپی با واژگان، سپس تطابق تقریبی روی postingها (شماره‌ها و سریال‌ها)
+                corrected = [self._correct(term) for term in terms]
+                if corrected != terms:
+                    scale = CONTAINS / (TIERS[0][0] * len(terms) + 1)
+                    results = {
+                        asset_id: score * scale
+                        for asset_id, score in self._rank(" ".join(corrected), corrected, limit).items()
+                    }
+            if not results:
+                results = self._fuzzy(query)
+
+        ranked = sorted(results.items(), key=lambda item: (-item[1], item[0]))
+        return ranked[:limit]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "documents": len(self._documents),
+                "keys": len(self._postings),
+                "words": len(self._words),
+                "postings": sum(len(postings) for postings in self._postings.values()),
+                "watermark": self._watermark,
+            }
+
+search_index = AssetSearchIndex()
+
+def warm_up_search_index():
+    """
+    ساخت ایندکس در نخ پس‌زمینه هنگام شروع سرور تا اولین جستجو منتظر نماند
+    """
+    def build():
+        db = SessionLocal()
+        try:
+            search_index.ensure_fresh(db)
+        except Exception:
+            logger.exception("ساخت ایندکس جستجو ناموفق بود")
+        finally:
+            db.close()
+
+    threading.Thread(target=build, name="search-index-warmup", daemon=True).start()
@@ -0,0 +1,233 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .database import SessionLocal
+from .models import Asset, AssetStatistic, AssetStatus, Department, DepartmentClosure, User
+
+logger = logging.getLogger(__name__)
+
+# ============ شمارنده‌های افزایشی آمار دارایی ============
+
+# کلید آماری یک دارایی: (department_id, status, purchase_price)
+StatKey = Tuple[Optional[int], str, float]
+
+def stat_key(asset) -> Optional[StatKey]:
+    """
+    استخراج کلید آماری از یک شیء Asset (یا هر شیء با همان فیلدها)
+    """
+    if asset is None:
+        return None
+    status = asset.status.value if isinstance(asset.status, AssetStatus) else asset.status
+    return asset.department_id, status or AssetStatus.ACTIVE.value, asset.purchase_price or 0.0
+
+def _apply_delta(db: Session, department_id: Optional[int], status: str, count_delta: int, value_delta: float):
+    """
+    افزودن delta به ردیف شمارنده (یا ایجاد آن در صورت نبود)
+    """
+    department_condition = (
+        AssetStatistic.department_id.is_(None) if department_id is None
+        else AssetStatistic.department_id == department_id
+    )
+    statement = (
+        update(AssetStatistic)
+        .where(department_condition, AssetStatistic.status == status)
+        .values(
+            asset_count=AssetStatistic.asset_count + count_delta,
+            total_value=AssetStatistic.total_value + value_delta,
+            updated_at=datetime.utcnow(),
+        )
+    )
+    if db.execute(statement).rowcount:
+        return
+    try:
+        with db.begin_nested():
+            db.execute(insert(AssetStatistic).values(
+                department_id=department_id, status=status,
+                asset_count=count_delta, total_value=value_delta,
+            ))
+    except IntegrityError:
+        # درخواست هم‌زمان دیگری همین ردیف را ساخته است
+        db.execute(statement)
+
+def apply_asset_deltas(db: Session, changes: Iterable[Tuple[Optional[StatKey], Optional[StatKey]]]):
+    """
+    ثبت تغییرات (قبل، بعد) چند دارایی در شمارنده‌ها، در همان تراکنش نوشتن دارایی
+    """
+    deltas: Dict[Tuple[Optional[int], str], list] = defaultdict(lambda: [0, 0.0])
+    for old, new in changes:
+        if old is not None:
+            deltas[old[:2]][0] -= 1
+            deltas[old[:2]][1] -= old[2]
+        if new is not None:
+            deltas[new[:2]][0] += 1
+            deltas[new[:2]][1] += new[2]
+    for (department_id, status), (count_delta, value_delta) in deltas.items():
+        if count_delta or value_delta:
+            _apply_delta(db, department_id, status, count_delta, value_delta)
+
+def record_asset_change(db: Session, old: Optional[StatKey], new: Optional[StatKey]):
+    """
+    ثبت تغییر یک دارایی در شمارنده‌ها
+    """
+    apply_asset_deltas(db, [(old, new)])
+
+def forget_department(db: Session, department_id: int):
+    """
+    حذف ردیف‌های شمارنده‌ی یک واحد پیش از حذف خود واحد، در همان تراکنش
+
+    ردیف‌ها با رسیدن شمارش به صفر هم باقی می‌مانند و کلید خارجی department_id
+    حذف واحد را (در SQL Server) رد می‌کند. دارایی‌های واحد پیش از این با delta خود
+    به department_id=NULL رفته‌اند؛ اگر شمارشی مانده باشد همان‌جا منتقل می‌شود.
+    """
+    rows = db.execute(
+        select(AssetStatistic.status, AssetStatistic.asset_count, AssetStatistic.total_value)
+        .where(AssetStatistic.department_id == department_id)
+    ).all()
+    db.execute(delete(AssetStatistic).where(AssetStatistic.department_id == department_id))
+    for status, count, value in rows:
+        if count or value:
+            _apply_delta(db, None, status, count, value)
+
+def recompute_asset_statistics(db: Session):
+    """
+    محاسبه‌ی کامل شمارنده‌ها از جدول assets برای اصلاح هرگونه انحراف
+    """
+    aggregate = (
+        select(
+            Asset.department_id,
+            func.coalesce(Asset.status, AssetStatus.ACTIVE.value),
+            func.count(Asset.id),
+            func.coalesce(func.sum(Asset.purchase_price), 0.0),
+            func.max(func.coalesce(Asset.updated_at, Asset.created_at)),
+        )
+        .group_by(Asset.department_id, func.coalesce(Asset.status, AssetStatus.ACTIVE.value))
+    )
+    db.execute(delete(AssetStatistic))
+    db.execute(insert(AssetStatistic).from_select(
+        ["department_id", "status", "asset_count", "total_value", "updated_at"], aggregate,
+    ))
+    db.commit()
+
+# ============ خواندن آمار ============
+
+def get_summary(db: Session) -> dict:
+    """
+    آمار کلی دارایی‌ها (معادل vw_asset_statistics) از روی شمارنده‌ها
+    """
+    rows = db.execute(select(
+        AssetStatistic.department_id, AssetStatistic.status,
+        AssetStatistic.asset_count, AssetStatistic.total_value,
+    )).all()
+    by_status: Dict[str, int] = defaultdict(int)
+    departments = set()
+    total_value = 0.0
+    for department_id, status, asset_count, value in rows:
+        by_status[status] += asset_count
+        total_value += value
+        if asset_count > 0 and department_id is not None:
+            departments.add(department_id)
+    return {
+        "total_assets": sum(by_status.values()),
+        "active_assets": by_status[AssetStatus.ACTIVE.value],
+        "inactive_assets": by_status[AssetStatus.INACTIVE.value],
+        "maintenance_assets": by_status[AssetStatus.MAINTENANCE.value],
+        "retired_assets": by_status[AssetStatus.RETIRED.value],
+        "total_value": total_value,
+        "total_departments": len(departments),
+        "total_users": db.execute(select(func.count(User.id))).scalar_one(),
+    }
+
+def get_department_stats(db: Session, include_descendants: bool = False) -> list:
+    """
+    آمار دارایی هر واحد (معادل vw_department_assets) از روی شمارنده‌ها
+
+    با include_descendants آمار هر واحد شامل همه‌ی زیرواحدهایش است؛ شمارنده‌ها
+    با جدول بستار به اجداد نسبت داده و در همان پرس‌وجو جمع می‌شوند.
+    """
+    if include_descendants:
+        source = (
+            select(
+                DepartmentClosure.ancestor_id.label("department_id"),
+                AssetStatistic.status, AssetStatistic.asset_count, AssetStatistic.total_value,
+            )
+            .select_from(AssetStatistic)
+            .join(DepartmentClosure, DepartmentClosure.descendant_id == AssetStatistic.department_id)
+            .subquery()
+        )
+    else:
+        source = select(
+            AssetStatistic.department_id, AssetStatistic.status, AssetStatistic.asset_count, AssetStatistic.total_value,
+        ).subquery()
+    counters = (
+        select(
+            source.c.department_id,
+            func.sum(source.c.asset_count).label("asset_count"),
+            func.sum(source.c.total_value).label("total_value"),
+            func.sum(case(
+                (source.c.status == AssetStatus.ACTIVE.value, source.c.asset_count), else_=0,
+            )).label("active_count"),
+        )
+        .group_by(source.c.department_id)
+        .subquery()
+    )
+    rows = db.execute(
+        select(Department.id, Department.name, counters.c.asset_count, counters.c.total_value, counters.c.active_count)
+        .outerjoin(counters, counters.c.department_id == Department.id)
+        .order_by(Department.id)
+    ).all()
+    return [
+        {
+            "id": department_id,
+            "department_name": name,
+            "asset_count": asset_count or 0,
+            "department_total_value": total_value or 0.0,
+            "active_count": active_count or 0,
+        }
+        for department_id, name, asset_count, total_value, active_count in rows
+    ]
+
+# ============ اصلاح دوره‌ای ============
+
+class StatsReconciler:
+    """
+    نخ پس‌زمینه که هر STATS_RECONCILE_INTERVAL ثانیه شمارنده‌ها را از نو محاسبه می‌کند
+    """
+
+    def __init__(self, interval: int):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="stats-reconciler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            db = SessionLocal()
+            try:
+                recompute_asset_statistics(db)
+            except Exception:
+                logger.exception("محاسبه‌ی دوباره‌ی آمار دارایی ناموفق بود")
+                db.rollback()
+            finally:
+                db.close()
+
+stats_reconciler = StatsReconciler(settings.STATS_RECONCILE_INTERVAL)
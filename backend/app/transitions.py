@@ -0,0 +1,258 @@
+import logging
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import func, literal_column, or_, select, update
+from sqlalchemy.orm import Session
+
+from . import audit
+from .auth import current_user_id
+from .changefeed import asset_keys, change_feed
+from .config import settings
+from .database import SessionLocal
+from .filters import AssetFilters
+from .models import Asset, Department, Location, User
+from .schemas import BulkTransitionRequest, BulkTransitionResult
+from .stats import apply_asset_deltas, stat_key
+
+logger = logging.getLogger(__name__)
+
+# ============ جابه‌جایی و واگذاری دسته‌ای دارایی‌ها ============
+#
+# مکان، مالک، واحد یا وضعیت مجموعه‌ای از دارایی‌ها در دسته‌های BULK_CHUNK_SIZE تایی
+# تغییر می‌کند و هر دسته یک تراکنش است با:
+#   - یک UPDATE ... WHERE id IN (...) فقط برای ردیف‌هایی که واقعاً تغییر می‌کنند
+#     (مقادیر قبلی با OUTPUT deleted.* در SQL Server، در بقیه با یک SELECT پیش از آن)
+#   - یک executemany برای ردیف‌های asset_histories
+#   - delta های شمارنده‌های آمار به تفکیک (واحد، وضعیت)
+# و پس از commit یک رویداد update برای هر دارایی در جریان تغییرات.
+# پس اجرای دوباره‌ی همان درخواست پس از قطع شدن فقط ردیف‌های باقی‌مانده را تغییر می‌دهد.
+#
+# تا BULK_TRANSITION_INLINE_LIMIT دارایی در همان درخواست اجرا می‌شود و بیشتر از آن در
+# نخ پس‌زمینه؛ وضعیت کار در حافظه‌ی همان worker نگه داشته می‌شود.
+
+TARGET_FIELDS = ("location_id", "owner_id", "department_id", "status")
+# مقادیر قبلی این ستون‌ها برای تاریخچه، کلید آماری و رویدادهای جریان تغییرات لازم است
+PREVIOUS_FIELDS = ("location_id", "owner_id", "department_id", "status", "purchase_price", "asset_type", "version")
+
+_REFERENCES = {
+    "location_id": (Location, "مکان دارایی یافت نشد"),
+    "owner_id": (User, "کاربر یافت نشد"),
+    "department_id": (Department, "واحد سازمانی یافت نشد"),
+}
+
+def prepare_transition(db: Session, request: BulkTransitionRequest) -> Tuple[Dict[str, Any], int]:
+    """
+    اعتبارسنجی درخواست؛ (تغییرات، تعداد دارایی‌های انتخاب‌شده) برمی‌گردد
+    """
+    changes = request.dict(include=set(TARGET_FIELDS), exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="حداقل یکی از location_id، owner_id، department_id یا status لازم است")
+    if "status" in changes and not changes["status"]:
+        raise HTTPException(status_code=400, detail="status نمی‌تواند خالی باشد")
+    if (request.asset_ids is None) == (request.filters is None):
+        raise HTTPException(status_code=400, detail="دقیقاً یکی از asset_ids یا filters لازم است")
+    if request.asset_ids is not None and len(request.asset_ids) > settings.BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"حداکثر {settings.BULK_MAX_ROWS} دارایی در هر درخواست مجاز است")
+
+    for field, (model, detail) in _REFERENCES.items():
+        if changes.get(field) is not None and db.execute(select(model.id).where(model.id == changes[field])).first() is None:
+            raise HTTPException(status_code=400, detail=detail)
+
+    if request.asset_ids is not None:
+        return changes, len(set(request.asset_ids))
+    conditions = AssetFilters(**request.filters.dict()).conditions()
+    return changes, db.execute(select(func.count(Asset.id)).where(*conditions)).scalar()
+
+def _chunks(db: Session, request: BulkTransitionRequest) -> Iterator[List[int]]:
+    size = settings.BULK_CHUNK_SIZE
+    if request.asset_ids is not None:
+        ids = sorted(set(request.asset_ids))
+        for start in range(0, len(ids), size):
+            yield ids[start:start + size]
+        return
+    # پیمایش keyset روی id؛ ردیف‌هایی که با همین تغییر از فیلتر خارج می‌شوند پشت سر می‌مانند
+    conditions = AssetFilters(**request.filters.dict()).conditions()
+    last_id = None
+    while True:
+        query = select(Asset.id).where(*conditions)
+        if last_id is not None:
+            query = query.where(Asset.id > last_id)
+        ids = db.execute(query.order_by(Asset.id).limit(size)).scalars().all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+def _differs(changes: Dict[str, Any]):
+    """
+    شرط «حداقل یکی از ستون‌ها با مقصد فرق دارد» با رفتار درست برای NULL
+    """
+    table = Asset.__table__
+    return or_(*(
+        table.c[field].is_not(None) if value is None else or_(table.c[field] != value, table.c[field].is_(None))
+        for field, value in changes.items()
+    ))
+
+def transition_rows(db: Session, ids: List[int], changes: Dict[str, Any], note: Optional[str]) -> Tuple[list, int]:
+    """
+    تغییر یک دسته بدون commit: UPDATE با version، تاریخچه و delta های آمار؛
+    (ردیف‌های تغییرکرده با مقادیر قبلی، تعداد ردیف‌های تاریخچه)
+    """
+    table = Asset.__table__
+    statement = (
+        update(table)
+        .where(table.c.id.in_(ids), _differs(changes))
+        .values(**changes, version=table.c.version + 1)
+    )
+    if db.get_bind().dialect.name == "mssql":
+        previous = [literal_column(f"deleted.{field}").label(field) for field in PREVIOUS_FIELDS]
+        rows = db.execute(statement.returning(table.c.id, *previous)).all()
+    else:
+        rows = db.execute(
+            select(table.c.id, *(table.c[field] for field in PREVIOUS_FIELDS))
+            .where(table.c.id.in_(ids), _differs(changes))
+            .with_for_update()
+        ).all()
+        if rows:
+            db.execute(statement)
+
+    entries = [
+        audit.make_entry(
+            row.id, audit.CHANGE_TYPES[field], getattr(row, field), value,
+            f"{field}: {note}" if note else field,
+        )
+        for row in rows
+        for field, value in changes.items()
+        if getattr(row, field) != value
+    ]
+    apply_asset_deltas(db, [
+        (stat_key(row), stat_key(SimpleNamespace(**{**row._mapping, **changes})))
+        for row in rows
+    ])
+    audit.record_bulk(db, entries)
+    return rows, len(entries)
+
+def publish_transition(rows: list, changes: Dict[str, Any]):
+    """
+    یک رویداد update برای هر دارایی تغییرکرده (پس از commit)
+    """
+    for row in rows:
+        change_feed.publish("update", {
+            "asset_id": row.id,
+            "version": row.version + 1,
+            "changes": {field: value for field, value in changes.items() if getattr(row, field) != value},
+        }, asset_keys(row, SimpleNamespace(**changes)))
+
+def _apply_chunk(db: Session, ids: List[int], changes: Dict[str, Any], note: Optional[str]) -> Tuple[int, int]:
+    """
+    تغییر یک دسته در یک تراکنش؛ (تعداد دارایی‌های تغییرکرده، تعداد ردیف‌های تاریخچه)
+    """
+    rows, history_rows = transition_rows(db, ids, changes, note)
+    db.commit()
+    publish_transition(rows, changes)
+    return len(rows), history_rows
+
+def run_transition(db: Session, request: BulkTransitionRequest, changes: Dict[str, Any], result: BulkTransitionResult,
+                   lock=None, cancelled: Optional[threading.Event] = None) -> BulkTransitionResult:
+    """
+    اجرای دسته‌به‌دسته و به‌روزرسانی پیشرفت در result (زیر lock اگر از نخ دیگری خوانده شود)
+    """
+    lock = lock or nullcontext()
+    state = "done"
+    for ids in _chunks(db, request):
+        if cancelled is not None and cancelled.is_set():
+            state = "cancelled"
+            break
+        changed, history_rows = _apply_chunk(db, ids, changes, request.note)
+        with lock:
+            result.processed += len(ids)
+            result.changed += changed
+            result.skipped += len(ids) - changed
+            result.history_rows += history_rows
+    with lock:
+        result.state = state
+        result.finished_at = datetime.utcnow()
+    logger.info("جابه‌جایی دسته‌ای %s: %d از %d دارایی تغییر کرد (%s)",
+                result.job_id or "-", result.changed, result.processed, state)
+    return result
+
+# ============ اجرای پس‌زمینه ============
+
+class TransitionJobs:
+    """
+    کارهای جابه‌جایی بزرگ، هرکدام در یک نخ با نشست پایگاه‌داده‌ی جداگانه
+
+    فقط BULK_TRANSITION_JOBS_KEPT کار آخر نگه داشته می‌شوند. با توقف سرور دسته‌ی
+    در حال اجرا تمام می‌شود و کار با وضعیت cancelled می‌ماند.
+    """
+
+    def __init__(self, kept: int):
+        self.kept = kept
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, BulkTransitionResult]" = OrderedDict()
+        self._threads: Dict[str, threading.Thread] = {}
+        self._stopping = threading.Event()
+
+    def start(self, request: BulkTransitionRequest, changes: Dict[str, Any], total: int) -> BulkTransitionResult:
+        result = BulkTransitionResult(job_id=uuid.uuid4().hex, state="running", total=total, started_at=datetime.utcnow())
+        # نخ‌ها context درخواست را به ارث نمی‌برند
+        thread = threading.Thread(
+            target=self._run, args=(result, request, changes, current_user_id.get()),
+            name=f"bulk-transition-{result.job_id[:8]}", daemon=True,
+        )
+        with self._lock:
+            self._jobs[result.job_id] = result
+            self._threads[result.job_id] = thread
+            finished = [job_id for job_id in self._jobs if job_id not in self._threads]
+            for job_id in finished[:max(len(self._jobs) - self.kept, 0)]:
+                del self._jobs[job_id]
+            snapshot = result.model_copy()
+        thread.start()
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[BulkTransitionResult]:
+        with self._lock:
+            result = self._jobs.get(job_id)
+            return result.model_copy() if result else None
+
+    def stop(self, timeout: float = 30.0):
+        self._stopping.set()
+        with self._lock:
+            threads = list(self._threads.values())
+        for thread in threads:
+            thread.join(timeout=timeout)
+
+    def _run(self, result: BulkTransitionResult, request: BulkTransitionRequest, changes: Dict[str, Any], user_id: Optional[int]):
+        current_user_id.set(user_id)
+        db = SessionLocal()
+        try:
+            run_transition(db, request, changes, result, self._lock, self._stopping)
+        except Exception as e:
+            logger.exception("جابه‌جایی دسته‌ای %s ناموفق بود", result.job_id)
+            with self._lock:
+                result.state = "failed"
+                result.error = str(e)[:500]
+                result.finished_at = datetime.utcnow()
+        finally:
+            db.close()
+            with self._lock:
+                self._threads.pop(result.job_id, None)
+
+transition_jobs = TransitionJobs(settings.BULK_TRANSITION_JOBS_KEPT)
+
+def bulk_transition(db: Session, request: BulkTransitionRequest) -> BulkTransitionResult:
+    """
+    اجرای درخواست در همان نشست، یا شروع کار پس‌زمینه برای مجموعه‌های بزرگ‌تر از BULK_TRANSITION_INLINE_LIMIT
+    """
+    changes, total = prepare_transition(db, request)
+    if total > settings.BULK_TRANSITION_INLINE_LIMIT:
+        return transition_jobs.start(request, changes, total)
+    result = BulkTransitionResult(state="running", total=total, started_at=datetime.utcnow())
+    return run_transition(db, request, changes, result)
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .filters import AssetFilters
+from .models import Asset, AssetCategory, Department, Location
+
+# ============ محاسبه‌ی استهلاک و ارزش دفتری ============
+#
+# استهلاک خط مستقیم: depreciation_rate درصد سالانه از قیمت خرید است.
+#   استهلاک انباشته = min(قیمت خرید × نرخ/100 × سال‌های سپری‌شده، قیمت خرید)
+#   ارزش دفتری      = قیمت خرید − استهلاک انباشته
+# محاسبه روی آرایه‌های ستونی numpy انجام می‌شود، نه با حلقه‌ی پایتون روی ردیف‌ها.
+# numpy فقط هنگام اولین محاسبه import می‌شود تا زمان شروع سرور را زیاد نکند.
+
+DAYS_PER_YEAR = 365.25
+
+GROUP_COLUMNS = {
+    "department": (Asset.department_id, Department),
+    "category": (Asset.category_id, AssetCategory),
+    "location": (Asset.location_id, Location),
+}
+
+def _as_of(value: Optional[datetime]) -> datetime:
+    # تاریخ‌های پایگاه‌داده بدون منطقه‌ی زمانی (UTC) ذخیره می‌شوند
+    if value is None:
+        return datetime.utcnow()
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def load_columns(db: Session, filters: AssetFilters, group_by: Optional[str] = None, with_numbers: bool = False) -> Dict[str, Any]:
+    """
+    خواندن ستون‌های لازم دارایی‌های فیلترشده به‌صورت آرایه‌های numpy
+
+    آرایه‌ها به اندازه‌ی شمارش اولیه از پیش ساخته و دسته‌به‌دسته (EXPORT_BATCH_SIZE ردیف)
+    پر می‌شوند، پس در هر لحظه فقط یک دسته ردیف پایتونی در حافظه است.
+    """
+    import numpy as np
+
+    conditions = filters.conditions()
+    columns = [Asset.id, Asset.purchase_date, Asset.purchase_price, Asset.depreciation_rate]
+    dtypes = {"id": np.int64, "purchase_date": "datetime64[s]", "purchase_price": np.float64, "depreciation_rate": np.float64}
+    if group_by:
+        columns.append(GROUP_COLUMNS[group_by][0])
+        dtypes["group"] = np.int64
+    if with_numbers:
+        columns.append(Asset.asset_number)
+        dtypes["asset_number"] = object
+
+    count = db.execute(select(func.count(Asset.id)).where(*conditions)).scalar()
+    data = {name: np.empty(count, dtype=dtype) for name, dtype in dtypes.items()}
+    statement = (
+        select(*columns)
+        .where(*conditions)
+        .order_by(Asset.id)
+        .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+    )
+    filled = 0
+    for partition in db.execute(statement).partitions():
+        end = filled + len(partition)
+        if end > len(data["id"]):
+            # ردیف‌هایی که پس از شمارش اضافه شده‌اند
+            data = {name: np.concatenate([array, np.empty(end - len(array), dtype=array.dtype)]) for name, array in data.items()}
+        values = list(zip(*partition))
+        data["id"][filled:end] = values[0]
+        # NULL در تاریخ به NaT و در اعداد به NaN تبدیل می‌شود
+        data["purchase_date"][filled:end] = np.array([value or "NaT" for value in values[1]], dtype="datetime64[s]")
+        data["purchase_price"][filled:end] = np.array(values[2], dtype=np.float64)
+        data["depreciation_rate"][filled:end] = np.array(values[3], dtype=np.float64)
+        if group_by:
+            data["group"][filled:end] = [-1 if value is None else value for value in values[4]]
+        if with_numbers:
+            data["asset_number"][filled:end] = values[-1]
+        filled = end
+    # ردیف‌هایی که پس از شمارش حذف شده‌اند
+    return {name: array[:filled] for name, array in data.items()}
+
+def compute_valuation(purchase_date, purchase_price, depreciation_rate, as_of: datetime) -> Dict[str, Any]:
+    """
+    محاسبه‌ی برداری ارزش دفتری برای آرایه‌های هم‌طول
+
+    دارایی‌هایی که بعد از as_of خریده شده‌اند در mask «held» نیستند. دارایی بدون
+    تاریخ خرید مستهلک نمی‌شود و بدون قیمت ارزش صفر دارد.
+    """
+    import numpy as np
+
+    price = np.nan_to_num(purchase_price, nan=0.0)
+    rate = np.nan_to_num(depreciation_rate, nan=0.0)
+    as_of_value = np.datetime64(as_of, "s")
+    dated = ~np.isnat(purchase_date)
+    held = ~dated | (purchase_date <= as_of_value)
+
+    elapsed = np.where(dated, (as_of_value - purchase_date) / np.timedelta64(1, "D"), 0.0)
+    years = np.clip(elapsed, 0.0, None) / DAYS_PER_YEAR
+    accumulated = np.minimum(price * (rate / 100.0) * years, price)
+    return {
+        "held": held,
+        "purchase_value": price,
+        "accumulated_depreciation": accumulated,
+        "book_value": price - accumulated,
+        "fully_depreciated": (price > 0) & (accumulated >= price),
+    }
+
+def _totals(result: Dict[str, Any], mask) -> Dict[str, Any]:
+    return {
+        "asset_count": int(mask.sum()),
+        "purchase_value": float(result["purchase_value"][mask].sum()),
+        "accumulated_depreciation": float(result["accumulated_depreciation"][mask].sum()),
+        "book_value": float(result["book_value"][mask].sum()),
+        "fully_depreciated_count": int(result["fully_depreciated"][mask].sum()),
+    }
+
+def roll_up(result: Dict[str, Any], groups) -> List[Dict[str, Any]]:
+    """
+    جمع گروهی با np.unique و np.bincount (بدون حلقه روی ردیف‌ها)
+    """
+    import numpy as np
+
+    held = result["held"]
+    keys, inverse = np.unique(groups[held], return_inverse=True)
+    count = len(keys)
+
+    def total(name):
+        return np.bincount(inverse, weights=result[name][held], minlength=count)
+
+    purchase_value = total("purchase_value")
+    accumulated = total("accumulated_depreciation")
+    book_value = total("book_value")
+    asset_count = np.bincount(inverse, minlength=count)
+    fully = np.bincount(inverse, weights=result["fully_depreciated"][held].astype(np.float64), minlength=count)
+    return [
+        {
+            "key": None if keys[index] == -1 else int(keys[index]),
+            "asset_count": int(asset_count[index]),
+            "purchase_value": float(purchase_value[index]),
+            "accumulated_depreciation": float(accumulated[index]),
+            "book_value": float(book_value[index]),
+            "fully_depreciated_count": int(fully[index]),
+        }
+        for index in range(count)
+    ]
+
+def asset_valuation(db: Session, filters: AssetFilters, as_of: Optional[datetime], group_by: Optional[str]) -> Dict[str, Any]:
+    """
+    ارزش‌گذاری دارایی‌های فیلترشده در تاریخ as_of همراه با جمع گروهی
+    """
+    as_of = _as_of(as_of)
+    data = load_columns(db, filters, group_by)
+    result = compute_valuation(data["purchase_date"], data["purchase_price"], data["depreciation_rate"], as_of)
+    response = {
+        "as_of": as_of,
+        "group_by": group_by,
+        "totals": _totals(result, result["held"]),
+        "groups": [],
+    }
+    if group_by:
+        groups = roll_up(result, data["group"])
+        model = GROUP_COLUMNS[group_by][1]
+        names = dict(db.execute(select(model.id, model.name).where(model.id.in_([g["key"] for g in groups if g["key"] is not None]))).all())
+        for group in groups:
+            group["name"] = names.get(group["key"])
+        response["groups"] = groups
+    return response
+
+def valuation_rows(db: Session, filters: AssetFilters, as_of: Optional[datetime]):
+    """
+    ارزش دفتری هر دارایی برای خروجی CSV
+    """
+    as_of = _as_of(as_of)
+    data = load_columns(db, filters, with_numbers=True)
+    result = compute_valuation(data["purchase_date"], data["purchase_price"], data["depreciation_rate"], as_of)
+    held = result["held"]
+    columns = zip(
+        data["id"][held].tolist(),
+        [number for number, keep in zip(data["asset_number"], held.tolist()) if keep],
+        result["purchase_value"][held].round(2).tolist(),
+        result["accumulated_depreciation"][held].round(2).tolist(),
+        result["book_value"][held].round(2).tolist(),
+        result["fully_depreciated"][held].tolist(),
+    )
+    return as_of, columns
@@ -0,0 +1,91 @@
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from fastapi import Header, HTTPException
+from sqlalchemy import literal_column, select, update
+from sqlalchemy.orm import Session
+
+# ============ کنترل هم‌زمانی خوش‌بینانه ============
+#
+# هر موجودیت قابل ویرایش ستون version دارد. ویرایش یک دستور است:
+#     UPDATE ... SET ..., version = version + 1 WHERE id = ? [AND version = ?]
+# همراه با OUTPUT inserted.* (SQL Server) یا RETURNING (بقیه)، پس ردیف به‌روزشده
+# بدون SELECT دوباره برمی‌گردد.
+#
+# نسخه‌ی مورد انتظار از هدر If-Match (مثل "3") یا فیلد version بدنه می‌آید؛
+# اگر ردیف در این فاصله تغییر کرده باشد هیچ ردیفی به‌روز نمی‌شود و پاسخ
+# 412 (If-Match) یا 409 (فیلد version) است. بدون هیچ‌کدام، آخرین نوشتن برنده است.
+
+_ENTITY_TAG = re.compile(r'^(?:W/)?"?(\d+)"?$')
+
+def if_match_version(
+    if_match: Optional[str] = Header(None, description='نسخه‌ی مورد انتظار (فیلد version)، مثل "3"'),
+) -> Optional[int]:
+    """
+    وابستگی هدر If-Match؛ "*" یعنی بدون شرط
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    match = _ENTITY_TAG.match(if_match.strip())
+    if not match:
+        raise HTTPException(status_code=412, detail="هدر If-Match باید شماره‌ی version باشد")
+    return int(match.group(1))
+
+def _conflict(db: Session, table, entity_id: int, if_match: Optional[int], not_found: str):
+    db.rollback()
+    current = db.execute(select(table.c.version).where(table.c.id == entity_id)).scalar()
+    if current is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    raise HTTPException(
+        status_code=412 if if_match is not None and current != if_match else 409,
+        detail=f"این رکورد در این فاصله ویرایش شده است؛ نسخه‌ی فعلی {current} است",
+    )
+
+def versioned_update(
+    db: Session,
+    model,
+    entity_id: int,
+    values: Dict[str, Any],
+    if_match: Optional[int] = None,
+    expected: Optional[int] = None,
+    not_found: str = "رکورد یافت نشد",
+    previous: Iterable[str] = (),
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    به‌روزرسانی یک ردیف با شرط version؛ (شیء به‌روزشده، مقادیر قبلی ستون‌های previous)
+
+    شیء برگشتی از ردیف RETURNING ساخته می‌شود و به جلسه اضافه نمی‌شود (بعد از
+    commit هم بدون بارگذاری دوباره خواندنی است). مقادیر قبلی در SQL Server از
+    OUTPUT deleted.* و در بقیه‌ی پایگاه‌ها با یک SELECT پیش از UPDATE خوانده می‌شوند.
+    """
+    table = model.__table__
+    statement = update(table).where(table.c.id == entity_id).values(**values, version=table.c.version + 1)
+    for version in (if_match, expected):
+        if version is not None:
+            statement = statement.where(table.c.version == version)
+
+    dialect = db.get_bind().dialect
+    previous = list(previous)
+    old: Dict[str, Any] = {}
+    if previous and dialect.name != "mssql":
+        row = db.execute(
+            select(*(table.c[name] for name in previous)).where(table.c.id == entity_id).with_for_update()
+        ).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail=not_found)
+        old, previous = dict(row._mapping), []
+
+    if dialect.update_returning:
+        deleted = [literal_column(f"deleted.{name}").label(f"previous_{name}") for name in previous]
+        row = db.execute(statement.returning(*table.columns, *deleted)).first()
+    else:
+        row = None
+        if db.execute(statement).rowcount:
+            row = db.execute(select(table).where(table.c.id == entity_id)).first()
+    if row is None:
+        _conflict(db, table, entity_id, if_match, not_found)
+
+    data = dict(row._mapping)
+    for name in previous:
+        old[name] = data.pop(f"previous_{name}")
+    return model(**data), old
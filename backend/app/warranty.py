@@ -0,0 +1,225 @@
+import heapq
+import logging
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from .audit import make_entry, record_bulk
+from .config import settings
+from .database import SessionLocal
+from .models import Asset
+
+logger = logging.getLogger(__name__)
+
+# ============ بازه‌ی زمانی (within=30d) ============
+
+WITHIN_PATTERN = r"^\d{1,4}[hdw]$"
+WITHIN_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+
+def parse_within(value: str) -> timedelta:
+    """
+    تبدیل بازه‌هایی مثل 12h، 30d یا 2w به timedelta
+    """
+    match = re.fullmatch(r"(\d+)([hdw])", value)
+    if not match:
+        raise HTTPException(status_code=400, detail="within نامعتبر است (مثال: 30d، 12h، 2w)")
+    return timedelta(**{WITHIN_UNITS[match.group(2)]: int(match.group(1))})
+
+def expiring_query(db: Session, start: datetime, end: datetime):
+    """
+    دارایی‌هایی که گارانتی‌شان در بازه‌ی [start, end] تمام می‌شود
+
+    شرط بازه روی ایندکس (warranty_expiry, id) اجرا می‌شود و کل جدول خوانده نمی‌شود.
+    """
+    return db.query(Asset).filter(Asset.warranty_expiry >= start, Asset.warranty_expiry <= end)
+
+# ============ زمان‌بند پایان گارانتی ============
+
+CHANGE_TYPE_WARRANTY_EXPIRED = "پایان گارانتی"
+
+class WarrantyScheduler:
+    """
+    ثبت رویداد پایان گارانتی در تاریخچه‌ی دارایی، در همان لحظه‌ی پایان
+
+    فقط دارایی‌هایی که گارانتی‌شان تا WARRANTY_HORIZON_DAYS روز آینده تمام می‌شود
+    در یک min-heap نگه داشته می‌شوند. نخ پس‌زمینه تا سررسید نزدیک‌ترین مورد
+    می‌خوابد و وقتی افق به پایان نزدیک شد فقط بازه‌ی بعدی را با ایندکس
+    warranty_expiry می‌خواند؛ هیچ‌گاه کل جدول را پیمایش نمی‌کند.
+
+    ایجاد/ویرایش/حذف دارایی heap را به‌صورت افزایشی به‌روز می‌کند (track/untrack).
+    موارد قدیمی heap حذف نمی‌شوند، بلکه هنگام بیرون آمدن با _expiries مقایسه و
+    نادیده گرفته می‌شوند.
+
+    هر worker زمان‌بند خودش را دارد؛ هر رویداد پیش از نوشتن با یک UPDATE شرطی روی
+    assets.warranty_notified «برداشته» می‌شود و در همان تراکنش ثبت می‌شود، پس فقط
+    یک worker (و پس از راه‌اندازی دوباره هیچ‌کدام) آن را دوباره ثبت نمی‌کند.
+    """
+
+    def __init__(self, horizon_days: int, catchup_days: int):
+        self.horizon = timedelta(days=horizon_days)
+        self.catchup = timedelta(days=catchup_days)
+        self._heap: List[Tuple[datetime, int]] = []
+        self._expiries: Dict[int, datetime] = {}
+        self._loaded_until: Optional[datetime] = None
+        self._stale = True
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._stale = True
+        self._thread = threading.Thread(target=self._run, name="warranty-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def track(self, asset_id: int, expiry: Optional[datetime]):
+        """
+        ثبت تاریخ پایان گارانتی یک دارایی پس از ایجاد یا ویرایش
+        """
+        with self._condition:
+            if self._thread is None or self._loaded_until is None:
+                return
+            if self._expiries.get(asset_id) == expiry:
+                return
+            self._expiries.pop(asset_id, None)
+            # موارد بیرون از افق در بارگذاری بازه‌ی بعدی خوانده می‌شوند؛
+            # تاریخ گذشته‌ای که دستی وارد شده رویداد پایان گارانتی نمی‌سازد
+            if expiry is None or expiry > self._loaded_until or expiry <= datetime.utcnow():
+                return
+            self._expiries[asset_id] = expiry
+            heapq.heappush(self._heap, (expiry, asset_id))
+            if self._heap[0] == (expiry, asset_id):
+                self._condition.notify()
+
+    def untrack(self, asset_id: int):
+        with self._condition:
+            self._expiries.pop(asset_id, None)
+
+    def mark_stale(self):
+        """
+        بارگذاری دوباره‌ی افق پس از تغییرات دسته‌ای (مثل ورود دسته‌ای)
+        """
+        with self._condition:
+            self._stale = True
+            self._condition.notify()
+
+    def _load(self, db: Session, start: datetime, end: datetime):
+        rows = db.execute(
+            select(Asset.id, Asset.warranty_expiry)
+            .where(Asset.warranty_expiry > start, Asset.warranty_expiry <= end)
+        ).all()
+        with self._condition:
+            for asset_id, expiry in rows:
+                self._expiries[asset_id] = expiry
+                heapq.heappush(self._heap, (expiry, asset_id))
+            self._loaded_until = end
+
+    def _reload(self, db: Session, now: datetime):
+        with self._condition:
+            self._heap = []
+            self._expiries = {}
+            self._stale = False
+        # موارد کمی قبل از شروع هم خوانده می‌شوند تا توقف کوتاه سرور رویدادی را جا نیندازد
+        self._load(db, now - self.catchup, now + self.horizon)
+
+    def _pop_due(self, now: datetime) -> List[Tuple[int, datetime]]:
+        due = []
+        with self._condition:
+            while self._heap and self._heap[0][0] <= now:
+                expiry, asset_id = heapq.heappop(self._heap)
+                if self._expiries.get(asset_id) == expiry:
+                    del self._expiries[asset_id]
+                    due.append((asset_id, expiry))
+        return due
+
+    def _claim(self, db: Session, due: List[Tuple[int, datetime]]) -> List[Tuple[int, datetime]]:
+        """
+        برداشتن رویدادها با UPDATE شرطی؛ فقط مواردی برمی‌گردند که این worker برداشته است
+        """
+        table = Asset.__table__
+        statement = (
+            update(table)
+            .where(
+                table.c.warranty_expiry <= max(expiry for _, expiry in due),
+                or_(table.c.warranty_notified.is_(None), table.c.warranty_notified != table.c.warranty_expiry),
+            )
+            # نشانه‌ی داخلی است؛ updated_at (و watermark جستجو) عوض نمی‌شود
+            .values(warranty_notified=table.c.warranty_expiry, updated_at=table.c.updated_at)
+        )
+        if db.get_bind().dialect.update_returning:
+            return db.execute(
+                statement.where(table.c.id.in_([asset_id for asset_id, _ in due]))
+                .returning(table.c.id, table.c.warranty_expiry)
+            ).all()
+        return [
+            (asset_id, expiry) for asset_id, expiry in due
+            if db.execute(statement.where(table.c.id == asset_id, table.c.warranty_expiry == expiry)).rowcount
+        ]
+
+    def _emit(self, db: Session, due: List[Tuple[int, datetime]]):
+        claimed = self._claim(db, due)
+        record_bulk(db, [
+            make_entry(asset_id, CHANGE_TYPE_WARRANTY_EXPIRED, None, expiry, "warranty_expiry")
+            for asset_id, expiry in claimed
+        ])
+        db.commit()
+        if claimed:
+            logger.info("پایان گارانتی %d دارایی ثبت شد", len(claimed))
+
+    def _next_wake(self, now: datetime) -> float:
+        # افق پیش از رسیدن به انتهایش (نیمه‌ی راه) جلو برده می‌شود
+        wake = self._loaded_until - self.horizon / 2
+        if self._heap:
+            wake = min(wake, self._heap[0][0])
+        return max((wake - now).total_seconds(), 0.0)
+
+    def _run(self):
+        while True:
+            now = datetime.utcnow()
+            failed = False
+            db = SessionLocal()
+            try:
+                if self._stale:
+                    self._reload(db, now)
+                elif self._loaded_until - now < self.horizon / 2:
+                    self._load(db, self._loaded_until, now + self.horizon)
+                due = self._pop_due(now)
+                for start in range(0, len(due), settings.AUDIT_MAX_BATCH):
+                    self._emit(db, due[start:start + settings.AUDIT_MAX_BATCH])
+            except Exception:
+                logger.exception("پردازش پایان گارانتی‌ها ناموفق بود")
+                failed = self._stale = True
+            finally:
+                db.close()
+
+            with self._condition:
+                if self._stopping:
+                    return
+                if failed:
+                    timeout = settings.WARRANTY_RETRY_INTERVAL
+                elif self._stale:
+                    timeout = 0.0
+                else:
+                    timeout = self._next_wake(datetime.utcnow())
+                if timeout > 0:
+                    self._condition.wait(timeout)
+                if self._stopping:
+                    return
+
+warranty_scheduler = WarrantyScheduler(settings.WARRANTY_HORIZON_DAYS, settings.WARRANTY_CATCHUP_DAYS)
@@ -0,0 +1,92 @@
+"""
+بنچمارک سریال‌سازی صفحه‌ی فهرست دارایی‌ها (مسیر عادی Pydantic در برابر FAST_JSON)
+
+اجرا از پوشه‌ی backend:
+    python -m benchmarks.bench_json --assets 20000 --limit 1000
+
+داده‌ی مصنوعی در یک پایگاه SQLite درون حافظه ساخته می‌شود. برای هر مسیر زمان
+پرس‌وجو و ساخت پاسخ (همان کاری که FastAPI برای response_model=AssetPage انجام
+می‌دهد) و اندازه‌ی بدنه گزارش می‌شود.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.crud import assets as crud
+from app.fastjson import dumps
+from app.filters import AssetFilters
+from app.models import Asset, AssetCategory, Base
+from app.schemas import AssetPage
+
+PAGE_FIELD = create_response_field(name="AssetPage", type_=AssetPage)
+
+def seed(session: Session, count: int, seed: int = 0):
+    rng = random.Random(seed)
+    session.add(AssetCategory(id=1, name="لپ‌تاپ", asset_type="Laptop"))
+    start = datetime(2015, 1, 1)
+    session.bulk_insert_mappings(Asset, [
+        {
+            "asset_number": f"AST-{index:07d}",
+            "name": f"دارایی شماره {index}",
+            "description": "توضیحات نمونه" if index % 4 else None,
+            "category_id": 1,
+            "asset_type": "Laptop",
+            "status": rng.choice(["فعال", "غیرفعال", "تعمیر"]),
+            "purchase_date": start + timedelta(seconds=rng.randrange(10 * 365 * 86400)),
+            "purchase_price": round(rng.uniform(50, 5000), 2),
+            "depreciation_rate": rng.choice([0.0, 10.0, 20.0]),
+            "serial_number": f"SN{index:09d}",
+            "model": "ThinkPad",
+            "manufacturer": "Lenovo",
+        }
+        for index in range(count)
+    ])
+    session.commit()
+
+def standard_page(session: Session, limit: int) -> bytes:
+    page = crud.list_assets(session, AssetFilters(), None, limit, "id", "asc")
+    content = asyncio.run(serialize_response(field=PAGE_FIELD, response_content=page))
+    return JSONResponse(content).body
+
+def fast_page(session: Session, limit: int) -> bytes:
+    return dumps(crud.list_asset_rows(session, AssetFilters(), None, limit, "id", "asc"))
+
+def measure(fn, repeat: int):
+    best, body = float("inf"), b""
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, body
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک سریال‌سازی فهرست دارایی‌ها")
+    parser.add_argument("--assets", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed(session, args.assets)
+        results = {}
+        for name, build in (("pydantic", standard_page), ("fast_json", fast_page)):
+            # expire_all تا هر تکرار ردیف‌ها را واقعاً از پایگاه‌داده بخواند
+            elapsed, body = measure(lambda: (session.expire_all(), build(session, args.limit))[1], args.repeat)
+            results[name] = (elapsed, body)
+            print(f"{name:10} {elapsed * 1000:8.2f} ms/page  {args.limit / elapsed:10.0f} rows/s  {len(body) / 1024:8.1f} KiB")
+    assert json.loads(results["pydantic"][1]) == json.loads(results["fast_json"][1])
+    print(f"speedup    {results['pydantic'][0] / results['fast_json'][0]:.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+بنچمارک توان ورود با رمز محلی (hash در process pool در برابر threadpool مشترک)
+
+اجرا از پوشه‌ی backend:
+    python -m benchmarks.bench_login --logins 200 --workers 4 --rounds 100000
+
+برای هر حالت تعداد ورود در ثانیه و تأخیر درخواست‌های دیگری که هم‌زمان از
+threadpool سرور استفاده می‌کنند (مثل مسیرهای sync) گزارش می‌شود.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.passwords import PasswordHasher, _hash, _verify
+
+async def other_requests(stop: asyncio.Event, latencies: list):
+    # یک «درخواست sync» سبک هر 10 میلی‌ثانیه
+    while not stop.is_set():
+        started = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        latencies.append(time.perf_counter() - started)
+        await asyncio.sleep(0.01)
+
+async def run(name: str, verify, logins: int, concurrency: int):
+    stop = asyncio.Event()
+    latencies: list = []
+    background = asyncio.create_task(other_requests(stop, latencies))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            ok, _ = await verify()
+            assert ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await background
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99) - 1] if latencies else 0.0
+    print(f"{name:14} {logins / elapsed:8.1f} logins/s   other requests p50 {statistics.median(latencies) * 1000:7.2f} ms  p99 {p99 * 1000:7.2f} ms")
+
+async def main():
+    parser = argparse.ArgumentParser(description="بنچمارک توان ورود")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rounds", type=int, default=100000)
+    args = parser.parse_args()
+
+    password = "correct horse battery staple"
+    hashed = _hash(password, args.rounds)
+    started = time.perf_counter()
+    _verify(password, hashed, args.rounds)
+    print(f"single verify: {(time.perf_counter() - started) * 1000:.1f} ms at {args.rounds} rounds")
+
+    await run("threadpool", lambda: run_in_threadpool(_verify, password, hashed, args.rounds), args.logins, args.concurrency)
+
+    hasher = PasswordHasher(args.workers, args.rounds)
+    await hasher.verify(password, hashed)  # راه‌اندازی پردازه‌ها خارج از زمان‌سنجی
+    try:
+        await run(f"process x{args.workers}", lambda: hasher.verify(password, hashed), args.logins, args.concurrency)
+    finally:
+        hasher.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+"""
+بنچمارک موتور استهلاک روی داده‌ی مصنوعی
+
+اجرا از پوشه‌ی backend:
+    python -m benchmarks.bench_valuation --assets 1000000
+"""
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+
+from app.valuation import compute_valuation, roll_up
+
+def synthetic_columns(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    start = np.datetime64("2010-01-01T00:00:00", "s")
+    seconds = rng.integers(0, 16 * 365 * 86400, count)
+    purchase_date = start + seconds.astype("timedelta64[s]")
+    # حدود ۵٪ بدون تاریخ خرید
+    purchase_date[rng.random(count) < 0.05] = np.datetime64("NaT")
+    purchase_price = rng.uniform(50, 5000, count).round(2)
+    depreciation_rate = rng.choice([0.0, 10.0, 20.0, 25.0, 33.3], count)
+    groups = rng.integers(-1, 200, count)
+    return purchase_date, purchase_price, depreciation_rate, groups
+
+def measure(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک محاسبه‌ی ارزش دفتری")
+    parser.add_argument("--assets", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    purchase_date, purchase_price, depreciation_rate, groups = synthetic_columns(args.assets)
+    as_of = datetime(2026, 1, 1)
+    result = compute_valuation(purchase_date, purchase_price, depreciation_rate, as_of)
+
+    compute = measure(lambda: compute_valuation(purchase_date, purchase_price, depreciation_rate, as_of), args.repeat)
+    rollup = measure(lambda: roll_up(result, groups), args.repeat)
+    for name, seconds in (("compute_valuation", compute), ("roll_up (200 groups)", rollup)):
+        print(f"{name:22} {seconds * 1000:8.1f} ms  {args.assets / seconds / 1e6:6.1f} M assets/s")
+
+if __name__ == "__main__":
+    main()
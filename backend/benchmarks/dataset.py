@@ -0,0 +1,325 @@
+"""
+تولید داده‌ی مصنوعی قابل تکرار برای بنچمارک‌ها (۱۰ هزار تا ۱ میلیون دارایی)
+
+اجرا از پوشه‌ی backend:
+    python -m benchmarks.dataset --size 100k
+    python -m benchmarks.dataset --assets 250000 --database-url sqlite:///benchmarks/data/custom.db
+
+با seed یکسان همان داده ساخته می‌شود (به جز تاریخ‌های گارانتی که نسبت به --reference
+پخش می‌شوند تا مسیر warranty-expiring همیشه نتیجه داشته باشد). کنار فایل SQLite یک
+manifest با تعداد ردیف‌ها و اطلاعات ورود کاربر بنچمارک نوشته می‌شود که load.py
+از آن استفاده می‌کند.
+"""
+import argparse
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import create_engine, func, insert, select
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.hierarchy import rebuild_department_closure
+from app.migrate import upgrade
+from app.models import (
+    Asset, AssetCategory, AssetHistory, AssetStatus, AssetType, Base, Department, Location, User,
+)
+from app.passwords import _hash
+from app.stats import recompute_asset_statistics
+
+from .load import BENCH_PASSWORD, BENCH_USERNAME
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+CHUNK_SIZE = 10_000
+
+# ============ توزیع‌ها ============
+
+# سهم هر نوع دارایی در یک سازمان معمولی (بیشتر رایانه‌ی کاربر، کمی زیرساخت)
+TYPE_WEIGHTS = {
+    AssetType.LAPTOP: 28,
+    AssetType.DESKTOP: 24,
+    AssetType.PHONE: 16,
+    AssetType.PRINTER: 7,
+    AssetType.ALL_IN_ONE: 6,
+    AssetType.VIRTUAL_SERVER: 5,
+    AssetType.PHYSICAL_SERVER: 3,
+    AssetType.NETWORK_SWITCH: 3,
+    AssetType.UPS: 3,
+    AssetType.ROUTER: 1,
+    AssetType.FIREWALL: 1,
+    AssetType.OTHER: 3,
+}
+
+STATUS_WEIGHTS = {
+    AssetStatus.ACTIVE: 80,
+    AssetStatus.INACTIVE: 6,
+    AssetStatus.MAINTENANCE: 5,
+    AssetStatus.RETIRED: 7,
+    AssetStatus.DAMAGED: 2,
+}
+
+# (سازنده، مدل، بازه‌ی قیمت، نرخ استهلاک سالانه)
+PRODUCTS = {
+    AssetType.LAPTOP: ([("Lenovo", "ThinkPad T14"), ("HP", "EliteBook 840"), ("Dell", "Latitude 5440"), ("ASUS", "ExpertBook B1")], (450, 1800), 25.0),
+    AssetType.DESKTOP: ([("HP", "ProDesk 400"), ("Dell", "OptiPlex 7010"), ("Lenovo", "ThinkCentre M70")], (350, 1200), 20.0),
+    AssetType.PHONE: ([("Cisco", "IP Phone 7841"), ("Yealink", "T46U"), ("Panasonic", "KX-HDV130")], (60, 300), 20.0),
+    AssetType.PRINTER: ([("HP", "LaserJet M404"), ("Canon", "i-SENSYS MF445"), ("Kyocera", "ECOSYS M2540")], (150, 900), 20.0),
+    AssetType.ALL_IN_ONE: ([("HP", "ProOne 440"), ("Lenovo", "ThinkCentre neo 50a"), ("ASUS", "Zen AiO 24")], (500, 1400), 20.0),
+    AssetType.VIRTUAL_SERVER: ([("VMware", "vSphere VM"), ("Microsoft", "Hyper-V VM")], (0, 0), 0.0),
+    AssetType.PHYSICAL_SERVER: ([("HPE", "ProLiant DL380"), ("Dell", "PowerEdge R750"), ("Lenovo", "ThinkSystem SR650")], (4000, 18000), 20.0),
+    AssetType.NETWORK_SWITCH: ([("Cisco", "Catalyst 9200"), ("HPE", "Aruba 2930F"), ("MikroTik", "CRS326")], (300, 6000), 14.3),
+    AssetType.UPS: ([("APC", "Smart-UPS 3000"), ("Eaton", "5PX 2200"), ("Faratel", "SDC 6000")], (400, 5000), 14.3),
+    AssetType.ROUTER: ([("Cisco", "ISR 4331"), ("MikroTik", "CCR2004"), ("Juniper", "MX204")], (600, 9000), 14.3),
+    AssetType.FIREWALL: ([("Fortinet", "FortiGate 100F"), ("Palo Alto", "PA-440"), ("Sophos", "XGS 2100")], (1500, 12000), 20.0),
+    AssetType.OTHER: ([("Logitech", "MeetUp"), ("Epson", "EB-X51"), ("Samsung", "Smart Monitor M7")], (100, 1500), 20.0),
+}
+
+DESCRIPTIONS = [
+    "تحویل به کارمند جدید", "نصب ویندوز ۱۱ و آنتی‌ویروس", "ارتقای حافظه‌ی رم انجام شد",
+    "دارای کیف و شارژر اضافه", "در انبار مرکزی نگه‌داری می‌شود", "قرارداد پشتیبانی سالانه دارد",
+    "تعویض باتری در سال گذشته", "برچسب اموال نصب شده است", None, None,
+]
+
+DEPARTMENT_AREAS = [
+    "فناوری اطلاعات", "مالی", "اداری", "بازرگانی", "فنی و مهندسی", "منابع انسانی",
+    "حقوقی", "پشتیبانی", "حراست", "برنامه‌ریزی", "روابط عمومی", "تدارکات",
+]
+# پیشوند نام واحد در هر عمق درخت (ریشه، معاونت، مدیریت، اداره، گروه)
+DEPARTMENT_LEVELS = ["سازمان", "معاونت", "مدیریت", "اداره‌ی", "گروه"]
+
+FIRST_NAMES = ["علی", "محمد", "حسین", "رضا", "مهدی", "زهرا", "فاطمه", "مریم", "سارا", "نرگس", "امیر", "نیلوفر", "کاوه", "پریسا", "یاسمن"]
+LAST_NAMES = ["محمدی", "حسینی", "رضایی", "احمدی", "کریمی", "موسوی", "جعفری", "صادقی", "رحیمی", "نوری", "قاسمی", "اکبری", "طاهری"]
+
+HISTORY_CHANGES = ["نقل مکان", "تعویض مالک", "تغییر وضعیت", "تغییر واحد", "تعمیر", "تغییر گارانتی"]
+
+def _weighted(rng: random.Random, weights: dict, count: int) -> list:
+    return rng.choices(list(weights), weights=list(weights.values()), k=count)
+
+def _insert_chunks(session: Session, model, rows):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        session.execute(insert(model), rows[start:start + CHUNK_SIZE])
+
+# ============ جدول‌ها ============
+
+def _departments(rng: random.Random, count: int, max_depth: int) -> List[dict]:
+    """
+    درخت تصادفی: هر واحد جدید زیر یکی از واحدهای موجود با عمق کمتر از max_depth
+    """
+    rows = [{"id": 1, "name": "سازمان مرکزی", "code": "D00001", "parent_id": None, "description": "ریشه‌ی درخت واحدها"}]
+    depth = {1: 0}
+    candidates = [1]
+    for department_id in range(2, count + 1):
+        parent_id = rng.choice(candidates)
+        depth[department_id] = depth[parent_id] + 1
+        level = DEPARTMENT_LEVELS[min(depth[department_id], len(DEPARTMENT_LEVELS) - 1)]
+        rows.append({
+            "id": department_id,
+            "name": f"{level} {rng.choice(DEPARTMENT_AREAS)} {department_id}",
+            "code": f"D{department_id:05d}",
+            "parent_id": parent_id,
+            "description": None,
+        })
+        if depth[department_id] < max_depth:
+            candidates.append(department_id)
+    return rows
+
+def _users(rng: random.Random, count: int, departments: int, local_hash: str, bench_hash: str) -> List[dict]:
+    rows = [{
+        "id": 1, "username": BENCH_USERNAME, "email": "bench@example.ir", "full_name": "کاربر بنچمارک",
+        "department_id": 1, "is_admin": True, "is_active": True, "ad_user_id": None, "hashed_password": bench_hash,
+    }]
+    for user_id in range(2, count + 1):
+        # بیشتر کاربران حساب AD دارند و بقیه حساب محلی
+        ad = rng.random() < 0.7
+        rows.append({
+            "id": user_id,
+            "username": f"user{user_id:07d}",
+            "email": f"user{user_id:07d}@example.ir",
+            "full_name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            "department_id": rng.randint(1, departments),
+            "is_admin": False,
+            "is_active": rng.random() > 0.03,
+            "ad_user_id": f"CORP\\user{user_id:07d}" if ad else None,
+            "hashed_password": None if ad else local_hash,
+        })
+    return rows
+
+def _locations(rng: random.Random, count: int) -> List[dict]:
+    rows = []
+    for location_id in range(1, count + 1):
+        building, floor = (location_id - 1) // 40 + 1, rng.randint(-1, 12)
+        rows.append({
+            "id": location_id,
+            "name": f"ساختمان {building} - طبقه {floor} - اتاق {location_id}",
+            "building": f"ساختمان {building}",
+            "floor": floor,
+            "room": f"اتاق {location_id}",
+            "description": rng.choice(["اتاق سرور", "انبار", "دفتر کار", "اتاق جلسات", None]),
+        })
+    return rows
+
+def _categories() -> Dict[AssetType, int]:
+    return {asset_type: index for index, asset_type in enumerate(AssetType, start=1)}
+
+def _assets(rng: random.Random, count: int, counts: dict, categories: Dict[AssetType, int], reference: datetime, start_id: int) -> List[dict]:
+    types = _weighted(rng, TYPE_WEIGHTS, count)
+    statuses = _weighted(rng, STATUS_WEIGHTS, count)
+    rows = []
+    for offset, (asset_type, status) in enumerate(zip(types, statuses)):
+        asset_id = start_id + offset
+        products, (low, high), rate = PRODUCTS[asset_type]
+        manufacturer, model = rng.choice(products)
+        purchase_date = reference - timedelta(days=rng.randint(0, 12 * 365), seconds=rng.randint(0, 86399))
+        user_device = asset_type in (AssetType.LAPTOP, AssetType.DESKTOP, AssetType.PHONE, AssetType.ALL_IN_ONE)
+        rows.append({
+            "id": asset_id,
+            "asset_number": f"AST-{asset_id:08d}",
+            "name": f"{asset_type.value} {manufacturer} {model}",
+            "description": rng.choice(DESCRIPTIONS),
+            "category_id": categories[asset_type],
+            "asset_type": asset_type.value,
+            "status": status.value,
+            "purchase_date": purchase_date if rng.random() > 0.04 else None,
+            "purchase_price": round(rng.uniform(low, high), 2) if high else None,
+            "depreciation_rate": rate,
+            # گارانتی‌ها حول تاریخ مرجع پخش می‌شوند: بخشی گذشته، بخشی در روزهای آینده
+            "warranty_expiry": reference + timedelta(days=rng.randint(-3 * 365, 3 * 365)) if rng.random() > 0.2 else None,
+            "owner_id": rng.randint(1, counts["users"]) if user_device and rng.random() > 0.1 else None,
+            "department_id": rng.randint(1, counts["departments"]) if rng.random() > 0.02 else None,
+            "location_id": rng.randint(1, counts["locations"]),
+            "serial_number": f"SN{manufacturer[:3].upper()}{asset_id:09d}",
+            "model": model,
+            "manufacturer": manufacturer,
+            "created_at": purchase_date,
+            "updated_at": purchase_date,
+        })
+    return rows
+
+def _histories(rng: random.Random, assets: List[dict], per_asset: float, counts: dict, reference: datetime) -> List[dict]:
+    rows = []
+    for asset in assets:
+        # تعداد تغییر هر دارایی با توزیع هندسی و میانگین per_asset
+        changes = 0
+        while rng.random() < per_asset / (per_asset + 1):
+            changes += 1
+        since = asset["created_at"] or reference - timedelta(days=365)
+        span = max(int((reference - since).total_seconds()), 1)
+        for _ in range(changes):
+            change_type = rng.choice(HISTORY_CHANGES)
+            rows.append({
+                "asset_id": asset["id"],
+                "user_id": rng.randint(1, counts["users"]) if rng.random() > 0.15 else None,
+                "change_type": change_type,
+                "old_value": str(rng.randint(1, counts["locations"])),
+                "new_value": str(rng.randint(1, counts["locations"])),
+                "description": f"{change_type} توسط واحد پشتیبانی",
+                "created_at": since + timedelta(seconds=rng.randint(0, span)),
+            })
+    return rows
+
+# ============ ساخت پایگاه‌داده ============
+
+def scale(assets: int) -> dict:
+    """
+    تعداد ردیف‌های جدول‌های دیگر متناسب با تعداد دارایی‌ها
+    """
+    return {
+        "assets": assets,
+        "departments": min(max(assets // 400, 20), 2500),
+        "users": max(assets // 3, 50),
+        "locations": min(max(assets // 150, 10), 8000),
+        "categories": len(AssetType),
+    }
+
+def generate(database_url: str, assets: int, seed: int = 0, history_per_asset: float = 3.0,
+             department_depth: int = 4, reference: Optional[datetime] = None, reset: bool = False) -> dict:
+    """
+    ساخت جدول‌ها و پر کردن آن‌ها؛ manifest داده‌ی ساخته‌شده برگردانده می‌شود
+
+    پایگاه‌داده‌ای که از قبل دارایی دارد فقط با reset=True پاک می‌شود.
+    """
+    rng = random.Random(seed)
+    reference = reference or datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    counts = scale(assets)
+    engine = create_engine(database_url)
+    if reset:
+        Base.metadata.drop_all(engine)
+    upgrade(engine)
+    with Session(engine) as session:
+        if session.execute(select(func.count(Asset.id))).scalar_one():
+            raise SystemExit(f"{engine.url.render_as_string()} خالی نیست؛ برای ساخت دوباره --reset بدهید")
+    started = time.perf_counter()
+    history_rows = 0
+    with Session(engine) as session:
+        _insert_chunks(session, Department, _departments(rng, counts["departments"], department_depth))
+        categories = _categories()
+        _insert_chunks(session, AssetCategory, [
+            {"id": category_id, "name": f"دسته‌ی {asset_type.value}", "asset_type": asset_type.value, "description": None}
+            for asset_type, category_id in categories.items()
+        ])
+        _insert_chunks(session, Location, _locations(rng, counts["locations"]))
+        rounds = settings.PASSWORD_HASH_ROUNDS
+        _insert_chunks(session, User, _users(rng, counts["users"], counts["departments"], _hash("local-password", rounds), _hash(BENCH_PASSWORD, rounds)))
+        session.commit()
+        # دارایی‌ها و تاریخچه به‌صورت تکه‌ای ساخته می‌شوند تا حافظه در ۱ میلیون ردیف محدود بماند
+        for start in range(0, assets, CHUNK_SIZE):
+            chunk = _assets(rng, min(CHUNK_SIZE, assets - start), counts, categories, reference, start + 1)
+            histories = _histories(rng, chunk, history_per_asset, counts, reference)
+            _insert_chunks(session, Asset, chunk)
+            _insert_chunks(session, AssetHistory, histories)
+            session.commit()
+            history_rows += len(histories)
+        rebuild_department_closure(session)
+        recompute_asset_statistics(session)
+    engine.dispose()
+    return {
+        "database_url": database_url,
+        "seed": seed,
+        "reference": reference.isoformat(),
+        "department_depth": department_depth,
+        "history_per_asset": history_per_asset,
+        "counts": {**counts, "histories": history_rows},
+        "username": BENCH_USERNAME,
+        "password": BENCH_PASSWORD,
+        "generated_in_seconds": round(time.perf_counter() - started, 1),
+    }
+
+def manifest_path(database_url: str) -> str:
+    """
+    مسیر manifest کنار فایل SQLite (برای پایگاه‌های دیگر در پوشه‌ی benchmarks/data)
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite" and url.database:
+        return url.database + ".json"
+    return os.path.join("benchmarks", "data", f"{url.database or 'dataset'}.json")
+
+def main():
+    parser = argparse.ArgumentParser(description="تولید داده‌ی مصنوعی بنچمارک")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--size", choices=sorted(SIZES), default="10k")
+    group.add_argument("--assets", type=int)
+    parser.add_argument("--database-url", help="پیش‌فرض: sqlite:///benchmarks/data/bench-<size>.db")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--history-per-asset", type=float, default=3.0)
+    parser.add_argument("--department-depth", type=int, default=4)
+    parser.add_argument("--reference", type=datetime.fromisoformat, help="تاریخ مرجع (پیش‌فرض: امروز)")
+    parser.add_argument("--reset", action="store_true", help="حذف و ساخت دوباره‌ی جدول‌های موجود")
+    args = parser.parse_args()
+
+    assets = args.assets or SIZES[args.size]
+    database_url = args.database_url or f"sqlite:///benchmarks/data/bench-{args.size if not args.assets else assets}.db"
+    if database_url.startswith("sqlite:///"):
+        os.makedirs(os.path.dirname(os.path.abspath(make_url(database_url).database)), exist_ok=True)
+    manifest = generate(database_url, assets, args.seed, args.history_per_asset, args.department_depth, args.reference, args.reset)
+    path = manifest_path(database_url)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    print(json.dumps(manifest["counts"]), f"in {manifest['generated_in_seconds']} s ->", path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,412 @@
+"""
+بنچمارک بار هم‌زمان روی همه‌ی routerهای main.py
+
+اجرا از پوشه‌ی backend (پس از ساخت داده با benchmarks.dataset):
+    python -m benchmarks.load --database-url sqlite:///benchmarks/data/bench-10k.db --label v1.4
+    python -m benchmarks.load --database-url sqlite:///benchmarks/data/bench-10k.db --compare benchmarks/results/<قبلی>.json
+
+بدون --url یک سرور uvicorn روی یک کپی از پایگاه SQLite اجرا می‌شود (داده‌ی اصلی بین
+اجراها تغییر نمی‌کند) و حافظه‌ی RSS پردازه‌ی سرور در هر مسیر هم اندازه‌گیری می‌شود.
+با --url سرور موجود (مثلاً روی MSSQL کانتینری) بار می‌گیرد و manifest داده با
+--manifest داده می‌شود.
+
+برای هر مسیر، --concurrency درخواست‌دهنده‌ی هم‌زمان به مدت --duration ثانیه
+درخواست می‌فرستند و p50/p95/p99، توان (درخواست در ثانیه)، خطاها و حافظه گزارش
+می‌شود. نتیجه در benchmarks/results/ ذخیره می‌شود و با --compare پسرفت نسبت به
+نتیجه‌ی قبلی (p95 یا توان بدتر از --threshold) با کد خروج 1 اعلام می‌شود.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+
+BENCH_USERNAME = "bench"
+BENCH_PASSWORD = "bench-password"
+
+# ============ مسیرها ============
+
+@dataclass
+class Context:
+    """
+    شناسه‌های قابل استفاده در ساخت درخواست‌ها (از manifest داده)
+    """
+    counts: Dict[str, int]
+    username: str = BENCH_USERNAME
+    password: str = BENCH_PASSWORD
+    created_assets: List[int] = field(default_factory=list)
+
+    def pick(self, rng: random.Random, table: str) -> int:
+        return rng.randint(1, self.counts[table])
+
+@dataclass
+class Endpoint:
+    """
+    یک مسیر بنچمارک؛ request یک (method، path، body) برای هر درخواست می‌سازد
+    """
+    name: str
+    request: Callable[[random.Random, Context], tuple]
+    # مسیرهای سنگین (خروجی کامل، ارزش‌گذاری) با هم‌زمانی کمتر اجرا می‌شوند
+    heavy: bool = False
+    # جریان SSE پایان ندارد؛ زمان تا رسیدن اولین frame (اشتراک و ارسال بافر) اندازه‌گیری می‌شود
+    stream: bool = False
+
+def _new_asset(rng: random.Random, ctx: Context) -> dict:
+    token = uuid.uuid4().hex[:12]
+    return {
+        "asset_number": f"BENCH-{token}",
+        "name": f"لپ‌تاپ بنچمارک {token}",
+        "category_id": ctx.pick(rng, "categories"),
+        "asset_type": "لپ‌تاپ",
+        "purchase_price": 950.0,
+        "department_id": ctx.pick(rng, "departments"),
+        "location_id": ctx.pick(rng, "locations"),
+        "serial_number": f"SN-BENCH-{token}",
+    }
+
+def _bulk_rows(rng: random.Random, ctx: Context, size: int = 50) -> list:
+    return [_new_asset(rng, ctx) for _ in range(size)]
+
+def _bulk_upsert_rows(rng: random.Random, ctx: Context, size: int = 50) -> list:
+    # نیمی دارایی‌های موجود (شماره‌ی AST-... از benchmarks.dataset)، نیمی جدید
+    rows = _bulk_rows(rng, ctx, size)
+    for row, asset_id in zip(rows, rng.sample(range(1, ctx.counts["assets"] + 1), min(size // 2, ctx.counts["assets"]))):
+        row["asset_number"] = f"AST-{asset_id:08d}"
+    return rows
+
+def _transition(rng: random.Random, ctx: Context, size: int = 20) -> dict:
+    return {
+        "asset_ids": rng.sample(range(1, ctx.counts["assets"] + 1), min(size, ctx.counts["assets"])),
+        "location_id": ctx.pick(rng, "locations"),
+        "note": "جابه‌جایی بنچمارک",
+    }
+
+def _created_asset(rng: random.Random, ctx: Context) -> int:
+    return ctx.created_assets.pop() if ctx.created_assets else ctx.pick(rng, "assets")
+
+ENDPOINTS = [
+    # Departments
+    Endpoint("departments.list", lambda rng, ctx: ("GET", "/api/departments/?limit=100", None)),
+    Endpoint("departments.get", lambda rng, ctx: ("GET", f"/api/departments/{ctx.pick(rng, 'departments')}", None)),
+    Endpoint("departments.update", lambda rng, ctx: ("PUT", f"/api/departments/{ctx.pick(rng, 'departments')}", {"description": "به‌روزرسانی بنچمارک"})),
+    # Users
+    Endpoint("users.login", lambda rng, ctx: ("POST", "/api/users/login", {"username": ctx.username, "password": ctx.password})),
+    Endpoint("users.list", lambda rng, ctx: ("GET", f"/api/users/?skip={rng.randint(0, max(ctx.counts['users'] - 100, 0))}&limit=100", None)),
+    Endpoint("users.get", lambda rng, ctx: ("GET", f"/api/users/{ctx.pick(rng, 'users')}", None)),
+    # Asset categories / Locations
+    Endpoint("asset_categories.list", lambda rng, ctx: ("GET", "/api/asset-categories/", None)),
+    Endpoint("asset_categories.get", lambda rng, ctx: ("GET", f"/api/asset-categories/{ctx.pick(rng, 'categories')}", None)),
+    Endpoint("locations.list", lambda rng, ctx: ("GET", "/api/locations/?limit=100", None)),
+    Endpoint("locations.get", lambda rng, ctx: ("GET", f"/api/locations/{ctx.pick(rng, 'locations')}", None)),
+    Endpoint("locations.update", lambda rng, ctx: ("PUT", f"/api/locations/{ctx.pick(rng, 'locations')}", {"description": "به‌روزرسانی بنچمارک"})),
+    # Assets
+    Endpoint("assets.list", lambda rng, ctx: ("GET", "/api/assets/?limit=100", None)),
+    Endpoint("assets.list_filtered", lambda rng, ctx: ("GET", f"/api/assets/?status={quote('فعال')}&department_id={ctx.pick(rng, 'departments')}&include_descendants=true&limit=50", None)),
+    Endpoint("assets.list_sorted", lambda rng, ctx: ("GET", "/api/assets/?sort=purchase_date&order=desc&limit=100", None)),
+    Endpoint("assets.list_expanded", lambda rng, ctx: ("GET", "/api/assets/?expand=category,owner,department,location&limit=50", None)),
+    Endpoint("assets.get", lambda rng, ctx: ("GET", f"/api/assets/{ctx.pick(rng, 'assets')}", None)),
+    Endpoint("assets.search", lambda rng, ctx: ("GET", f"/api/assets/search?q={rng.choice(['ThinkPad', 'Cisco', 'AST-0000', quote('لپ‌تاپ')])}", None)),
+    Endpoint("assets.by_department", lambda rng, ctx: ("GET", f"/api/assets/department/{ctx.pick(rng, 'departments')}?limit=100", None)),
+    Endpoint("assets.warranty_expiring", lambda rng, ctx: ("GET", "/api/assets/warranty-expiring?within=30d&limit=100", None)),
+    Endpoint("assets.valuation", lambda rng, ctx: ("GET", "/api/assets/valuation?group_by=department", None), heavy=True),
+    Endpoint("assets.export", lambda rng, ctx: ("GET", f"/api/assets/export?format=ndjson&asset_type={quote('فایروال')}", None), heavy=True),
+    Endpoint("assets.export_csv", lambda rng, ctx: ("GET", f"/api/assets/export?format=csv&asset_type={quote('فایروال')}", None), heavy=True),
+    Endpoint("assets.valuation_export", lambda rng, ctx: ("GET", f"/api/assets/valuation/export?format=csv&department_id={ctx.pick(rng, 'departments')}", None), heavy=True),
+    Endpoint("assets.create", lambda rng, ctx: ("POST", "/api/assets/", _new_asset(rng, ctx))),
+    Endpoint("assets.update", lambda rng, ctx: ("PUT", f"/api/assets/{ctx.pick(rng, 'assets')}", {"location_id": ctx.pick(rng, "locations")})),
+    Endpoint("assets.bulk", lambda rng, ctx: ("POST", "/api/assets/bulk", _bulk_rows(rng, ctx)), heavy=True),
+    Endpoint("assets.bulk_upsert", lambda rng, ctx: ("POST", "/api/assets/bulk?mode=upsert", _bulk_upsert_rows(rng, ctx)), heavy=True),
+    Endpoint("assets.bulk_transition", lambda rng, ctx: ("POST", "/api/assets/bulk-transition", _transition(rng, ctx)), heavy=True),
+    Endpoint("assets.stream", lambda rng, ctx: ("GET", f"/api/assets/stream?department_id={ctx.pick(rng, 'departments')}", None), stream=True),
+    Endpoint("assets.delete", lambda rng, ctx: ("DELETE", f"/api/assets/{_created_asset(rng, ctx)}", None)),
+    # Asset history
+    Endpoint("asset_history.list", lambda rng, ctx: ("GET", "/api/asset-history/?sort=created_at&order=desc&limit=100", None)),
+    Endpoint("asset_history.export_csv", lambda rng, ctx: ("GET", f"/api/asset-history/export?format=csv&asset_id={ctx.pick(rng, 'assets')}", None)),
+    Endpoint("asset_history.by_asset", lambda rng, ctx: ("GET", f"/api/asset-history/asset/{ctx.pick(rng, 'assets')}", None)),
+    Endpoint("asset_history.create", lambda rng, ctx: ("POST", "/api/asset-history/", {"asset_id": ctx.pick(rng, "assets"), "change_type": "تعمیر", "description": "ثبت بنچمارک"})),
+    # Stats
+    Endpoint("stats.summary", lambda rng, ctx: ("GET", "/api/stats/summary", None)),
+    Endpoint("stats.departments", lambda rng, ctx: ("GET", "/api/stats/departments?include_descendants=true", None)),
+]
+
+# ============ اندازه‌گیری ============
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """
+    صدک به روش nearest-rank
+    """
+    if not sorted_values:
+        return 0.0
+    index = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+def process_rss(pid: Optional[int]) -> Optional[int]:
+    """
+    RSS پردازه و فرزندانش (workerهای uvicorn) به بایت؛ فقط روی لینوکس
+    """
+    if pid is None:
+        return None
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f"/proc/{current}/status") as file:
+                for line in file:
+                    if line.startswith("VmRSS:"):
+                        total += int(line.split()[1]) * 1024
+            with open(f"/proc/{current}/task/{current}/children") as file:
+                pending.extend(int(child) for child in file.read().split())
+        except (OSError, ValueError):
+            continue
+    return total or None
+
+async def _sample_memory(pid: Optional[int], stop: asyncio.Event, samples: List[int]):
+    while not stop.is_set():
+        rss = process_rss(pid)
+        if rss is not None:
+            samples.append(rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.1)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: Endpoint, ctx: Context, concurrency: int,
+                       duration: float, seed: int, server_pid: Optional[int]) -> dict:
+    rng = random.Random(f"{seed}:{endpoint.name}")
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            method, path, body = endpoint.request(rng, ctx)
+            started = time.perf_counter()
+            try:
+                if endpoint.stream:
+                    async with client.stream(method, path, json=body) as response:
+                        async for _ in response.aiter_raw():
+                            break
+                else:
+                    response = await client.request(method, path, json=body)
+                    await response.aread()
+                status = str(response.status_code)
+                if endpoint.name == "assets.create" and response.status_code == 200:
+                    ctx.created_assets.append(response.json()["id"])
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            latencies.append(time.perf_counter() - started)
+            if not status.startswith("2"):
+                errors[status] = errors.get(status, 0) + 1
+
+    stop = asyncio.Event()
+    samples: List[int] = []
+    baseline = process_rss(server_pid)
+    sampler = asyncio.create_task(_sample_memory(server_pid, stop, samples))
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await sampler
+    latencies.sort()
+    megabyte = 1024 * 1024
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        "rss_peak_mb": round(max(samples) / megabyte, 1) if samples else None,
+        "rss_delta_mb": round((max(samples) - baseline) / megabyte, 1) if samples and baseline else None,
+    }
+
+# ============ سرور ============
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def _working_copy(database_url: str, directory: str) -> str:
+    """
+    کپی فایل SQLite تا نوشتن‌های بنچمارک داده‌ی اصلی را تغییر ندهند
+    """
+    prefix = "sqlite:///"
+    if not database_url.startswith(prefix):
+        return database_url
+    path = os.path.join(directory, os.path.basename(database_url[len(prefix):]))
+    shutil.copyfile(database_url[len(prefix):], path)
+    return prefix + path
+
+def start_server(database_url: str, workers: int, directory: str, timeout: float):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        DB_ECHO="false",
+        AUTH_ENABLED="true",
+        AD_ENABLED="false",
+        PYTHONUNBUFFERED="1",
+    )
+    log = open(os.path.join(directory, "server.log"), "wb")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--no-access-log"],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"سرور اجرا نشد؛ {log.name} را ببینید")
+        try:
+            if httpx.get(base_url + "/health", timeout=1).status_code == 200:
+                return process, base_url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"سرور در {timeout} ثانیه آماده نشد؛ {log.name} را ببینید")
+
+# ============ گزارش و مقایسه ============
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def print_table(results: Dict[str, dict]):
+    print(f"{'endpoint':28} {'req':>7} {'err':>5} {'rps':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'rss MB':>8}")
+    for name, result in results.items():
+        rss = "-" if result["rss_peak_mb"] is None else f"{result['rss_peak_mb']:.0f}"
+        print(f"{name:28} {result['requests']:7d} {sum(result['errors'].values()):5d} {result['throughput_rps']:9.1f} "
+              f"{result['p50_ms']:9.2f} {result['p95_ms']:9.2f} {result['p99_ms']:9.2f} {rss:>8}")
+
+def compare(current: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    مسیرهایی که p95 یا توانشان بیش از threshold (نسبی) بدتر شده است
+    """
+    regressions = []
+    print(f"\n{'endpoint':28} {'p95 before':>11} {'p95 after':>10} {'change':>8}   {'rps change':>10}")
+    for name, result in current.items():
+        before = baseline.get(name)
+        if not before or not before["p95_ms"] or not before["throughput_rps"]:
+            continue
+        p95_change = result["p95_ms"] / before["p95_ms"] - 1
+        rps_change = result["throughput_rps"] / before["throughput_rps"] - 1
+        marker = ""
+        if p95_change > threshold or rps_change < -threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(f"{name:28} {before['p95_ms']:11.2f} {result['p95_ms']:10.2f} {p95_change:+8.0%}   {rps_change:+10.0%}{marker}")
+    return regressions
+
+# ============ اجرا ============
+
+async def run(args, base_url: str, ctx: Context, server_pid: Optional[int]) -> Dict[str, dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        login = await client.post("/api/users/login", json={"username": ctx.username, "password": ctx.password})
+        login.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {login.json()['access_token']}"
+        results = {}
+        for endpoint in ENDPOINTS:
+            if args.only and not any(pattern in endpoint.name for pattern in args.only):
+                continue
+            concurrency = min(args.concurrency, args.heavy_concurrency) if endpoint.heavy else args.concurrency
+            results[endpoint.name] = await run_endpoint(client, endpoint, ctx, concurrency, args.duration, args.seed, server_pid)
+            result = results[endpoint.name]
+            print(f"  {endpoint.name:28} {result['throughput_rps']:9.1f} rps  p95 {result['p95_ms']:8.2f} ms", flush=True)
+        return results
+
+def main():
+    parser = argparse.ArgumentParser(description="بنچمارک بار هم‌زمان روی مسیرهای API")
+    parser.add_argument("--database-url", default="sqlite:///benchmarks/data/bench-10k.db")
+    parser.add_argument("--url", help="آدرس سرور در حال اجرا (بدون اجرای uvicorn)")
+    parser.add_argument("--manifest", help="پیش‌فرض: manifest کنار پایگاه SQLite")
+    parser.add_argument("--workers", type=int, default=1, help="تعداد worker های uvicorn")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--heavy-concurrency", type=int, default=2)
+    parser.add_argument("--duration", type=float, default=5.0, help="ثانیه برای هر مسیر")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--startup-timeout", type=float, default=600.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="فقط مسیرهایی که نامشان شامل این عبارت‌هاست")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--output", default=os.path.join("benchmarks", "results"))
+    parser.add_argument("--compare", help="فایل نتیجه‌ی قبلی برای تشخیص پسرفت")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    from .dataset import manifest_path
+
+    manifest = args.manifest or manifest_path(args.database_url)
+    with open(manifest, encoding="utf-8") as file:
+        data = json.load(file)
+    ctx = Context(data["counts"], data.get("username", BENCH_USERNAME), data.get("password", BENCH_PASSWORD))
+
+    with tempfile.TemporaryDirectory(prefix="asset-bench-") as directory:
+        process = None
+        base_url = args.url
+        if base_url is None:
+            database_url = _working_copy(args.database_url, directory)
+            process, base_url = start_server(database_url, args.workers, directory, args.startup_timeout)
+        try:
+            results = asyncio.run(run(args, base_url, ctx, process.pid if process else None))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "label": args.label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": args.url or args.database_url.split(":", 1)[0],
+            "counts": ctx.counts,
+            "workers": args.workers,
+            "concurrency": args.concurrency,
+            "duration": args.duration,
+        },
+        "endpoints": results,
+    }
+    os.makedirs(args.output, exist_ok=True)
+    name = f"{datetime.now():%Y%m%d-%H%M%S}-{report['meta']['git_commit'] or 'local'}{'-' + args.label if args.label else ''}.json"
+    path = os.path.join(args.output, name)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print()
+    print_table(results)
+    print(f"\nنتیجه: {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(results, json.load(file)["endpoints"], args.threshold)
+        if regressions:
+            print(f"\nپسرفت در {len(regressions)} مسیر: {', '.join(regressions)}")
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
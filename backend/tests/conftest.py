@@ -0,0 +1,130 @@
+import asyncio
+import os
+import shutil
+import tempfile
+
+# ============ محیط آزمون ============
+#
+# پیش از import برنامه: یک پایگاه SQLite موقت، بدون احراز هویت و کارهای پس‌زمینه.
+# پوشه‌ی کاری هم موقت است تا .env توسعه‌دهنده (اتصال MSSQL) خوانده نشود.
+
+WORKDIR = tempfile.mkdtemp(prefix="asset-tests-")
+os.chdir(WORKDIR)
+os.environ.update(
+    DATABASE_URL=f"sqlite:///{WORKDIR}/test.db",
+    ASYNC_DATABASE_URL=f"sqlite+aiosqlite:///{WORKDIR}/test.db",
+    DB_MODE="sync",
+    AUTH_ENABLED="false",
+    AD_ENABLED="false",
+    WARRANTY_SCHEDULER="false",
+    SEARCH_WARMUP="false",
+    STATS_RECONCILE_INTERVAL="0",
+    ARCHIVE_DIR=os.path.join(WORKDIR, "archive"),
+    PASSWORD_HASH_ROUNDS="1000",
+    PASSWORD_HASH_WORKERS="1",
+)
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app import migrate
+from app.auth import token_cache
+from app.cache import reference_cache
+from app.database import Base, SessionLocal, engine
+from app.models import SchemaVersion
+
+migrate.upgrade()
+
+def pytest_sessionfinish(session, exitstatus):
+    engine.dispose()
+    shutil.rmtree(WORKDIR, ignore_errors=True)
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """
+    خالی کردن همه‌ی جدول‌ها (به‌جز schema_version) و cacheها پیش از هر آزمون
+    """
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table is not SchemaVersion.__table__:
+                connection.execute(delete(table))
+    reference_cache.clear()
+    token_cache.clear()
+    yield
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def client():
+    from app.main import app
+
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def category(client):
+    response = client.post("/api/asset-categories/", json={"name": "لپ‌تاپ", "asset_type": "لپ‌تاپ"})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+@pytest.fixture
+def make_asset(client, category):
+    """
+    ایجاد دارایی از راه API با مقادیر پیش‌فرض
+    """
+    def make(asset_number: str, **fields):
+        body = {"asset_number": asset_number, "name": f"دارایی {asset_number}",
+                "category_id": category["id"], "asset_type": "لپ‌تاپ", **fields}
+        response = client.post("/api/assets/", json=body)
+        assert response.status_code == 200, response.text
+        return response.json()
+
+    return make
+
+def collect_frames(feed, last_event_id=None, filters=None, publish=()):
+    """
+    frameهای بافر برای یک اتصال تازه (بدون retry)، سپس frameهای زنده‌ی رویدادهای publish؛
+    (frameها، آیا جریان از طرف سرور تمام شد)
+    """
+    async def run():
+        stream = feed.stream(filters or {}, last_event_id)
+        assert (await stream.__anext__()).startswith(b"retry:")
+        frames, pending = [], None
+
+        async def drain() -> bool:
+            # wait_for روی __anext__ خود generator را لغو می‌کند؛ پس task باز نگه داشته می‌شود
+            nonlocal pending
+            while True:
+                pending = pending or asyncio.ensure_future(stream.__anext__())
+                done, _ = await asyncio.wait({pending}, timeout=0.05)
+                if not done:
+                    return False
+                task, pending = pending, None
+                try:
+                    frames.append(task.result())
+                except StopAsyncIteration:
+                    return True
+
+        if await drain():
+            return frames, True
+        for kind, payload, keys in publish:
+            feed.publish(kind, payload, keys)
+        ended = await drain()
+        if pending is not None:
+            pending.cancel()
+            await asyncio.gather(pending, return_exceptions=True)
+        await stream.aclose()
+        return frames, ended
+
+    return asyncio.run(run())
+
+@pytest.fixture
+def collect():
+    return collect_frames
@@ -0,0 +1,82 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, insert, select
+
+from app.archive import HistoryArchive, PartitionReader, archive_asset_histories
+from app.config import settings
+from app.crud import asset_history as history_crud
+from app.models import AssetHistory
+
+def _row(history_id, asset_id, created_at, **fields):
+    return {"id": history_id, "asset_id": asset_id, "user_id": None, "created_at": created_at,
+            "change_type": "تعمیر", "old_value": None, "new_value": None, "description": f"ردیف {history_id}", **fields}
+
+@pytest.fixture
+def archive(tmp_path, monkeypatch):
+    # row group های کوچک تا خواندن چند row group هم آزموده شود
+    monkeypatch.setattr(settings, "ARCHIVE_ROW_GROUP_SIZE", 3)
+    archive = HistoryArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(history_crud, "history_archive", archive)
+    return archive
+
+def test_partition_round_trip(archive):
+    moment = datetime(2023, 5, 1, 8, 30, 15, 123456)
+    rows = [_row(index, asset_id=index % 4 + 1, created_at=moment + timedelta(hours=index)) for index in range(1, 11)]
+    rows[2]["old_value"] = "قدیم"
+    rows[3]["user_id"] = 7
+    archive.add_month("2023-05", rows)
+
+    partition = archive.partitions()["2023-05"]
+    assert partition["rows"] == 10 and (partition["min_asset_id"], partition["max_asset_id"]) == (1, 4)
+    reader = PartitionReader(os.path.join(archive.directory, partition["file"]))
+    assert len(reader.row_groups) == 4
+    assert sorted(reader.all_rows(), key=lambda row: row["id"]) == rows
+    assert archive.rows_for_asset(2) == [row for row in rows if row["asset_id"] == 2]
+    assert archive.rows_for_asset(99) == []
+
+def test_adding_to_a_month_merges_by_id(archive):
+    moment = datetime(2023, 5, 1)
+    archive.add_month("2023-05", [_row(index, 1, moment) for index in (1, 2, 3)])
+    # اجرای دوباره پس از قطع شدن: ردیف‌های تکراری یک‌بار می‌مانند و نسخه‌ی تازه‌تر برنده است
+    archive.add_month("2023-05", [_row(3, 1, moment, description="تازه"), _row(4, 2, moment)])
+    rows = {row["id"]: row for row in archive.rows_for_asset(1) + archive.rows_for_asset(2)}
+    assert sorted(rows) == [1, 2, 3, 4]
+    assert rows[3]["description"] == "تازه"
+    assert archive.partitions()["2023-05"]["rows"] == 4
+
+def test_archive_job_moves_old_rows_per_month(archive, db, make_asset):
+    asset = make_asset("H-1")
+    now = datetime.utcnow()
+    old = [now - timedelta(days=days) for days in (400, 430, 460)]
+    db.execute(insert(AssetHistory), [
+        {"asset_id": asset["id"], "change_type": "تعمیر", "description": f"قدیمی {index}", "created_at": moment}
+        for index, moment in enumerate(old)
+    ] + [{"asset_id": asset["id"], "change_type": "تعمیر", "description": "تازه", "created_at": now}])
+    db.commit()
+
+    archived = archive_asset_histories(db, 365, archive)
+    assert sum(archived.values()) == 3
+    assert set(archived) == {moment.strftime("%Y-%m") for moment in old}
+    remaining = db.execute(select(func.count()).select_from(AssetHistory).where(AssetHistory.created_at < now - timedelta(days=365))).scalar()
+    assert remaining == 0
+    # اجرای دوباره کاری ندارد
+    assert archive_asset_histories(db, 365, archive) == {}
+
+def test_history_route_merges_archive_without_duplicates(client, archive, db, make_asset):
+    asset = make_asset("H-2")
+    hot = client.post("/api/asset-history/", json={"asset_id": asset["id"], "change_type": "تعمیر", "description": "جاری"})
+    assert hot.status_code == 200, hot.text
+    hot = hot.json()
+    moment = datetime(2022, 1, 1)
+    # ردیفی که هم در آرشیو و هم در جدول است (آرشیو نیمه‌تمام) + ردیف فقط‌آرشیو
+    archive.add_month("2022-01", [
+        _row(1000, asset["id"], moment),
+        _row(hot["id"], asset["id"], datetime.fromisoformat(hot["created_at"]), description="جاری"),
+    ])
+    history = client.get(f"/api/asset-history/asset/{asset['id']}").json()
+    ids = [row["id"] for row in history]
+    assert sorted(ids) == sorted(set(ids))
+    assert 1000 in ids and hot["id"] in ids
+    assert [row["created_at"] for row in history] == sorted(row["created_at"] for row in history)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+from sqlalchemy import func, select
+
+from app import audit
+from app.audit import AuditWriter, make_entry
+from app.models import AssetHistory
+
+def _writes(monkeypatch):
+    threads = []
+    monkeypatch.setattr(audit, "write_entries", lambda entries: threads.append((threading.current_thread().name, len(entries))))
+    return threads
+
+def test_without_writer_thread_entries_are_written_inline(monkeypatch):
+    threads = _writes(monkeypatch)
+    writer = AuditWriter(flush_interval=10, max_batch=100, max_queue=10)
+    writer.enqueue([make_entry(1, "تعمیر")])
+    assert threads == [(threading.current_thread().name, 1)]
+
+def test_event_loop_never_writes_inline(monkeypatch):
+    threads = _writes(monkeypatch)
+    writer = AuditWriter(flush_interval=10, max_batch=100, max_queue=10)
+
+    async def request():
+        # مثل after_commit درون run_sync روی نخ حلقه‌ی رویداد
+        writer.enqueue([make_entry(1, "تعمیر"), make_entry(2, "تعمیر")])
+        return threading.current_thread().name
+
+    loop_thread = asyncio.run(request())
+    writer.stop()
+    assert len(threads) == 1
+    assert threads[0][0] != loop_thread and threads[0][0].startswith("audit-overflow")
+
+def test_queue_overflow_on_the_loop_goes_to_the_executor(monkeypatch):
+    threads = _writes(monkeypatch)
+    writer = AuditWriter(flush_interval=10, max_batch=100, max_queue=1)
+    # نخ نویسنده «در حال اجرا» ولی صف پر
+    monkeypatch.setattr(writer, "_thread", threading.current_thread())
+
+    async def request():
+        writer.enqueue([make_entry(asset_id, "تعمیر") for asset_id in (1, 2, 3)])
+
+    asyncio.run(request())
+    monkeypatch.setattr(writer, "_thread", None)
+    writer.stop()
+    assert writer._queue.qsize() == 1
+    assert [(name.startswith("audit-overflow"), count) for name, count in threads] == [(True, 2)]
+
+def test_overflow_entries_reach_the_database(db, make_asset):
+    asset = make_asset("AU-1")
+    writer = AuditWriter(flush_interval=10, max_batch=100, max_queue=10)
+
+    async def request():
+        writer.enqueue([make_entry(asset["id"], "تعمیر", description="overflow")])
+
+    asyncio.run(request())
+    writer.stop()
+    count = db.execute(select(func.count()).where(AssetHistory.description == "overflow")).scalar()
+    assert count == 1
@@ -0,0 +1,161 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.auth import Principal, create_access_token, create_stream_token, token_cache
+from app.changefeed import change_feed
+from app.config import settings
+from app.models import User
+from app.passwords import _hash, password_hasher, set_password
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WRONG_CREDENTIALS = "نام کاربری یا رمز عبور اشتباه است"
+
+@pytest.fixture
+def auth(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_ENABLED", True)
+
+@pytest.fixture
+def user(db):
+    user = User(username="ali", email="ali@example.com", full_name="علی")
+    db.add(user)
+    db.commit()
+    return user
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+def _login_token(user):
+    return create_access_token({"sub": user.username})
+
+# ============ جریان تغییرات ============
+
+@pytest.fixture
+def stream_full(monkeypatch):
+    # 503 یعنی احراز هویت گذشته است (جریان واقعی هرگز تمام نمی‌شود)
+    monkeypatch.setattr(change_feed, "max_clients", 0)
+
+def test_stream_requires_a_token(auth, client, stream_full):
+    assert client.get("/api/assets/stream").status_code == 401
+    assert client.get("/api/assets/stream", params={"token": "garbage"}).status_code == 401
+
+def test_stream_accepts_a_query_token(auth, client, user, stream_full):
+    response = client.post("/api/assets/stream/token", headers=_bearer(_login_token(user)))
+    assert response.status_code == 200
+    body = response.json()
+    assert body["expires_in"] == settings.STREAM_TOKEN_EXPIRE_SECONDS
+
+    assert client.get("/api/assets/stream", params={"token": body["token"]}).status_code == 503
+    assert client.get("/api/assets/stream", headers=_bearer(_login_token(user))).status_code == 503
+
+def test_stream_token_is_not_a_login_token(auth, client, user, stream_full):
+    stream_token = create_stream_token(Principal(user.id, user.username, False, None))
+    assert client.get("/api/assets/stream", params={"token": stream_token}).status_code == 503
+    assert client.get("/api/locations/", headers=_bearer(stream_token)).status_code == 401
+    assert client.post("/api/assets/stream/token", headers=_bearer(stream_token)).status_code == 401
+    # و توکن ورود در ?token= پذیرفته نمی‌شود
+    assert client.get("/api/assets/stream", params={"token": _login_token(user)}).status_code == 401
+
+def test_query_token_is_ignored_elsewhere(auth, client, user):
+    stream_token = create_stream_token(Principal(user.id, user.username, False, None))
+    assert client.get("/api/locations/", params={"token": stream_token}).status_code == 401
+
+# ============ ورود و رمز حساب‌های محلی ============
+
+@pytest.fixture
+def local_user(db):
+    user = User(username="sara", email="sara@example.com", full_name="سارا",
+                hashed_password=_hash("secret", settings.PASSWORD_HASH_ROUNDS))
+    db.add(user)
+    db.commit()
+    return user
+
+@pytest.fixture
+def ad_user(db):
+    user = User(username="reza", email="reza@example.com", full_name="رضا", ad_user_id="CORP\\reza")
+    db.add(user)
+    db.commit()
+    return user
+
+def _login(client, username, password):
+    return client.post("/api/users/login", json={"username": username, "password": password})
+
+def test_local_password_login(auth, client, local_user):
+    response = _login(client, "sara", "secret")
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    assert client.get("/api/locations/", headers=_bearer(token)).status_code == 200
+
+    assert _login(client, "sara", "wrong").json() == {"detail": WRONG_CREDENTIALS}
+
+def test_failed_logins_look_the_same(auth, client, ad_user, monkeypatch):
+    verified = []
+    real_verify = password_hasher.verify
+
+    async def verify(password, hashed):
+        verified.append(hashed)
+        return await real_verify(password, hashed)
+
+    monkeypatch.setattr(password_hasher, "verify", verify)
+    unknown = _login(client, "nobody", "secret")
+    ad_disabled = _login(client, "reza", "secret")
+    assert unknown.status_code == ad_disabled.status_code == 401
+    assert unknown.json() == ad_disabled.json() == {"detail": WRONG_CREDENTIALS}
+    # حساب AD هم بررسی ساختگی می‌گیرد (زمان پاسخ برابر)
+    assert verified == [None, None]
+
+def test_password_is_rejected_for_ad_accounts(client, ad_user, monkeypatch):
+    async def no_hash(password):
+        raise AssertionError("رمز حساب AD نباید hash شود")
+
+    monkeypatch.setattr(password_hasher, "hash", no_hash)
+    created = client.post("/api/users/", json={
+        "username": "mina", "email": "mina@example.com", "full_name": "مینا",
+        "ad_user_id": "CORP\\mina", "password": "secret",
+    })
+    assert created.status_code == 400
+    updated = client.put(f"/api/users/{ad_user.id}", json={"password": "secret"})
+    assert updated.status_code == 400
+
+def test_local_account_requires_a_password(client):
+    response = client.post("/api/users/", json={"username": "mina", "email": "mina@example.com", "full_name": "مینا"})
+    assert response.status_code == 400
+
+def test_user_update_and_delete_drop_cached_tokens(auth, client, local_user, user):
+    token = _login_token(user)
+    headers = _bearer(token)
+    assert client.get("/api/locations/", headers=headers).status_code == 200
+    assert token_cache.get((None, token)).is_admin is False
+
+    assert client.put(f"/api/users/{user.id}", json={"is_admin": True}, headers=_bearer(_login_token(local_user))).status_code == 200
+    assert token_cache.get((None, token)) is None
+    assert client.get("/api/locations/", headers=headers).status_code == 200
+    assert token_cache.get((None, token)).is_admin is True
+
+    assert client.delete(f"/api/users/{user.id}", headers=_bearer(_login_token(local_user))).status_code == 200
+    assert client.get("/api/locations/", headers=headers).status_code == 401
+
+# ============ python -m app.passwords set ============
+
+def test_set_cli_makes_an_ad_account_local(auth, client, ad_user):
+    command = [sys.executable, "-m", "app.passwords", "set", "reza", "--password-stdin"]
+    env = dict(os.environ, PYTHONPATH=BACKEND)
+
+    refused = subprocess.run(command, input="secret\n", env=env, capture_output=True, text=True)
+    assert refused.returncode == 1
+    assert _login(client, "reza", "secret").status_code == 401
+
+    done = subprocess.run(command + ["--local"], input="secret\n", env=env, capture_output=True, text=True)
+    assert done.returncode == 0, done.stderr
+    assert _login(client, "reza", "secret").status_code == 200
+
+def test_set_password_invalidates_cached_tokens(auth, client, local_user):
+    token = _login_token(local_user)
+    assert client.get("/api/locations/", headers=_bearer(token)).status_code == 200
+    assert set_password("sara", "changed") == local_user.id
+    assert token_cache.get((None, token)) is None
+    assert _login(client, "sara", "changed").status_code == 200
+    with pytest.raises(LookupError):
+        set_password("nobody", "secret")
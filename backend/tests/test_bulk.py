@@ -0,0 +1,60 @@
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from app.bulk import _row_error
+
+def _row(category, asset_number, **fields):
+    return {"asset_number": asset_number, "name": f"دارایی {asset_number}",
+            "category_id": category["id"], "asset_type": "لپ‌تاپ", **fields}
+
+def _errors(result):
+    return {error["row"]: error["error"] for error in result["errors"]}
+
+def test_partial_failure_keeps_the_good_rows(client, category, make_asset):
+    make_asset("A-1", serial_number="S-1")
+    rows = [
+        _row(category, "A-2"),
+        _row(category, "A-1"),
+        _row(category, "A-3", serial_number="S-1"),
+        {"asset_number": "A-4"},
+        _row(category, "A-2"),
+        _row(category, "A-5"),
+    ]
+    result = client.post("/api/assets/bulk", json=rows).json()
+
+    assert (result["inserted"], result["updated"], result["failed"]) == (2, 0, 4)
+    errors = _errors(result)
+    assert errors[1] == "شماره دارایی A-1 تکراری است"
+    assert errors[2] == "شماره سریال S-1 تکراری است"
+    assert set(errors) == {1, 2, 3, 4}
+    # متن خطای درایور به کاربر نمی‌رسد
+    assert not any("UNIQUE" in error or "assets." in error for error in errors.values())
+
+    numbers = sorted(asset["asset_number"] for asset in client.get("/api/assets/").json()["items"])
+    assert numbers == ["A-1", "A-2", "A-5"]
+
+def test_upsert_updates_existing_and_inserts_new(client, category, make_asset):
+    existing = make_asset("A-1", name="قدیمی")
+    result = client.post("/api/assets/bulk", params={"mode": "upsert"},
+                         json=[_row(category, "A-1", name="جدید"), _row(category, "A-2")]).json()
+
+    assert (result["inserted"], result["updated"], result["failed"]) == (1, 1, 0)
+    updated = client.get(f"/api/assets/{existing['id']}").json()
+    assert updated["name"] == "جدید"
+    assert updated["version"] == existing["version"] + 1
+
+def test_upsert_conflict_names_the_other_field(client, category, make_asset):
+    make_asset("A-1", serial_number="S-1")
+    make_asset("A-2", serial_number="S-2")
+    result = client.post("/api/assets/bulk", params={"mode": "upsert"},
+                         json=[_row(category, "A-2", serial_number="S-1")]).json()
+
+    assert result["failed"] == 1
+    assert _errors(result)[0] == "شماره سریال S-1 تکراری است"
+
+def test_driver_errors_are_mapped(db):
+    data = {"asset_number": "A-1", "serial_number": None}
+    foreign_key = IntegrityError("INSERT", {}, Exception("FOREIGN KEY constraint failed"))
+    assert _row_error(db, data, foreign_key, None) == "دسته، مالک، واحد یا مکان این ردیف وجود ندارد"
+
+    other = OperationalError("INSERT", {}, Exception("database is locked"))
+    assert _row_error(db, data, other, None) == "ذخیره‌ی ردیف ناموفق بود"
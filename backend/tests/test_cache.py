@@ -0,0 +1,49 @@
+from app.cache import TTLCache, reference_cache
+
+def test_etag_and_not_modified(client):
+    client.post("/api/locations/", json={"name": "انبار"})
+    first = client.get("/api/locations/")
+    assert first.status_code == 200 and first.headers["ETag"].startswith('"')
+    etag = first.headers["ETag"]
+    again = client.get("/api/locations/", headers={"If-None-Match": etag})
+    assert again.status_code == 304 and again.content == b""
+    assert client.get("/api/locations/", headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+    assert client.get("/api/locations/", headers={"If-None-Match": '"other"'}).status_code == 200
+
+def test_writes_invalidate_the_cached_list(client):
+    location = client.post("/api/locations/", json={"name": "انبار"}).json()
+    etag = client.get("/api/locations/").headers["ETag"]
+    client.put(f"/api/locations/{location['id']}", json={"name": "انبار مرکزی"})
+    response = client.get("/api/locations/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert [item["name"] for item in response.json()] == ["انبار مرکزی"]
+
+def test_load_overlapping_an_invalidate_is_not_cached():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation("departments")
+    # نوشتنی هم‌زمان پس از خواندن کهنه باطل می‌کند
+    cache.invalidate("departments")
+    cache.set(("departments", "list"), "stale", generation=generation)
+    assert cache.get(("departments", "list")) is None
+    cache.set(("departments", "list"), "fresh", generation=cache.generation("departments"))
+    assert cache.get(("departments", "list")) == "fresh"
+    # namespace دیگر اثری ندارد
+    generation = cache.generation("locations")
+    cache.invalidate("departments")
+    cache.set(("locations", "list"), "ok", generation=generation)
+    assert cache.get(("locations", "list")) == "ok"
+
+def test_cached_response_skips_stale_load(client, monkeypatch):
+    from app.crud import locations as crud
+
+    client.post("/api/locations/", json={"name": "انبار"})
+    list_locations = crud.list_locations
+
+    def racing(db, skip, limit):
+        rows = list_locations(db, skip, limit)
+        reference_cache.invalidate("locations")
+        return rows
+
+    monkeypatch.setattr(crud, "list_locations", racing)
+    client.get("/api/locations/")
+    assert reference_cache.get(("locations", "list", 0, 100)) is None
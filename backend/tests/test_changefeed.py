@@ -0,0 +1,70 @@
+import json
+
+from app.changefeed import ChangeFeed, asset_keys, change_feed
+
+RESET = b'event: reset\ndata: {"type":"reset"}\n\n'
+
+def _ids(frames):
+    return [frame.split(b"\n", 1)[0].decode().split(".")[-1] for frame in frames if frame.startswith(b"id:")]
+
+def _publish(feed, count, department_id=None):
+    for index in range(count):
+        feed.publish("update", {"asset_id": index}, {"department_id": {department_id}} if department_id else None)
+
+def test_replay_after_last_event_id(collect):
+    feed = ChangeFeed(buffer_size=5, client_queue=10, max_clients=10)
+    _publish(feed, 3)
+    frames, _ = collect(feed, f"{feed.epoch}.1")
+    assert _ids(frames) == ["2", "3"]
+    # بدون Last-Event-ID چیزی از بافر فرستاده نمی‌شود
+    assert collect(feed)[0] == []
+
+def test_ring_buffer_overflow_sends_reset(collect):
+    feed = ChangeFeed(buffer_size=5, client_queue=10, max_clients=10)
+    _publish(feed, 8)
+    # رویدادهای 4 تا 8 در بافرند؛ ادامه از 3 ممکن است، از 2 نه
+    assert _ids(collect(feed, f"{feed.epoch}.3")[0]) == ["4", "5", "6", "7", "8"]
+    assert collect(feed, f"{feed.epoch}.2")[0] == [RESET]
+    assert collect(feed, f"{feed.epoch}.8")[0] == []
+
+def test_unknown_epoch_or_future_id_sends_reset(collect):
+    feed = ChangeFeed(buffer_size=5, client_queue=10, max_clients=10)
+    _publish(feed, 2)
+    for last_event_id in ("0.1", f"{feed.epoch}.9", f"{feed.epoch}.x", "garbage"):
+        assert collect(feed, last_event_id)[0] == [RESET]
+
+def test_replay_and_live_events_respect_filters(collect):
+    feed = ChangeFeed(buffer_size=10, client_queue=10, max_clients=10)
+    _publish(feed, 1, department_id=1)
+    _publish(feed, 1, department_id=2)
+    frames, _ = collect(
+        feed, f"{feed.epoch}.0", {"department_id": 2},
+        publish=[("delete", {"asset_id": 9}, asset_keys(type("State", (), {"department_id": 2})())),
+                 ("delete", {"asset_id": 10}, {"department_id": {1}}),
+                 ("history", {"asset_id": 11}, None)],
+    )
+    assert _ids(frames) == ["2", "3", "5"]
+    assert feed.subscriber_count == 0
+
+def test_lagging_subscriber_is_dropped_after_its_queue(collect):
+    feed = ChangeFeed(buffer_size=10, client_queue=2, max_clients=10)
+    frames, ended = collect(feed, publish=[("update", {"asset_id": index}, None) for index in range(5)])
+    assert ended and _ids(frames) == ["1", "2"]
+    assert feed.dropped == 1
+    # اتصال دوباره بقیه را از بافر می‌گیرد
+    assert _ids(collect(feed, f"{feed.epoch}.2")[0]) == ["3", "4", "5"]
+
+def test_stream_route_refuses_when_full(client, monkeypatch):
+    monkeypatch.setattr(change_feed, "max_clients", 0)
+    assert client.get("/api/assets/stream").status_code == 503
+
+def test_asset_writes_are_published(client, make_asset, collect):
+    asset = make_asset("F-1", department_id=None)
+    last_event_id = f"{change_feed.epoch}.{change_feed._seq}"
+    assert client.put(f"/api/assets/{asset['id']}", json={"name": "تازه"}).status_code == 200
+    assert client.delete(f"/api/assets/{asset['id']}").status_code == 200
+    frames, _ = collect(change_feed, last_event_id)
+    events = [json.loads(frame.split(b"data: ", 1)[1]) for frame in frames]
+    assert [event["type"] for event in events] == ["update", "delete"]
+    assert events[0]["changes"] == {"name": "تازه"} and events[0]["version"] == 2
+    assert events[1]["asset_id"] == asset["id"]
@@ -0,0 +1,40 @@
+import csv
+import io
+import json
+
+from app.config import settings
+
+def test_csv_export(client, make_asset, monkeypatch):
+    # چند دسته تا مرز دسته‌ها هم آزموده شود
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    for number in range(5):
+        make_asset(f"A-{number}", purchase_price=1000 + number, serial_number=None if number % 2 else f"S-{number}")
+
+    response = client.get("/api/assets/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="assets.csv"'
+    assert response.text.startswith("\ufeff")
+
+    rows = list(csv.DictReader(io.StringIO(response.text.lstrip("\ufeff"))))
+    assert [row["asset_number"] for row in rows] == [f"A-{number}" for number in range(5)]
+    assert rows[0]["name"] == "دارایی A-0"
+    assert rows[0]["serial_number"] == "S-0" and rows[1]["serial_number"] == ""
+    assert float(rows[4]["purchase_price"]) == 1004
+
+def test_ndjson_export_respects_filters(client, make_asset):
+    make_asset("A-1", status="فعال", purchase_date="2023-01-15T00:00:00")
+    make_asset("A-2", status="تعمیر")
+    make_asset("A-3", status="فعال")
+
+    response = client.get("/api/assets/export", params={"format": "ndjson", "status": "فعال"})
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["asset_number"] for line in lines] == ["A-1", "A-3"]
+    assert lines[0]["purchase_date"].startswith("2023-01-15")
+    assert lines[1]["purchase_date"] is None
+
+def test_empty_export(client):
+    assert client.get("/api/assets/export", params={"format": "ndjson"}).text == ""
+    header = client.get("/api/assets/export").text.lstrip("\ufeff").splitlines()
+    assert len(header) == 1 and "asset_number" in header[0]
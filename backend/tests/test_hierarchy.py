@@ -0,0 +1,59 @@
+from sqlalchemy import select
+
+from app.hierarchy import rebuild_department_closure
+from app.models import DepartmentClosure
+
+def _department(client, name, parent_id=None):
+    response = client.post("/api/departments/", json={"name": name, "code": name, "parent_id": parent_id})
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+def _closure(db):
+    return set(db.execute(select(DepartmentClosure.ancestor_id, DepartmentClosure.descendant_id, DepartmentClosure.depth)).all())
+
+def test_closure_follows_creation(client, db):
+    root = _department(client, "root")
+    child = _department(client, "child", root)
+    leaf = _department(client, "leaf", child)
+    assert _closure(db) == {
+        (root, root, 0), (child, child, 0), (leaf, leaf, 0),
+        (root, child, 1), (child, leaf, 1), (root, leaf, 2),
+    }
+
+def test_reparenting_moves_the_subtree(client, db):
+    first = _department(client, "first")
+    second = _department(client, "second")
+    child = _department(client, "child", first)
+    leaf = _department(client, "leaf", child)
+
+    response = client.put(f"/api/departments/{child}", json={"parent_id": second})
+    assert response.status_code == 200, response.text
+    closure = _closure(db)
+    assert (first, child, 1) not in closure and (first, leaf, 2) not in closure
+    assert {(second, child, 1), (second, leaf, 2), (child, leaf, 1)} <= closure
+
+    # همان نتیجه‌ی ساخت کامل از روی parent_id
+    rebuild_department_closure(db)
+    assert _closure(db) == closure
+
+def test_moving_under_a_descendant_is_rejected(client, db):
+    root = _department(client, "root")
+    child = _department(client, "child", root)
+    leaf = _department(client, "leaf", child)
+    before = _closure(db)
+
+    for parent in (root, leaf):
+        response = client.put(f"/api/departments/{root}", json={"parent_id": parent})
+        assert response.status_code == 400
+    # UPDATE والد هم برگشته است
+    assert client.get(f"/api/departments/{root}").json()["parent_id"] is None
+    assert _closure(db) == before
+
+def test_unknown_parent_is_rejected(client):
+    response = client.post("/api/departments/", json={"name": "orphan", "code": "orphan", "parent_id": 999})
+    assert response.status_code == 400
+
+def test_department_with_children_is_not_deleted(client):
+    root = _department(client, "root")
+    _department(client, "child", root)
+    assert client.delete(f"/api/departments/{root}").status_code == 400
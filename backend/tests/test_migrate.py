@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy import create_engine, func, inspect, insert, select, text
+
+from app import migrate
+from app.migrate import SCHEMA_VERSION, SchemaMismatch
+from app.models import SchemaVersion
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/schema.db")
+    yield engine
+    engine.dispose()
+
+def _versions(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count(), func.max(SchemaVersion.version))).one()
+
+def test_empty_database_gets_the_final_schema(engine):
+    assert migrate.upgrade(engine) == (0, SCHEMA_VERSION)
+    assert tuple(_versions(engine)) == (SCHEMA_VERSION, SCHEMA_VERSION)
+    assert "warranty_notified" in {column["name"] for column in inspect(engine).get_columns("assets")}
+
+    # اجرای دوباره کاری نمی‌کند
+    assert migrate.upgrade(engine) == (SCHEMA_VERSION, SCHEMA_VERSION)
+    assert tuple(_versions(engine)) == (SCHEMA_VERSION, SCHEMA_VERSION)
+
+def test_pending_migrations_are_applied(engine):
+    migrate.upgrade(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE assets DROP COLUMN warranty_notified"))
+        connection.execute(SchemaVersion.__table__.delete().where(SchemaVersion.version == SCHEMA_VERSION))
+
+    assert migrate.upgrade(engine) == (SCHEMA_VERSION - 1, SCHEMA_VERSION)
+    assert "warranty_notified" in {column["name"] for column in inspect(engine).get_columns("assets")}
+
+def test_newer_database_is_refused(engine):
+    migrate.upgrade(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(SchemaVersion).values(version=SCHEMA_VERSION + 1))
+    with pytest.raises(SchemaMismatch):
+        migrate.upgrade(engine)
+
+def test_startup_check_and_readiness(engine, client, monkeypatch):
+    migrate.check_schema_version()
+
+    # پایگاهی که migrate روی آن اجرا نشده
+    monkeypatch.setattr(migrate, "default_engine", engine)
+    monkeypatch.setattr(migrate, "_verified", False)
+    with pytest.raises(SchemaMismatch):
+        migrate.check_schema_version()
+    response = client.get("/health/ready")
+    assert response.status_code == 503
+    assert "python -m app.migrate" in response.json()["reason"]
+
+    migrate.upgrade(engine)
+    assert client.get("/health/ready").status_code == 200
+    assert migrate.schema_status() is None
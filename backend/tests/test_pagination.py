@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+
+from app.models import Asset
+from app.pagination import decode_cursor, encode_cursor
+
+def _pages(client, params):
+    """
+    همه‌ی صفحه‌ها با دنبال کردن next_cursor؛ شماره‌ی دارایی‌ها به ترتیب دریافت
+    """
+    numbers, cursor = [], None
+    while True:
+        page = client.get("/api/assets/", params={**params, **({"cursor": cursor} if cursor else {})})
+        assert page.status_code == 200, page.text
+        body = page.json()
+        numbers += [item["asset_number"] for item in body["items"]]
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return numbers
+
+@pytest.fixture
+def dated_assets(make_asset):
+    # تاریخ‌های تکراری و NULL تا شرط (sort_key, id) و جای NULL آزموده شود
+    dates = [None, "2024-03-01T00:00:00", "2024-01-01T00:00:00", None, "2024-03-01T00:00:00",
+             "2024-02-01T00:00:00", "2024-03-01T00:00:00", None]
+    return [make_asset(f"A{index}", purchase_date=date) for index, date in enumerate(dates)]
+
+def _expected(assets, descending):
+    # SQLite و MSSQL: NULL در ترتیب صعودی اول و در نزولی آخر
+    def key(asset):
+        date = asset["purchase_date"]
+        return (date is not None, date or "", asset["id"])
+    return [asset["asset_number"] for asset in sorted(assets, key=key, reverse=descending)]
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_keyset_pages_cover_every_row_once(client, dated_assets, order, limit):
+    numbers = _pages(client, {"sort": "purchase_date", "order": order, "limit": limit})
+    assert numbers == _expected(dated_assets, order == "desc")
+
+def test_id_cursor_pages(client, make_asset):
+    created = [make_asset(f"B{index}")["asset_number"] for index in range(5)]
+    assert _pages(client, {"limit": 2}) == created
+    assert _pages(client, {"limit": 2, "order": "desc"}) == created[::-1]
+
+def test_cursor_must_match_requested_order(client, make_asset):
+    for index in range(3):
+        make_asset(f"C{index}")
+    cursor = client.get("/api/assets/", params={"limit": 1}).json()["next_cursor"]
+    response = client.get("/api/assets/", params={"limit": 1, "order": "desc", "cursor": cursor})
+    assert response.status_code == 400
+
+def test_malformed_cursor_is_rejected(client):
+    assert client.get("/api/assets/", params={"cursor": "not-a-cursor"}).status_code == 400
+    forged = encode_cursor("purchase_date", "asc", "not-a-date", 1)
+    assert client.get("/api/assets/", params={"sort": "purchase_date", "cursor": forged}).status_code == 400
+
+def test_cursor_round_trips_datetimes():
+    moment = datetime(2024, 3, 1, 12, 30)
+    cursor = encode_cursor("purchase_date", "desc", moment, 7)
+    assert decode_cursor(cursor, "purchase_date", "desc", Asset.purchase_date) == (moment, 7)
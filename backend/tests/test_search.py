@@ -0,0 +1,111 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import delete, update
+
+from app.config import settings
+from app.crud import assets as asset_crud
+from app.models import Asset
+from app.search import AssetSearchIndex, normalize
+
+@pytest.fixture
+def index(monkeypatch):
+    # ایندکس تازه برای هر آزمون (ایندکس سراسری سندهای آزمون‌های قبلی را دارد)
+    fresh = AssetSearchIndex()
+    monkeypatch.setattr(asset_crud, "search_index", fresh)
+    return fresh
+
+@pytest.fixture
+def laptops(make_asset):
+    return {
+        "exact_name": make_asset("TP-001", name="ThinkPad", manufacturer="Lenovo"),
+        "name_contains": make_asset("TP-002", name="Lenovo ThinkPad X1", manufacturer="Lenovo"),
+        "maker_prefix": make_asset("TP-003", name="Latitude", manufacturer="ThinkPad Works"),
+        "unrelated": make_asset("DL-004", name="Latitude 5440", manufacturer="Dell", serial_number="SN۱۲۳۴"),
+    }
+
+def _ids(index, db, query, limit=10):
+    return [asset_id for asset_id, _ in index.search(db, query, limit)]
+
+def test_normalize_unifies_persian_and_arabic_forms():
+    assert normalize("لپ‌تاپ  ديل ۱۲۳") == normalize("لپتاپ دیل 123") == "لپتاپ دیل 123"
+    assert normalize("ThinkPad") == "thinkpad"
+
+def test_exact_beats_prefix_beats_contains(index, db, laptops):
+    ranked = index.search(db, "thinkpad", 10)
+    assert [asset_id for asset_id, _ in ranked] == [
+        laptops["exact_name"]["id"], laptops["name_contains"]["id"], laptops["maker_prefix"]["id"],
+    ]
+    scores = [score for _, score in ranked]
+    assert scores == sorted(scores, reverse=True) and len(set(scores)) == 3
+
+def test_identifier_fields_outrank_names(index, db, make_asset):
+    by_name = make_asset("X-1", name="tp-002 spare")
+    by_number = make_asset("TP-002", name="Laptop")
+    assert _ids(index, db, "tp-002") == [by_number["id"], by_name["id"]]
+
+def test_multi_word_query_needs_every_word(index, db, laptops):
+    assert _ids(index, db, "lenovo x1") == [laptops["name_contains"]["id"]]
+
+def test_persian_digits_match_latin_query(index, db, laptops):
+    assert _ids(index, db, "sn1234") == [laptops["unrelated"]["id"]]
+
+def test_typo_is_corrected_below_real_matches(index, db, laptops):
+    ranked = index.search(db, "thinkpda", 10)
+    assert ranked and ranked[0][0] == laptops["exact_name"]["id"]
+    best_exact = index.search(db, "thinkpad", 1)[0][1]
+    assert ranked[0][1] < best_exact
+
+def test_short_queries_return_nothing(index, db, laptops):
+    assert index.search(db, "tp", 10) == []
+
+def test_search_route_returns_assets_with_scores(client, index, laptops):
+    response = client.get("/api/assets/search", params={"q": "thinkpad", "limit": 2})
+    assert response.status_code == 200, response.text
+    hits = response.json()
+    assert [hit["asset_number"] for hit in hits] == ["TP-001", "TP-002"]
+    assert hits[0]["score"] > hits[1]["score"]
+
+def test_refresh_reads_late_commits_inside_the_overlap(index, db, make_asset):
+    make_asset("W-1", name="first")
+    index.refresh(db)
+    # ردیفی که زمانش کمی پیش از watermark است (تراکنشی که دیرتر commit شده)
+    late = make_asset("W-2", name="latecomer")
+    index.remove(late["id"])
+    moment = index.stats()["watermark"] - timedelta(seconds=settings.SEARCH_WATERMARK_OVERLAP / 2)
+    db.execute(update(Asset).where(Asset.id == late["id"]).values(created_at=moment, updated_at=moment))
+    db.commit()
+    assert _ids(index, db, "latecomer") == []  # هنوز تازه است؛ بدون refresh
+    index.refresh(db)
+    assert _ids(index, db, "latecomer") == [late["id"]]
+
+def test_refresh_queries_without_holding_the_index_lock(index, db, laptops, monkeypatch):
+    acquired = []
+    execute = db.execute
+
+    def probe():
+        # از نخ دیگر، مثل یک جستجوی هم‌زمان
+        if index._lock.acquire(timeout=1):
+            index._lock.release()
+            acquired.append(True)
+
+    def probing_execute(*args, **kwargs):
+        thread = threading.Thread(target=probe)
+        thread.start()
+        thread.join()
+        return execute(*args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", probing_execute)
+    index.refresh(db)
+    assert acquired == [True]
+    assert index.stats()["documents"] == len(laptops)
+
+def test_assets_deleted_elsewhere_leave_the_index(client, index, db, laptops):
+    index.refresh(db)
+    # حذف از پردازه‌ی دیگر: ایندکس این پردازه خبر ندارد
+    db.execute(delete(Asset).where(Asset.id == laptops["exact_name"]["id"]))
+    db.commit()
+    hits = client.get("/api/assets/search", params={"q": "thinkpad", "limit": 2}).json()
+    assert [hit["asset_number"] for hit in hits] == ["TP-002", "TP-003"]
+    assert index.stats()["documents"] == len(laptops) - 1
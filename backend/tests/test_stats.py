@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.changefeed import change_feed
+from app.models import AssetHistory, AssetStatistic
+from app.stats import recompute_asset_statistics
+
+def _counters(db):
+    rows = db.execute(select(
+        AssetStatistic.department_id, AssetStatistic.status, AssetStatistic.asset_count, AssetStatistic.total_value,
+    )).all()
+    # ردیف‌های صفرشده باقی می‌مانند؛ محاسبه‌ی کامل آن‌ها را ندارد
+    return {(department_id, status): (count, round(value, 2)) for department_id, status, count, value in rows if count or value}
+
+def _assert_matches_recompute(db):
+    incremental = _counters(db)
+    recompute_asset_statistics(db)
+    assert incremental == _counters(db)
+
+@pytest.fixture
+def departments(client):
+    return [client.post("/api/departments/", json={"name": name, "code": name}).json()["id"] for name in ("IT", "HR")]
+
+def test_counters_follow_create_update_delete(client, db, make_asset, departments):
+    it, hr = departments
+    first = make_asset("S-1", department_id=it, purchase_price=100)
+    second = make_asset("S-2", department_id=it, purchase_price=50, status="تعمیر")
+    make_asset("S-3", purchase_price=10)
+    _assert_matches_recompute(db)
+
+    client.put(f"/api/assets/{first['id']}", json={"department_id": hr, "purchase_price": 120})
+    client.put(f"/api/assets/{second['id']}", json={"status": "فعال"})
+    _assert_matches_recompute(db)
+
+    client.delete(f"/api/assets/{first['id']}")
+    _assert_matches_recompute(db)
+    summary = client.get("/api/stats/summary").json()
+    assert (summary["total_assets"], summary["total_value"]) == (2, 60)
+
+def test_counters_follow_bulk_writes(client, db, category, departments):
+    it, hr = departments
+    rows = [{"asset_number": f"B-{index}", "name": "n", "category_id": category["id"], "asset_type": "لپ‌تاپ",
+             "department_id": it, "purchase_price": 10 * index} for index in range(1, 6)]
+    assert client.post("/api/assets/bulk", json=rows).json()["inserted"] == 5
+    rows[0]["department_id"] = hr
+    client.post("/api/assets/bulk?mode=upsert", json=rows[:2])
+    ids = [asset["id"] for asset in client.get("/api/assets/").json()["items"]]
+    client.post("/api/assets/bulk-transition", json={"asset_ids": ids[2:], "status": "تعمیر"})
+    _assert_matches_recompute(db)
+
+def test_deleting_a_department_releases_its_assets(client, db, make_asset, departments, collect):
+    it, hr = departments
+    kept = make_asset("D-1", department_id=hr, purchase_price=5)
+    released = [make_asset(f"D-{index}", department_id=it, purchase_price=10) for index in (2, 3)]
+    last_event_id = f"{change_feed.epoch}.{change_feed._seq}"
+
+    assert client.delete(f"/api/departments/{it}").status_code == 200
+    for asset in released:
+        current = client.get(f"/api/assets/{asset['id']}").json()
+        assert (current["department_id"], current["version"]) == (None, asset["version"] + 1)
+    assert client.get(f"/api/assets/{kept['id']}").json()["version"] == kept["version"]
+
+    history = db.execute(
+        select(AssetHistory.asset_id, AssetHistory.old_value, AssetHistory.new_value)
+        .where(AssetHistory.change_type == "تغییر واحد")
+    ).all()
+    assert sorted(history) == [(asset["id"], str(it), None) for asset in released]
+
+    # مشترکی که روی همان واحد فیلتر کرده خروج دارایی‌ها را می‌بیند
+    frames, _ = collect(change_feed, last_event_id, {"department_id": it})
+    events = [json.loads(frame.split(b"data: ", 1)[1]) for frame in frames]
+    assert [(event["asset_id"], event["changes"]) for event in events] == [
+        (asset["id"], {"department_id": None}) for asset in released
+    ]
+    _assert_matches_recompute(db)
+    assert all(department_id != it for department_id, _ in _counters(db))
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pytest
+
+from app.config import settings
+from app.models import AssetHistory
+from app.transitions import transition_jobs
+
+def _location(client, name):
+    response = client.post("/api/locations/", json={"name": name})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _history_count(db, asset_id):
+    return db.query(AssetHistory).filter(AssetHistory.asset_id == asset_id).count()
+
+def test_inline_transition_changes_only_what_differs(client, db, make_asset):
+    room = _location(client, "اتاق ۱۰۱")
+    moved = [make_asset("A-1"), make_asset("A-2")]
+    already = make_asset("A-3", location_id=room["id"])
+    before = {asset["id"]: _history_count(db, asset["id"]) for asset in moved + [already]}
+
+    response = client.post("/api/assets/bulk-transition", json={
+        "asset_ids": [asset["id"] for asset in moved + [already]] + [999999],
+        "location_id": room["id"],
+        "note": "جابه‌جایی به اتاق ۱۰۱",
+    })
+    assert response.status_code == 200
+    result = response.json()
+    assert result["state"] == "done"
+    assert (result["total"], result["processed"], result["changed"], result["skipped"]) == (4, 4, 2, 2)
+
+    for asset in moved:
+        current = client.get(f"/api/assets/{asset['id']}").json()
+        assert current["location_id"] == room["id"]
+        assert current["version"] == asset["version"] + 1
+        assert _history_count(db, asset["id"]) == before[asset["id"]] + 1
+    assert client.get(f"/api/assets/{already['id']}").json()["version"] == already["version"]
+    assert _history_count(db, already["id"]) == before[already["id"]]
+    assert result["history_rows"] == 2
+
+def test_transition_by_filters(client, make_asset):
+    make_asset("A-1", status="فعال")
+    make_asset("A-2", status="فعال")
+    make_asset("A-3", status="تعمیر")
+
+    result = client.post("/api/assets/bulk-transition", json={
+        "filters": {"status": "فعال"}, "status": "بازنشسته",
+    }).json()
+    assert (result["total"], result["changed"]) == (2, 2)
+    statuses = sorted(asset["status"] for asset in client.get("/api/assets/").json()["items"])
+    assert statuses == sorted(["بازنشسته", "بازنشسته", "تعمیر"])
+
+@pytest.mark.parametrize("body", [
+    {"location_id": 1},
+    {"asset_ids": [1], "filters": {}, "status": "فعال"},
+    {"asset_ids": [1]},
+    {"asset_ids": [1], "location_id": 999999},
+])
+def test_invalid_requests_are_rejected(client, body):
+    assert client.post("/api/assets/bulk-transition", json=body).status_code == 400
+
+def test_large_transition_runs_as_a_job(client, make_asset, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_TRANSITION_INLINE_LIMIT", 1)
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    # lifespan آزمون‌های قبلی transition_jobs.stop() را صدا زده است
+    monkeypatch.setattr(transition_jobs, "_stopping", threading.Event())
+    assets = [make_asset(f"A-{number}") for number in range(5)]
+
+    response = client.post("/api/assets/bulk-transition", json={
+        "asset_ids": [asset["id"] for asset in assets], "status": "تعمیر",
+    })
+    assert response.status_code == 202
+    job = response.json()
+    assert job["state"] == "running" and job["total"] == 5
+    location = response.headers["Location"]
+    assert location == f"/api/assets/bulk-transition/{job['job_id']}"
+
+    deadline = time.monotonic() + 10
+    while job["state"] == "running" and time.monotonic() < deadline:
+        time.sleep(0.05)
+        job = client.get(location).json()
+    assert job["state"] == "done"
+    assert (job["processed"], job["changed"], job["history_rows"]) == (5, 5, 5)
+    assert job["finished_at"] is not None
+    assert all(client.get(f"/api/assets/{asset['id']}").json()["status"] == "تعمیر" for asset in assets)
+
+def test_unknown_job_is_404(client):
+    assert client.get("/api/assets/bulk-transition/missing").status_code == 404
@@ -0,0 +1,58 @@
+import csv
+import io
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.valuation import DAYS_PER_YEAR, compute_valuation
+
+AS_OF = datetime(2024, 1, 1)
+
+def _years_ago(years):
+    return AS_OF - timedelta(days=years * DAYS_PER_YEAR)
+
+def test_straight_line_depreciation():
+    dates = np.array([_years_ago(2), _years_ago(3), "NaT", AS_OF + timedelta(days=1), _years_ago(1)], dtype="datetime64[s]")
+    prices = np.array([1000.0, 1000.0, 500.0, 800.0, np.nan])
+    rates = np.array([20.0, 50.0, 10.0, 10.0, 10.0])
+    result = compute_valuation(dates, prices, rates, AS_OF)
+
+    assert result["accumulated_depreciation"] == pytest.approx([400.0, 1000.0, 0.0, 0.0, 0.0])
+    assert result["book_value"] == pytest.approx([600.0, 0.0, 500.0, 800.0, 0.0])
+    # سقف استهلاک قیمت خرید است؛ بدون قیمت «کاملاً مستهلک» شمرده نمی‌شود
+    assert result["fully_depreciated"].tolist() == [False, True, False, False, False]
+    # خرید پس از as_of در ارزش‌گذاری نیست؛ بدون تاریخ خرید هست
+    assert result["held"].tolist() == [True, True, True, False, True]
+
+def test_valuation_route_totals_and_groups(client, make_asset):
+    department = client.post("/api/departments/", json={"name": "فناوری", "code": "IT"}).json()
+    make_asset("A-1", purchase_price=1000, depreciation_rate=20, purchase_date=_years_ago(2).isoformat(), department_id=department["id"])
+    make_asset("A-2", purchase_price=2000, depreciation_rate=50, purchase_date=_years_ago(3).isoformat(), department_id=department["id"])
+    make_asset("A-3", purchase_price=500, depreciation_rate=10, purchase_date=_years_ago(1).isoformat())
+    make_asset("A-4", purchase_price=900, purchase_date=(AS_OF + timedelta(days=30)).isoformat())
+
+    body = client.get("/api/assets/valuation", params={"as_of": AS_OF.isoformat(), "group_by": "department"}).json()
+    totals = body["totals"]
+    assert totals["asset_count"] == 3
+    assert totals["purchase_value"] == pytest.approx(3500)
+    assert totals["accumulated_depreciation"] == pytest.approx(400 + 2000 + 50)
+    assert totals["book_value"] == pytest.approx(600 + 0 + 450)
+    assert totals["fully_depreciated_count"] == 1
+
+    groups = {group["key"]: group for group in body["groups"]}
+    assert set(groups) == {department["id"], None}
+    assert groups[department["id"]]["name"] == "فناوری"
+    assert groups[department["id"]]["book_value"] == pytest.approx(600)
+    assert groups[None]["asset_count"] == 1 and groups[None]["book_value"] == pytest.approx(450)
+
+def test_valuation_export(client, make_asset):
+    make_asset("A-1", purchase_price=1000, depreciation_rate=20, purchase_date=_years_ago(2).isoformat())
+    make_asset("A-2", purchase_price=700, purchase_date=(AS_OF + timedelta(days=1)).isoformat())
+
+    response = client.get("/api/assets/valuation/export", params={"as_of": AS_OF.isoformat()})
+    assert response.headers["content-disposition"] == 'attachment; filename="valuation-2024-01-01.csv"'
+    rows = list(csv.DictReader(io.StringIO(response.text.lstrip("\ufeff"))))
+    assert [row["asset_number"] for row in rows] == ["A-1"]
+    assert float(rows[0]["book_value"]) == pytest.approx(600)
+    assert float(rows[0]["accumulated_depreciation"]) == pytest.approx(400)
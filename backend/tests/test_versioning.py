@@ -0,0 +1,38 @@
+def test_if_match_and_body_version(client, make_asset):
+    asset = make_asset("V-1")
+    assert asset["version"] == 1
+
+    updated = client.put(f"/api/assets/{asset['id']}", json={"name": "اول"}, headers={"If-Match": '"1"'})
+    assert updated.status_code == 200, updated.text
+    assert updated.json()["version"] == 2
+
+    # نسخه‌ی کهنه در هدر: 412، در بدنه: 409؛ هیچ‌کدام چیزی نمی‌نویسند
+    stale_header = client.put(f"/api/assets/{asset['id']}", json={"name": "دوم"}, headers={"If-Match": '"1"'})
+    assert stale_header.status_code == 412
+    stale_body = client.put(f"/api/assets/{asset['id']}", json={"name": "سوم", "version": 1})
+    assert stale_body.status_code == 409
+    current = client.get(f"/api/assets/{asset['id']}").json()
+    assert (current["name"], current["version"]) == ("اول", 2)
+
+def test_unconditional_update_still_bumps_version(client, make_asset):
+    asset = make_asset("V-2")
+    for expected in (2, 3):
+        response = client.put(f"/api/assets/{asset['id']}", json={"location_id": None}, headers={"If-Match": "*"})
+        assert response.json()["version"] == expected
+    assert client.put(f"/api/assets/{asset['id']}", json={"name": "x", "version": 3}).status_code == 200
+
+def test_weak_entity_tag_is_accepted(client, make_asset):
+    asset = make_asset("V-3")
+    assert client.put(f"/api/assets/{asset['id']}", json={"name": "x"}, headers={"If-Match": 'W/"1"'}).status_code == 200
+
+def test_malformed_if_match_is_rejected(client, make_asset):
+    asset = make_asset("V-4")
+    assert client.put(f"/api/assets/{asset['id']}", json={"name": "x"}, headers={"If-Match": "abc"}).status_code == 412
+
+def test_missing_row_is_404_not_a_conflict(client):
+    assert client.put("/api/assets/999", json={"name": "x"}, headers={"If-Match": '"1"'}).status_code == 404
+
+def test_department_versions(client):
+    department = client.post("/api/departments/", json={"name": "IT", "code": "IT"}).json()
+    assert client.put(f"/api/departments/{department['id']}", json={"description": "a", "version": 1}).status_code == 200
+    assert client.put(f"/api/departments/{department['id']}", json={"description": "b", "version": 1}).status_code == 409
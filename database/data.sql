@@ -20,6 +20,13 @@ INSERT INTO asset_histories (asset_id, user_id, change_type, old_value, new_valu
 (8, 2, N'ایجاد دارایی', N'', N'پرینتر Color', N'پرینتر جدید نصب شد'),
 (6, 3, N'نقل مکان', N'دفتر مدیریت - طبقه 3', N'دفتر HR - طبقه 1', N'نقل مکان انجام شد');
 
+-- محاسبه‌ی دوباره‌ی شمارنده‌های آمار پس از درج داده‌های اضافی
+DELETE FROM asset_statistics;
+INSERT INTO asset_statistics (department_id, status, asset_count, total_value)
+SELECT department_id, ISNULL(status, N'فعال'), COUNT(*), ISNULL(SUM(purchase_price), 0)
+FROM assets
+GROUP BY department_id, ISNULL(status, N'فعال');
+
 GO
 
 PRINT N'داده‌های اضافی درج شد!';
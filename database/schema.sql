@@ -26,6 +26,7 @@ CREATE TABLE departments (
     parent_id INT,
     created_at DATETIME DEFAULT GETUTCDATE(),
     updated_at DATETIME DEFAULT GETUTCDATE(),
+    version INT NOT NULL DEFAULT 1,  -- کنترل هم‌زمانی خوش‌بینانه
     FOREIGN KEY (parent_id) REFERENCES departments(id)
 );
 
@@ -43,8 +44,10 @@ CREATE TABLE users (
     is_admin BIT DEFAULT 0,
     is_active BIT DEFAULT 1,
     ad_user_id NVARCHAR(100),
+    hashed_password NVARCHAR(255),  -- فقط حساب‌های محلی (pbkdf2_sha256)
     created_at DATETIME DEFAULT GETUTCDATE(),
     updated_at DATETIME DEFAULT GETUTCDATE(),
+    version INT NOT NULL DEFAULT 1,  -- کنترل هم‌زمانی خوش‌بینانه
     FOREIGN KEY (department_id) REFERENCES departments(id)
 );
 
@@ -60,7 +63,8 @@ CREATE TABLE asset_categories (
     description NVARCHAR(MAX),
     asset_type NVARCHAR(50) NOT NULL,
     created_at DATETIME DEFAULT GETUTCDATE(),
-    updated_at DATETIME DEFAULT GETUTCDATE()
+    updated_at DATETIME DEFAULT GETUTCDATE(),
+    version INT NOT NULL DEFAULT 1  -- کنترل هم‌زمانی خوش‌بینانه
 );
 
 CREATE INDEX idx_asset_categories_name ON asset_categories(name);
@@ -76,7 +80,8 @@ CREATE TABLE locations (
     room NVARCHAR(50),
     description NVARCHAR(MAX),
     created_at DATETIME DEFAULT GETUTCDATE(),
-    updated_at DATETIME DEFAULT GETUTCDATE()
+    updated_at DATETIME DEFAULT GETUTCDATE(),
+    version INT NOT NULL DEFAULT 1  -- کنترل هم‌زمانی خوش‌بینانه
 );
 
 CREATE INDEX idx_locations_name ON locations(name);
@@ -98,6 +103,7 @@ CREATE TABLE assets (
     purchase_price FLOAT,
     depreciation_rate FLOAT DEFAULT 0.0,
     warranty_expiry DATETIME,
+    warranty_notified DATETIME,  -- پایان گارانتی‌ای که رویدادش ثبت شده
     
     -- مالک و مکان
     owner_id INT,
@@ -112,6 +118,7 @@ CREATE TABLE assets (
     -- تاریخچه
     created_at DATETIME DEFAULT GETUTCDATE(),
     updated_at DATETIME DEFAULT GETUTCDATE(),
+    version INT NOT NULL DEFAULT 1,  -- کنترل هم‌زمانی خوش‌بینانه
     
     FOREIGN KEY (category_id) REFERENCES asset_categories(id),
     FOREIGN KEY (owner_id) REFERENCES users(id),
@@ -120,19 +127,30 @@ CREATE TABLE assets (
 );
 
 CREATE INDEX idx_assets_asset_number ON assets(asset_number);
-CREATE INDEX idx_assets_category_id ON assets(category_id);
-CREATE INDEX idx_assets_owner_id ON assets(owner_id);
-CREATE INDEX idx_assets_department_id ON assets(department_id);
-CREATE INDEX idx_assets_location_id ON assets(location_id);
 CREATE INDEX idx_assets_status ON assets(status);
-CREATE INDEX idx_assets_asset_type ON assets(asset_type);
+-- ایندکس‌های صفحه‌بندی cursor روی (sort_key, id)
+CREATE INDEX idx_assets_updated_at ON assets(updated_at, id);
+CREATE INDEX idx_assets_created_at ON assets(created_at, id);
+CREATE INDEX idx_assets_purchase_date ON assets(purchase_date, id);
+CREATE INDEX idx_assets_purchase_price ON assets(purchase_price, id);
+CREATE INDEX idx_assets_name ON assets(name, id);
+-- ایندکس‌های ترکیبی فیلترهای رایج: (ستون برابری، status، id)
+-- جایگزین ایندکس‌های تک‌ستونی category_id، department_id، location_id، owner_id و asset_type
+CREATE INDEX idx_assets_category_status ON assets(category_id, status, id);
+CREATE INDEX idx_assets_department_status ON assets(department_id, status, id);
+CREATE INDEX idx_assets_location_status ON assets(location_id, status, id);
+CREATE INDEX idx_assets_type_status ON assets(asset_type, status, id);
+CREATE INDEX idx_assets_owner_status ON assets(owner_id, status, id);
+CREATE INDEX idx_assets_manufacturer ON assets(manufacturer, id);
+-- گارانتی‌های رو به پایان (GET /api/assets/warranty-expiring و زمان‌بند)
+CREATE INDEX idx_assets_warranty_expiry ON assets(warranty_expiry, id);
 
 -- ============ جدول asset_histories (تاریخچه تغییرات) ============
 
 CREATE TABLE asset_histories (
     id INT PRIMARY KEY IDENTITY(1,1),
     asset_id INT NOT NULL,
-    user_id INT NOT NULL,
+    user_id INT,  -- NULL = تغییر خودکار سیستم
     change_type NVARCHAR(50),
     old_value NVARCHAR(MAX),
     new_value NVARCHAR(MAX),
@@ -145,7 +163,47 @@ CREATE TABLE asset_histories (
 
 CREATE INDEX idx_asset_histories_asset_id ON asset_histories(asset_id);
 CREATE INDEX idx_asset_histories_user_id ON asset_histories(user_id);
-CREATE INDEX idx_asset_histories_created_at ON asset_histories(created_at);
+CREATE INDEX idx_asset_histories_created_at ON asset_histories(created_at, id);
+
+-- ============ جدول asset_statistics (شمارنده‌های آمار دارایی) ============
+-- همراه با نوشتن دارایی‌ها به‌صورت افزایشی به‌روز می‌شود (app/stats.py)
+
+CREATE TABLE asset_statistics (
+    id INT PRIMARY KEY IDENTITY(1,1),
+    department_id INT,
+    status NVARCHAR(20) NOT NULL,
+    asset_count INT NOT NULL DEFAULT 0,
+    total_value FLOAT NOT NULL DEFAULT 0,
+    updated_at DATETIME DEFAULT GETUTCDATE(),
+    
+    FOREIGN KEY (department_id) REFERENCES departments(id),
+    CONSTRAINT uq_asset_statistics_department_status UNIQUE (department_id, status)
+);
+
+-- ============ جدول department_closure (درخت واحدها) ============
+-- یک ردیف برای هر جفت (جد، نواده)؛ با ایجاد/جابه‌جایی واحدها نگه‌داری می‌شود (app/hierarchy.py)
+
+CREATE TABLE department_closure (
+    ancestor_id INT NOT NULL,
+    descendant_id INT NOT NULL,
+    depth INT NOT NULL,
+    
+    PRIMARY KEY (ancestor_id, descendant_id),
+    FOREIGN KEY (ancestor_id) REFERENCES departments(id),
+    FOREIGN KEY (descendant_id) REFERENCES departments(id)
+);
+
+CREATE INDEX idx_department_closure_descendant ON department_closure(descendant_id, ancestor_id);
+
+-- ============ جدول schema_version (نسخه‌ی شِما) ============
+-- سرور در شروع فقط همین جدول را با نسخه‌ی مورد انتظار (app/migrate.py) مقایسه می‌کند
+
+CREATE TABLE schema_version (
+    version INT PRIMARY KEY,
+    applied_at DATETIME DEFAULT GETUTCDATE()
+);
+
+INSERT INTO schema_version (version) VALUES (1), (2), (3), (4), (5), (6);
 
 -- ============ جدول reports (گزارش‌ها) ============
 
@@ -216,6 +274,22 @@ INSERT INTO asset_histories (asset_id, user_id, change_type, old_value, new_valu
 (3, 2, N'نقل مکان', N'دفتر IT - طبقه 2', N'دفتر مدیریت - طبقه 3', N'نقل مکان انجام شد'),
 (4, 3, N'تغییر وضعیت', N'فعال', N'غیرفعال', N'دستگاه خراب شد');
 
+-- مقداردهی اولیه‌ی شمارنده‌های آمار
+INSERT INTO asset_statistics (department_id, status, asset_count, total_value)
+SELECT department_id, ISNULL(status, N'فعال'), COUNT(*), ISNULL(SUM(purchase_price), 0)
+FROM assets
+GROUP BY department_id, ISNULL(status, N'فعال');
+
+-- مقداردهی اولیه‌ی درخت واحدها
+WITH tree (ancestor_id, descendant_id, depth) AS (
+    SELECT id, id, 0 FROM departments
+    UNION ALL
+    SELECT tree.ancestor_id, d.id, tree.depth + 1
+    FROM tree JOIN departments d ON d.parent_id = tree.descendant_id
+)
+INSERT INTO department_closure (ancestor_id, descendant_id, depth)
+SELECT ancestor_id, descendant_id, depth FROM tree;
+
 -- ایجاد یک View برای آمار کلی
 CREATE VIEW vw_asset_statistics AS
 SELECT